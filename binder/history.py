@@ -44,6 +44,11 @@ class Change(models.Model):
 
 	class Meta:
 		ordering = ['id']
+		indexes = [
+			# For finding the changes of a model since a changeset (see
+			# ModelView's changed_since)
+			models.Index(fields=['model', 'changeset'], name='binder_change_model_changeset'),
+		]
 
 
 
@@ -59,6 +64,7 @@ class __Transaction(threading.local):
 		self.uuid = None
 		self.source = None
 		self.started = False
+		self.read_only = False
 		self.changes = {}
 
 	def start(self, *, user=None, uuid=None, source=None):
@@ -88,6 +94,10 @@ class NewInstanceField:
 class DeferredM2M:
 	pass
 
+# The _history of models loaded in a read_only block
+class ReadOnlyInstance:
+	pass
+
 
 
 # History context manager. Use this.
@@ -110,6 +120,26 @@ class atomic:
 
 
 
+# Context manager for blocks which don't write anything, like read-only
+# GETs (see ModelView.read_only_dispatch).  Models loaded in it don't
+# take the snapshot of their fields that recording their changes needs,
+# so they can't be saved.
+class read_only:
+	def __enter__(self):
+		self.was_read_only = _Transaction.read_only
+		_Transaction.read_only = True
+
+	def __exit__(self, etype, value, traceback):
+		_Transaction.read_only = self.was_read_only
+		return False
+
+
+
+def is_read_only():
+	return _Transaction.read_only
+
+
+
 def _start(source=None, user=None, uuid=None):
 	if source is None:
 		raise ValueError('source may not be None')
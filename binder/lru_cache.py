@@ -0,0 +1,70 @@
+import threading
+from collections import OrderedDict, namedtuple
+
+from django.conf import settings
+
+
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+
+
+# A thread-safe LRU cache in the memory of the process, used for the
+# query plans (see binder.plan_cache) and the serialized records (see
+# binder.object_cache).  Its size is read from the setting
+# <size_setting> (or <default_size>), so it can be changed in tests; 0
+# disables caching.  Use info() to see how it's doing.
+class LRUCache(object):
+	def __init__(self, size_setting, default_size):
+		self.size_setting = size_setting
+		self.default_size = default_size
+		self._items = OrderedDict()
+		self._lock = threading.Lock()
+		self.hits = 0
+		self.misses = 0
+
+
+
+	@property
+	def maxsize(self):
+		return getattr(settings, self.size_setting, self.default_size)
+
+
+
+	# Returns the value for <key>, marking it as recently used.  Raises
+	# KeyError if it isn't in the cache.
+	def lookup(self, key):
+		with self._lock:
+			try:
+				value = self._items[key]
+			except KeyError:
+				self.misses += 1
+				raise
+			self._items.move_to_end(key)
+			self.hits += 1
+			return value
+
+
+
+	# Stores the values of <items>, a dict of {key: value}, evicting the
+	# least recently used values if the cache gets too big.
+	def store(self, items):
+		with self._lock:
+			for key, value in items.items():
+				self._items[key] = value
+				self._items.move_to_end(key)
+			while len(self._items) > self.maxsize:
+				self._items.popitem(last=False)
+
+
+
+	def info(self):
+		return CacheInfo(self.hits, self.misses, self.maxsize, len(self._items))
+
+
+
+	def clear(self):
+		with self._lock:
+			self._items.clear()
+			self.hits = 0
+			self.misses = 0
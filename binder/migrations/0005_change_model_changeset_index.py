@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('binder', '0004_history_changeset_change_date'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='change',
+            index=models.Index(fields=['model', 'changeset'], name='binder_change_model_changeset'),
+        ),
+    ]
@@ -25,6 +25,7 @@ from binder.json import jsonloads
 from binder.exceptions import BinderRequestError
 
 from . import history
+from . import versions # noqa: F401 (connects the signals which bump the model versions)
 
 
 class CaseInsensitiveCharField(CITextField):
@@ -89,11 +90,72 @@ class FieldFilter(object):
 	# The list of allowed qualifiers
 	allowed_qualifiers = []
 
+	# Process-wide caches for get_filter_class() and for_field()
+	_filter_classes = None
+	_field_filters = {}
+
 	def __init__(self, field):
 		self.field = field
 
 
 
+	# A new filter class may change which filter applies to a field, so
+	# start over when one is defined.
+	def __init_subclass__(cls, **kwargs):
+		super().__init_subclass__(**kwargs)
+		FieldFilter._filter_classes = None
+		FieldFilter._field_filters = {}
+
+
+
+	# Returns the filter class for exactly this field class, or None.
+	# With <reset>, the caches are rebuilt first, for when the fields of
+	# filter classes were changed after they were defined.
+	@staticmethod
+	def get_filter_class(field_class, reset=False):
+		if reset:
+			FieldFilter._filter_classes = None
+			FieldFilter._field_filters = {}
+
+		filter_classes = FieldFilter._filter_classes
+
+		if filter_classes is None:
+			filter_classes = {}
+			for field_filter_cls in FieldFilter.__subclasses__():
+				for field_cls in field_filter_cls.fields:
+					if filter_classes.get(field_cls):
+						raise ValueError('Field-Filter mapping conflict: {} vs {}'.format(field_filter_cls.name, field_cls.name))
+					else:
+						filter_classes[field_cls] = field_filter_cls
+
+			FieldFilter._filter_classes = filter_classes
+
+		return filter_classes.get(field_class)
+
+
+
+	# Returns a (cached) filter instance for a model field or the output
+	# field of an annotation, or None if it can't be filtered on.
+	@staticmethod
+	def for_field(field):
+		key = (getattr(field, 'model', None), field.name, field.__class__)
+		try:
+			return FieldFilter._field_filters[key]
+		except KeyError:
+			pass
+
+		filter = None
+		for field_class in field.__class__.__mro__:
+			filter_class = FieldFilter.get_filter_class(field_class)
+			if filter_class:
+				filter = filter_class(field)
+				break
+
+		FieldFilter._field_filters[key] = filter
+		return filter
+
+
+
 	def field_description(self):
 		return '{} {{{}}}.{{{}}}'.format(self.field.__class__.__name__, self.field.model.__name__, self.field.name)
 
@@ -292,25 +354,14 @@ class ArrayFieldFilter(FieldFilter):
 	fields = [ArrayField]
 	allowed_qualifiers = [None, 'contains', 'contained_by', 'overlap', 'isnull']
 
-	# Some copy/pasta involved....
 	def get_field_filter(self, field_class, reset=False):
-		f = not reset and getattr(self, '_field_filter', None)
-
-		if not f:
-			f = None
-			for field_filter_cls in FieldFilter.__subclasses__():
-				for field_cls in field_filter_cls.fields:
-					if field_cls == field_class:
-						f = field_filter_cls
-						break
-			self._field_filter = f
-
-		return f
+		return FieldFilter.get_filter_class(field_class, reset)
 
 
 	def clean_value(self, qualifier, v):
-		Filter = self.get_field_filter(self.field.base_field.__class__)
-		filter = Filter(self.field.base_field)
+		filter = FieldFilter.for_field(self.field.base_field)
+		if filter is None:
+			raise BinderRequestError('Filtering not supported for type {} ({}).'.format(self.field.base_field.__class__.__name__, self.field_description()))
 		if v == '': # Special case: This should represent the empty array, not an array with one empty string
 			return []
 		else:
@@ -471,6 +522,10 @@ class BinderModel(models.Model, metaclass=BinderModelBase):
 
 
 def history_obj_post_init(sender, instance, **kwargs):
+	if history.is_read_only():
+		instance._history = history.ReadOnlyInstance
+		return
+
 	instance._history = instance.binder_concrete_fields_as_dict(skip_deferred_fields=True)
 
 	if not instance.pk:
@@ -479,6 +534,9 @@ def history_obj_post_init(sender, instance, **kwargs):
 
 
 def history_obj_post_save(sender, instance, **kwargs):
+	if instance._history is history.ReadOnlyInstance:
+		raise RuntimeError('{} {} was loaded in a read-only block, so its changes can\'t be recorded in the history'.format(sender.__name__, instance.pk))
+
 	for field_name, new_value in instance.binder_concrete_fields_as_dict().items():
 		try:
 			old_value = instance._history[field_name]
@@ -0,0 +1,77 @@
+from django.conf import settings
+from django.core.cache import caches
+
+from .lru_cache import LRUCache
+
+
+
+# A cache for serialized records (the dicts of ModelView._get_objs), see
+# ModelView.object_cache.  The keys include the version counters of the
+# models the records are built from (see binder.versions), so saving or
+# deleting a record makes the old entries unreachable; they fall out of
+# the cache eventually.
+#
+# The backend is set with BINDER_OBJECT_CACHE:
+# - 'local' (the default): an LRU cache in the process, see
+#   LocalObjectCache.
+# - The name of one of the Django CACHES, see DjangoObjectCache.
+#
+# Both hand out copies of the records, so callers can change them.
+
+
+
+# An LRU cache in the memory of the process.  The number of records in
+# it can be set with BINDER_OBJECT_CACHE_SIZE (default 10000, 0 disables
+# caching).  Use local_objects.info() to see how it's doing.
+class LocalObjectCache(LRUCache):
+	def __init__(self):
+		super().__init__('BINDER_OBJECT_CACHE_SIZE', 10000)
+
+
+
+	# Returns a dict of {key: record} for the <keys> in the cache.
+	def get_many(self, keys):
+		objs = {}
+		for key in keys:
+			try:
+				objs[key] = dict(self.lookup(key))
+			except KeyError:
+				pass
+		return objs
+
+
+
+	# Stores the records of <objs>, a dict of {key: record}.
+	def set_many(self, objs):
+		self.store({key: dict(obj) for key, obj in objs.items()})
+
+
+
+# Stores the records in a Django cache, so processes can share them.
+# Entries expire after BINDER_OBJECT_CACHE_TIMEOUT seconds (default 300).
+class DjangoObjectCache(object):
+	def __init__(self, alias):
+		self.alias = alias
+
+
+
+	def get_many(self, keys):
+		return caches[self.alias].get_many(keys)
+
+
+
+	def set_many(self, objs):
+		caches[self.alias].set_many(objs, timeout=getattr(settings, 'BINDER_OBJECT_CACHE_TIMEOUT', 300))
+
+
+
+local_objects = LocalObjectCache()
+
+
+
+# Returns the backend set with BINDER_OBJECT_CACHE.
+def get_object_cache():
+	alias = getattr(settings, 'BINDER_OBJECT_CACHE', 'local')
+	if alias == 'local':
+		return local_objects
+	return DjangoObjectCache(alias)
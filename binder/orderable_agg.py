@@ -1,7 +1,7 @@
 # Taken from https://code.djangoproject.com/ticket/26067
 # To be removed when we depend on Django 2.2
 from django.db.models import TextField
-from django.db.models.expressions import F, OrderBy
+from django.db.models.expressions import F, OrderBy, Subquery
 from django.db.models.aggregates import Aggregate
 from django.contrib.postgres.fields import ArrayField
 
@@ -88,3 +88,22 @@ class GroupConcat(OrderableAggMixin, Aggregate):
 		if not value:
 			return []
 		return value.split(',')
+
+
+
+# Backport of ArraySubquery from Django 4.0 (Postgres only).  Turns the
+# rows of a single-column subquery into an array, keeping their order.
+class ArraySubquery(Subquery):
+	template = 'ARRAY(%(subquery)s)'
+
+	def _resolve_output_field(self):
+		return ArrayField(self.query.output_field)
+
+	def resolve_expression(self, *args, **kwargs):
+		# Subqueries normally lose their ordering, but here it
+		# determines the order of the array.
+		clone = super().resolve_expression(*args, **kwargs)
+		clone.query.order_by = self.query.order_by
+		clone.query.extra_order_by = self.query.extra_order_by
+		clone.query.default_ordering = self.query.default_ordering
+		return clone
@@ -0,0 +1,62 @@
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections, transaction
+
+from . import history
+
+
+
+# A process-wide pool of threads to run independent read-only queries
+# concurrently (see ModelView.parallel_withs).  Every thread has its own
+# database connections, so the queries don't see uncommitted changes of
+# the calling thread's transaction.
+#
+# The number of threads can be set with BINDER_PARALLEL_QUERY_THREADS
+# (default 4).  This bounds the number of extra database connections,
+# no matter how many requests are running at the same time.
+_executor = None
+_executor_lock = threading.Lock()
+
+
+
+def get_executor():
+	global _executor
+
+	with _executor_lock:
+		if _executor is None:
+			_executor = ThreadPoolExecutor(
+				max_workers=getattr(settings, 'BINDER_PARALLEL_QUERY_THREADS', 4),
+				thread_name_prefix='binder-query',
+			)
+		return _executor
+
+
+
+# Runs func(*args) in a read-only transaction on database <using>, and in
+# a history.read_only() block, as nothing is saved.  This is what runs in
+# the worker threads.  The threads keep their connections between calls
+# (there are only as many as there are threads), unless something went
+# wrong with them.
+def run_read_only(using, func, *args):
+	try:
+		with transaction.atomic(using=using), history.read_only():
+			if connections[using].vendor == 'postgresql':
+				with connections[using].cursor() as cursor:
+					cursor.execute('SET TRANSACTION READ ONLY')
+			return func(*args)
+	finally:
+		for connection in connections.all():
+			if connection.errors_occurred:
+				connection.close()
+
+
+
+# Calls func(*args) in a worker thread, see run_read_only().  Returns a
+# concurrent.futures.Future.  The context variables of the calling
+# thread are copied, so the queries are routed the same way (see
+# binder.replicas).
+def submit_read_only(using, func, *args):
+	return get_executor().submit(contextvars.copy_context().run, run_read_only, using, func, *args)
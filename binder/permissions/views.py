@@ -10,6 +10,7 @@ from django.core.exceptions import ObjectDoesNotExist
 
 from binder.exceptions import BinderForbidden, BinderNotFound
 from binder.views import ModelView
+from binder import read_only
 
 
 
@@ -121,7 +122,9 @@ class PermissionView(ModelView):
 		Make sure that permissions are checked, and scoping is done
 		"""
 		setattr(request, '_has_permission_check', False)
-		with transaction.atomic():
+		# Read-only requests have nothing to roll back, so they don't need
+		# the savepoint.
+		with read_only.atomic() if self._is_read_only(request) else transaction.atomic():
 			result = super().dispatch(request, *args, **kwargs)
 
 			# If an error occured, we can return the result directly
@@ -0,0 +1,32 @@
+from .lru_cache import LRUCache
+
+
+
+# An LRU cache for parsed GET parameters.  Views store the result of
+# parsing filters, withs, wheres and include_annotations here, keyed on
+# the view class and the parameters without their values, so requests of
+# the same shape only have to fill in the values.
+#
+# The size can be set with BINDER_QUERY_PLAN_CACHE_SIZE (default 1024,
+# 0 disables caching).  Use query_plans.info() to see how it's doing.
+class PlanCache(LRUCache):
+	def __init__(self):
+		super().__init__('BINDER_QUERY_PLAN_CACHE_SIZE', 1024)
+
+
+
+	# Returns the plan for <key>, calling compile() to create it if it
+	# isn't in the cache.  If compile() raises, nothing is cached.
+	def get(self, key, compile):
+		try:
+			return self.lookup(key)
+		except KeyError:
+			pass
+
+		plan = compile()
+		self.store({key: plan})
+		return plan
+
+
+
+query_plans = PlanCache()
@@ -64,7 +64,7 @@ class CsvExportView:
 		request.GET._mutable = mutable
 
 		parent_result = self.get(request)
-		parent_data = jsonloads(parent_result.content)
+		parent_data = jsonloads(parent_result.getvalue())
 
 		file_name = self.csv_settings.file_name
 		if callable(file_name):
@@ -55,7 +55,7 @@ class FileHashView:
         else:
             return '?' + '&'.join(params)
 
-    def _get_objs(self, queryset, request=None, annotations=None):
+    def _get_objs(self, queryset, request=None, annotations=None, fields=None):
         params = {
             obj.pk: {
                 field: self._get_params(obj, field)
@@ -66,13 +66,13 @@ class FileHashView:
             for obj in queryset
         }
 
-        data = super()._get_objs(queryset, request, annotations)
+        data = super()._get_objs(queryset, request, annotations, fields)
 
         for obj in data:
             obj.update({
                 field: obj[field] + field_params
                 for field, field_params in params[obj['id']].items()
-                if obj[field] is not None
+                if obj.get(field) is not None
             })
 
         return data
@@ -217,9 +217,9 @@ def parse_request(data, allowed_methods, responses, request):
 def serialize_response(response):
 	content_type = response.get('Content-Type', '')
 	if content_type == 'application/json':
-		body = jsonloads(response.content)
+		body = jsonloads(response.getvalue())
 	else:
-		body = response.content.decode()
+		body = response.getvalue().decode()
 
 	return {
 		'status': response.status_code,
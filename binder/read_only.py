@@ -0,0 +1,24 @@
+import contextlib
+
+from django.db import transaction
+
+
+
+# Runs the block in a READ ONLY transaction on database <using>, see
+# ModelView.read_only_dispatch.  With PostgreSQL the transaction is made
+# read-only with SET TRANSACTION READ ONLY as its first statement.  Other
+# databases run the block without a transaction.
+#
+# Within a transaction which is already open, the block just runs in
+# that transaction; a savepoint wouldn't make it read-only either.
+@contextlib.contextmanager
+def atomic(using=None):
+	connection = transaction.get_connection(using)
+	if connection.in_atomic_block or connection.vendor != 'postgresql':
+		yield
+		return
+
+	with transaction.atomic(using=using):
+		with connection.cursor() as cursor:
+			cursor.execute('SET TRANSACTION READ ONLY')
+		yield
@@ -0,0 +1,148 @@
+import contextlib
+import contextvars
+import functools
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from . import history
+from .read_only import atomic as read_only_atomic
+
+
+
+# Routing of list and detail GETs to a read replica.  This needs two
+# settings:
+#
+#   BINDER_READ_REPLICA = 'replica'    # The database alias of the replica
+#   DATABASE_ROUTERS = ['binder.replicas.ReplicaRouter']
+#
+# ModelView.dispatch() then runs the reads of list and detail GETs
+# (including the counts and withs) on the replica, in a transaction of
+# their own.  Everything else, including custom routes, stays on the
+# primary.
+#
+# Replicas lag behind, so a client which just wrote something wouldn't
+# see it.  To prevent this, a session or token which committed a history
+# changeset reads from the primary for BINDER_READ_REPLICA_STICKINESS
+# seconds (default 10) afterwards.  This is remembered in the cache set
+# with BINDER_READ_REPLICA_CACHE (default 'default'), which has to be a
+# cache which all processes share.
+
+
+
+# The database to read from in the current request, if not the primary
+_read_alias = contextvars.ContextVar('binder_read_alias', default=None)
+
+# Who is making the current request, see get_identity()
+_identity = contextvars.ContextVar('binder_identity', default=None)
+
+
+
+def get_replica():
+	return getattr(settings, 'BINDER_READ_REPLICA', None)
+
+
+
+def _get_cache():
+	return caches[getattr(settings, 'BINDER_READ_REPLICA_CACHE', 'default')]
+
+
+
+def _key(identity):
+	return 'binder:primary:{}'.format(hashlib.sha1(identity.encode()).hexdigest())
+
+
+
+# Returns what identifies the client of <request> for stickiness: its
+# token if it sends one, otherwise its session, or None if it has neither.
+def get_identity(request):
+	authorization = request.META.get('HTTP_AUTHORIZATION')
+	if authorization:
+		return 'token:' + authorization
+	session = getattr(request, 'session', None)
+	if session is not None and session.session_key:
+		return 'session:' + session.session_key
+	return None
+
+
+
+# Keeps <identity> on the primary for the next
+# BINDER_READ_REPLICA_STICKINESS seconds.
+def stick(identity):
+	_get_cache().set(_key(identity), True, timeout=getattr(settings, 'BINDER_READ_REPLICA_STICKINESS', 10))
+
+
+
+def is_sticky(identity):
+	return identity is not None and _get_cache().get(_key(identity), False)
+
+
+
+# Returns the alias to read from for GETs of <request>: the replica,
+# unless there is none or the client recently wrote something.  None
+# means the primary.
+def get_read_alias(request):
+	replica = get_replica()
+	if replica is None or is_sticky(get_identity(request)):
+		return None
+	return replica
+
+
+
+# Returns the alias the reads of the current request go to, or None for
+# the primary.
+def get_current_read_alias():
+	return _read_alias.get()
+
+
+
+# Runs the block for <request>, with its reads on database <alias> (if
+# not None), in a transaction so they all see the same snapshot.  If
+# <read_only>, that is a READ ONLY transaction (see binder.read_only).
+@contextlib.contextmanager
+def routing(request, alias=None, read_only=False):
+	identity_token = _identity.set(get_identity(request))
+	alias_token = _read_alias.set(alias)
+	try:
+		if alias is None:
+			yield
+		else:
+			with (read_only_atomic if read_only else transaction.atomic)(using=alias):
+				yield
+	finally:
+		_read_alias.reset(alias_token)
+		_identity.reset(identity_token)
+
+
+
+class ReplicaRouter:
+	def db_for_read(self, model, **hints):
+		return _read_alias.get()
+
+	def db_for_write(self, model, **hints):
+		return None
+
+	# The replica has the same records as the primary
+	def allow_relation(self, obj1, obj2, **hints):
+		if {obj1._state.db, obj2._state.db} <= {DEFAULT_DB_ALIAS, get_replica()}:
+			return True
+		return None
+
+	# The replica gets its tables from the primary
+	def allow_migrate(self, db, app_label, **hints):
+		if db == get_replica():
+			return False
+		return None
+
+
+
+def _transaction_commit(sender, changeset, **kwargs):
+	identity = _identity.get()
+	if identity is not None and get_replica() is not None:
+		transaction.on_commit(functools.partial(stick, identity), using=changeset._state.db)
+
+
+
+history.transaction_commit.connect(_transaction_commit, dispatch_uid='binder.replicas')
@@ -1,4 +1,5 @@
 from importlib import import_module
+from types import MappingProxyType
 
 import django
 from django.apps import apps
@@ -100,6 +101,8 @@ class Router(object):
 		self.route_views = {}
 		# FIXME: this needs to be much much better defined
 		self.name_models = {}
+		# The relation graph: {view class: {fieldname: RelatedModel}}
+		self.relations = {}
 
 
 
@@ -114,6 +117,11 @@ class Router(object):
 			self.model_views[view.model] = view
 			self.name_models[view._model_name()] = view.model
 
+		if view.model is not None:
+			# Compile these now, so requests don't have to.
+			view._get_serialization_plan()
+			self.relations[view] = MappingProxyType(view._get_relations())
+
 		if view.route is not None:
 			if isinstance(view.route, Route):
 				route = view.route
@@ -140,6 +148,22 @@ class Router(object):
 
 
 
+	# Resolve a list of relation names, starting at <view>, to a tuple of
+	# RelatedModels using the relation graph.  Returns None if (part of)
+	# the path isn't in the graph.
+	def follow_related(self, view, fieldspec):
+		result = ()
+		for fieldname in fieldspec:
+			try:
+				related = self.relations[view][fieldname]
+				view = self.model_views[related.model]
+			except KeyError:
+				return None
+			result += (related,)
+		return result
+
+
+
 	def model_view(self, model):
 		try:
 			return self.model_views[model]
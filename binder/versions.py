@@ -0,0 +1,124 @@
+import functools
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections, transaction
+from django.db.models import signals
+
+
+
+# A version counter per model, used for the ETags of GETs (see
+# ModelView.etags).  The counter of a model is bumped when the
+# transaction in which one of its records was saved or deleted, or one of
+# its many-to-many relations was changed, is committed.  Bumping on
+# commit means that a request which has seen the new version also sees
+# the new data.
+#
+# The counters live in a Django cache (BINDER_VERSION_CACHE, default
+# 'default').  This has to be a cache which all processes share (like
+# memcached or redis, not the default in-memory cache), otherwise other
+# processes don't see the new versions.
+#
+# Writes which don't send signals (QuerySet.update(), bulk_create(), raw
+# SQL) don't bump the counters; call bump() for those.
+
+
+
+def _get_cache():
+	return caches[getattr(settings, 'BINDER_VERSION_CACHE', 'default')]
+
+
+
+def _key(model):
+	return 'binder:version:{}'.format(model._meta.label_lower)
+
+
+
+# The model itself, and the tables a save or delete of it also changes:
+# its concrete model (for proxies) and its parents (for multi-table
+# inheritance).
+def _get_changed_models(model):
+	concrete_model = model._meta.concrete_model
+	return {model, concrete_model, *concrete_model._meta.get_parent_list()}
+
+
+
+# Bumps the counters of <models> right away.
+def bump(*models):
+	cache = _get_cache()
+	for model in models:
+		key = _key(model)
+		try:
+			cache.incr(key)
+		except ValueError:
+			# Not in the cache (anymore), see get_versions()
+			cache.add(key, _initial_version(), timeout=None)
+
+
+
+# Returns a dict of {model: version} for <models>.
+def get_versions(models):
+	cache = _get_cache()
+	keys = {_key(model): model for model in models}
+	versions = cache.get_many(keys)
+	for key in keys.keys() - versions.keys():
+		# Start counters which went missing from a new number, so that
+		# versions from before can't come back.
+		cache.add(key, _initial_version(), timeout=None)
+		versions[key] = cache.get(key)
+	return {model: versions[key] for key, model in keys.items()}
+
+
+
+def _initial_version():
+	return time.time_ns() // 1000
+
+
+
+# The function bumping each model on commit.  There is one per model, so
+# we can see if it's already waiting for the commit.
+@functools.lru_cache(maxsize=None)
+def _get_bumper(model):
+	return functools.partial(bump, model)
+
+
+
+# Bumps the counters of <models> when the current transaction on database
+# <using> is committed, or right away if there is none.
+def bump_on_commit(models, using):
+	connection = connections[using]
+	if not connection.in_atomic_block:
+		bump(*models)
+		return
+
+	# A bump which is already waiting can only be reused if it isn't
+	# dropped by rolling back a savepoint we're not in.
+	savepoint_ids = set(connection.savepoint_ids)
+	waiting = {entry[1] for entry in connection.run_on_commit if set(entry[0]) <= savepoint_ids}
+	for model in models:
+		bumper = _get_bumper(model)
+		if bumper not in waiting:
+			transaction.on_commit(bumper, using=using)
+
+
+
+def _post_save(sender, using, **kwargs):
+	bump_on_commit(_get_changed_models(sender), using)
+
+
+
+def _post_delete(sender, using, **kwargs):
+	bump_on_commit(_get_changed_models(sender), using)
+
+
+
+def _m2m_changed(sender, instance, action, model, using, **kwargs):
+	if action.startswith('post_'):
+		bump_on_commit(_get_changed_models(type(instance)) | _get_changed_models(model) | {sender}, using)
+
+
+
+signals.post_save.connect(_post_save, dispatch_uid='binder.versions')
+signals.post_delete.connect(_post_delete, dispatch_uid='binder.versions')
+signals.m2m_changed.connect(_m2m_changed, dispatch_uid='binder.versions')
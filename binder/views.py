@@ -1,12 +1,17 @@
+import contextlib
 import logging
+import re
 import time
 import io
-import inspect
 import os
 import hashlib
 import datetime
 import mimetypes
 import functools
+import itertools
+import operator
+import base64
+import binascii
 from collections import defaultdict, namedtuple
 from PIL import Image
 from inspect import getmro
@@ -14,22 +19,36 @@ from inspect import getmro
 import django
 from django.views.generic import View
 from django.core.exceptions import ObjectDoesNotExist, FieldError, ValidationError, FieldDoesNotExist
-from django.http import HttpResponse, StreamingHttpResponse, HttpResponseForbidden
+from django.http import HttpResponse, StreamingHttpResponse, HttpResponseForbidden, HttpResponseNotModified
 from django.http.request import RawPostDataException
 from django.db import models, connections
-from django.db.models import Q, F
+from django.db.models import Q, F, OuterRef, Window, Count, Subquery
+from django.db.models.functions import Coalesce, DenseRank
 from django.db.models.lookups import Transform
 from django.utils import timezone
+from django.utils.http import parse_etags, quote_etag
 from django.db import transaction
-from django.db.models.expressions import BaseExpression, Value, CombinedExpression, OrderBy, ExpressionWrapper
+from django.core.cache import cache
+from django.db.models.expressions import BaseExpression, Value, CombinedExpression, OrderBy, ExpressionWrapper, Col, Ref
+from django.db.models.sql.query import Query
+from django.db.models.sql.where import WhereNode, ExtraWhere, SubqueryConstraint
 from django.db.models.fields.reverse_related import ForeignObjectRel
 
 
 from .exceptions import BinderException, BinderFieldTypeError, BinderFileSizeExceeded, BinderForbidden, BinderImageError, BinderImageSizeExceeded, BinderInvalidField, BinderIsDeleted, BinderIsNotDeleted, BinderMethodNotAllowed, BinderNotAuthenticated, BinderNotFound, BinderReadOnlyFieldError, BinderRequestError, BinderValidationError, BinderFileTypeIncorrect, BinderInvalidURI
-from . import history
-from .orderable_agg import OrderableArrayAgg, GroupConcat
+from . import history, read_only, replicas
+from .orderable_agg import OrderableArrayAgg, GroupConcat, ArraySubquery
 from .models import FieldFilter, BinderModel, ContextAnnotation, OptionalAnnotation, BinderFileField
-from .json import JsonResponse, jsonloads
+from .json import JsonResponse, jsonloads, jsondumps
+from .plan_cache import query_plans
+from .parallel import submit_read_only
+from .versions import get_versions
+from .object_cache import get_object_cache
+
+
+where_clause_re = re.compile(r'([^,()]*)\(([^()=]*)=([^()=]*)\)(?=,|$)')
+
+COUNT_STRATEGIES = ('exact', 'estimate', 'capped', 'cached')
 
 
 def split_par_aware(content):
@@ -65,6 +84,96 @@ def get_default_annotations(model):
 	return annotations
 
 
+# Splits a where= parameter like "animals(name:startswith=Sc),animals.caretaker(id=1)"
+# into a list of (target_rel, field, value) tuples.  Returns None if the
+# string doesn't look like that; _parse_wheres() will report the error.
+def split_where_clauses(where_str):
+	clauses = []
+	pos = 0
+	while pos < len(where_str):
+		if where_str[pos] == ',':
+			pos += 1
+			continue
+		match = where_clause_re.match(where_str, pos)
+		if not match:
+			return None
+		clauses.append(match.groups())
+		pos = match.end()
+	return clauses
+
+
+# ['foo.bar', 'foo.qux', 'foo.bar.hoi'] => {'foo': {'bar': {'hoi': {}}, 'qux': {}}}
+def withs_to_nested_set(withs, result=None):
+	if result is None:
+		result = {}
+
+	for w in withs:
+		head, *tail = w.split('.')
+		if head not in result:
+			result[head] = {}
+		if tail:
+			withs_to_nested_set(['.'.join(tail)], result[head])
+
+	return result
+
+
+# {frozenset(['a']): {1, 2}, frozenset(['b']): {2, 3}}
+# => {frozenset(['a']): {1}, frozenset(['a', 'b']): {2}, frozenset(['b']): {3}}
+#
+# Every id ends up in the group of the union of all annotation sets it
+# appears in, so there is exactly one group per distinct union.  This
+# takes one pass over the ids, no matter how many sets overlap.
+def group_ids_by_annotations(annotation_ids):
+	annotations_by_id = {}
+	# Reuse the same frozenset for the same union, instead of building
+	# (and hashing) a new one for every id.
+	unions = {}
+	for annotations, ids in annotation_ids.items():
+		for id in ids:
+			current = annotations_by_id.get(id)
+			if current is None:
+				annotations_by_id[id] = annotations
+			elif not annotations <= current:
+				key = (current, annotations)
+				union = unions.get(key)
+				if union is None:
+					union = unions[key] = current | annotations
+				annotations_by_id[id] = union
+
+	result = defaultdict(set)
+	for id, annotations in annotations_by_id.items():
+		result[annotations].add(id)
+	return dict(result)
+
+
+# Converts a list of records (dicts) to a table, as sent with
+# ?format=columnar: {'fields': [names], 'rows': [[values]]}.  Records
+# which don't have one of the fields get null for it.
+def objs_to_table(objs):
+	fields = {}
+	for obj in objs:
+		fields.update(dict.fromkeys(obj))
+	fields = list(fields)
+	return {'fields': fields, 'rows': [[obj.get(f) for f in fields] for obj in objs]}
+
+
+# Combines tables (see objs_to_table) into one table with all of their
+# fields.  Rows get null for the fields their table doesn't have.
+def merge_tables(tables):
+	if len(tables) == 1:
+		return tables[0]
+
+	fields = list(dict.fromkeys(f for table in tables for f in table['fields']))
+	rows = []
+	for table in tables:
+		if table['fields'] == fields:
+			rows.extend(table['rows'])
+		else:
+			indexes = [table['fields'].index(f) if f in table['fields'] else None for f in fields]
+			rows.extend([[None if i is None else row[i] for i in indexes] for row in table['rows']])
+	return {'fields': fields, 'rows': rows}
+
+
 # Haha kill me now
 def multiput_get_id(bla):
 	return bla['id'] if isinstance(bla, dict) else bla
@@ -128,6 +237,108 @@ def annotate(qs, request=None, annotations=None):
 
 
 
+# Yields <node> and all expressions in it (depth first), where <node>
+# is an expression, a where tree or a (sub)query.
+def walk_expressions(node):
+	yield node
+	if isinstance(node, WhereNode):
+		children = node.children
+	elif isinstance(node, Query):
+		children = [node.where, *node.annotations.values()]
+	elif hasattr(node, 'get_source_expressions'):
+		children = node.get_source_expressions()
+	else:
+		children = []
+
+	for child in children:
+		if child is not None:
+			yield from walk_expressions(child)
+
+
+# Returns whether <expression> (not an aggregate) of <query> joins a
+# to-many relation, in which case it gives a record for every related
+# record.
+def _is_multi_valued(query, expression):
+	for node in walk_expressions(expression):
+		if not isinstance(node, Col):
+			continue
+		join = query.alias_map.get(node.alias)
+		while getattr(join, 'parent_alias', None):
+			if join.join_field.one_to_many or join.join_field.many_to_many:
+				return True
+			join = query.alias_map.get(join.parent_alias)
+	return False
+
+
+# Removes the annotations which aren't filtered or ordered on from
+# <query>, except for those in <selected>, together with the joins only
+# they needed and the GROUP BY of unused aggregates.  Annotations over
+# to-many relations stay too, as they multiply the records.  So this
+# doesn't change the number of records, and it's meant for counting, or
+# for fetching only some columns with values().  Returns False if it
+# can't tell what's needed, in which case the query is left alone.
+def strip_unused_annotations(query, selected=()):
+	if not query.annotations or query.extra or query.extra_order_by or query.distinct_fields or query.combinator or isinstance(query.group_by, tuple):
+		return False
+
+	where = list(walk_expressions(query.where))
+	if any(isinstance(expression, (ExtraWhere, SubqueryConstraint)) for expression in where):
+		return False
+
+	# Filters on annotations contain the annotation expressions themselves,
+	# so only aggregates (for the GROUP BY) and annotations referred to
+	# by name have to stay.
+	ids = {id(expression) for expression in where}
+	refs = {expression.refs for expression in where if isinstance(expression, Ref)}
+	refs.update(selected)
+	for order in query.order_by:
+		if isinstance(order, str):
+			refs.add(order.lstrip('-'))
+		else:
+			refs.update(expression.name for expression in walk_expressions(order) if isinstance(expression, F))
+	annotations = {
+		name: annotation for name, annotation in query.annotations.items()
+		if name in refs
+		or (id(annotation) in ids and annotation.contains_aggregate)
+		or (not annotation.contains_aggregate and _is_multi_valued(query, annotation))
+	}
+	if len(annotations) == len(query.annotations):
+		return False
+
+	grouped = any(annotation.contains_aggregate for annotation in annotations.values())
+	# An aggregate filter we couldn't trace back to its annotation
+	if query.where.contains_aggregate and not grouped:
+		return False
+
+	needed = {query.base_table}
+	for expression in itertools.chain(where, *map(walk_expressions, annotations.values())):
+		if isinstance(expression, Col):
+			needed.add(expression.alias)
+		elif isinstance(expression, Query):
+			needed.update(expression.external_aliases)
+
+	# A join also needs the joins leading up to it
+	for alias in list(needed):
+		join = query.alias_map.get(alias)
+		while getattr(join, 'parent_alias', None):
+			needed.add(join.parent_alias)
+			join = query.alias_map.get(join.parent_alias)
+
+	query.annotations = annotations
+	if query.annotation_select_mask is None:
+		query.set_annotation_mask(None)
+	else:
+		query.set_annotation_mask(query.annotation_select_mask & set(annotations))
+	if query.group_by is True and not grouped:
+		query.group_by = None
+	for alias in query.alias_map:
+		if alias not in needed:
+			query.alias_refcount[alias] = 0
+
+	return True
+
+
+
 logger = logging.getLogger(__name__)
 
 
@@ -153,6 +364,10 @@ def sign(num):
 
 RelatedModel = namedtuple('RelatedModel', ['fieldname', 'model', 'reverse_fieldname'])
 FilterDescription = namedtuple('FilterDescription', ['filter', 'need_distinct'])
+FilterPlan = namedtuple('FilterPlan', ['filter', 'qualifier', 'invert', 'partial', 'need_distinct'])
+KeysetColumn = namedtuple('KeysetColumn', ['path', 'descending', 'nulls_last'])
+SerializedField = namedtuple('SerializedField', ['name', 'attname', 'file_field', 'binder_file'])
+SerializationPlan = namedtuple('SerializationPlan', ['fields', 'pk_attname', 'shown_annotations', 'hidden_annotations', 'properties', 'needs_instances', 'restricted'])
 
 # Stolen and improved from https://stackoverflow.com/a/30462851
 def image_transpose_exif(im):
@@ -273,10 +488,85 @@ class ModelView(View):
 	# Fields to allow POST/GET/DELETE files on.
 	file_fields = []
 
+	# Fields which are left out of list GETs (and not selected), for
+	# example large text or JSON columns which are only needed when
+	# looking at a single record.  They can still be requested with
+	# ?fields=*,notes.
+	list_deferred_fields = []
+
 	# Pagination limit default and max. Use None for no limit.
 	limit_default = 20
 	limit_max = None
 
+	# How meta.total_records is determined.  Clients can pick another
+	# strategy with ?count_strategy=.  One of:
+	# 'exact': a plain COUNT over the filtered queryset.
+	# 'estimate': the row estimate of the Postgres planner, which is
+	#   nearly free but can be way off.  Estimates below
+	#   count_estimate_threshold are replaced by an exact count.
+	# 'capped': count at most count_cap records.
+	# 'cached': an exact count, cached for count_cache_timeout seconds
+	#   per distinct count query.
+	count_strategy = 'exact'
+	count_estimate_threshold = 1000
+	count_cap = 10000
+	count_cache_timeout = 60
+
+	# If True, list GETs are streamed to the client in chunks of
+	# streaming_chunk_size records, which are fetched through a
+	# server-side cursor.  This keeps memory use down for huge responses
+	# (think limit=none).  The response looks the same, but errors that
+	# occur halfway can't be turned into a proper error response anymore.
+	streaming = False
+	streaming_chunk_size = 2000
+
+	# If True, the records of the withs of a GET are fetched concurrently
+	# (one query per related model and set of annotations) on a bounded
+	# pool of threads with their own read-only database connections.  See
+	# binder.parallel.  Those connections don't see uncommitted changes,
+	# so only use this for views which don't modify data in GETs.
+	parallel_withs = False
+
+	# Default maximum number of related ids per record for to-many withs,
+	# for example {'animals': 100}.  Only the first ones in the related
+	# model's default ordering are included, and the records whose list
+	# was cut off are listed in meta.with_truncated.  Can be overridden
+	# per request with with_limit=animals:5.
+	with_limits = {}
+
+	# How records are serialized in GETs.  With 'values', the rows are
+	# fetched with values_list() and turned into dicts directly, which
+	# avoids instantiating models (and their post_init handlers, like the
+	# history snapshot).  Views with shown_properties or BinderFileFields
+	# need model instances, so they always behave like 'instances'.
+	serialization_engine = 'values'
+
+	# If True, GETs get a weak ETag derived from the version counters of
+	# the models the response is built from (see binder.versions), the
+	# query parameters and the user.  A request with a matching
+	# If-None-Match header gets a 304 Not Modified without running any
+	# queries.  This needs a cache which all processes share, see
+	# binder.versions.
+	etags = False
+
+	# If True, the records serialized by GETs are cached (see
+	# binder.object_cache), keyed on their id, the annotations and fields
+	# and the version counters of the models they are built from (see
+	# _get_object_cache_models).  The scoping, filtering and ordering
+	# query still runs every time, but only for the ids; only the records
+	# which aren't in the cache are serialized.  Records with annotations
+	# which depend on the request (ContextAnnotation or callables) are
+	# never cached, and neither are records with shown_properties, as
+	# those can depend on anything.
+	object_cache = False
+
+	# If True, requests with safe methods (GET, HEAD and OPTIONS) run in
+	# a READ ONLY transaction (see binder.read_only), without savepoints
+	# and without the history machinery: models loaded in them don't take
+	# the snapshot of their fields that history needs, and can't be saved.
+	# Custom routes with safe methods must not write anything either.
+	read_only_dispatch = False
+
 	# Size limit (in MB, floats ok) of uploaded files.
 	# NOTE: files are fully uploaded before this size check is performed, so
 	# this is not an adequate protection against DoS attacks. Also, rejecting
@@ -313,6 +603,16 @@ class ModelView(View):
 	#  }
 	virtual_relations = {}
 
+	# How _get_with_ids collects the ids of to-many relations.  With
+	# 'aggregate', the ids of all withs are aggregated into arrays in one
+	# query over joins of all relations.  With several to-many withs the
+	# joins multiply each other's rows, so the arrays can contain lots of
+	# duplicates, which are only removed in Python.  With 'subquery'
+	# (Postgres only), every to-many relation gets its own ARRAY()
+	# subquery which selects each related record once, in the model's
+	# default ordering.
+	with_ids_strategy = 'aggregate'
+
 	@property
 	def AggStrategy(self):
 		return GroupConcat if connections[self.model.objects.db].vendor == 'mysql' else OrderableArrayAgg
@@ -365,8 +665,20 @@ class ModelView(View):
 
 		response = None
 		try:
+			read_alias = self._get_read_alias(request, kwargs)
+			is_read_only = self._is_read_only(request)
+			if is_read_only:
+				# No history to record, and no savepoints.  The transaction
+				# is on the database the reads go to; for the replica,
+				# routing() already opened it.
+				atomic = read_only.atomic(using=read_alias)
+				history_atomic = history.read_only()
+			else:
+				atomic = transaction.atomic()
+				history_atomic = history.atomic(source='http', user=request.user, uuid=request.request_id)
+
 			#### START TRANSACTION
-			with transaction.atomic(), history.atomic(source='http', user=request.user, uuid=request.request_id):
+			with replicas.routing(request, read_alias, is_read_only), atomic, history_atomic:
 				if not kwargs.pop('unauthenticated', False) and not request.user.is_authenticated:
 					raise BinderNotAuthenticated()
 
@@ -395,22 +707,25 @@ class ModelView(View):
 		return response
 
 
-	# This returns a (cached) filterclass for a field class.
-	def get_field_filter(self, field_class, reset=False):
-		f = not reset and getattr(self, '_field_filters', None)
-
-		if not f:
-			f = {}
-			for field_filter_cls in FieldFilter.__subclasses__():
-				for field_cls in field_filter_cls.fields:
-					if f.get(field_cls):
-						raise ValueError('Field-Filter mapping conflict: {} vs {}'.format(field_filter_cls.name, field_cls.name))
-					else:
-						f[field_cls] = field_filter_cls
+	# Whether <request> is dispatched read-only, see read_only_dispatch.
+	def _is_read_only(self, request):
+		return self.read_only_dispatch and request.method in ('GET', 'HEAD', 'OPTIONS')
 
-			self._field_filters = f
 
-		return f.get(field_class)
+	# Returns the database alias to read from in this request, or None
+	# for the primary.  List and detail GETs read from the replica, if
+	# there is one (see binder.replicas); custom routes, file fields and
+	# history may do anything, so they stay on the primary.
+	def _get_read_alias(self, request, kwargs):
+		if request.method != 'GET' or kwargs.keys() & {'method', 'file_field', 'history'}:
+			return None
+		return replicas.get_read_alias(request)
+
+
+	# This returns the filterclass for a field class.  With <reset>, the
+	# mapping is rebuilt first (see FieldFilter.get_filter_class).
+	def get_field_filter(self, field_class, reset=False):
+		return FieldFilter.get_filter_class(field_class, reset)
 
 
 	# Like model._meta.model_name, except it converts camelcase to underscores
@@ -448,25 +763,219 @@ class ModelView(View):
 	# Kinda like model_to_dict() for multiple objects.
 	# Return a list of dictionaries, one per object in the queryset.
 	# Includes a list of ids for all m2m fields (including reverse relations).
-	def _get_objs(self, queryset, request, annotations=None):
-		datas = []
-		datas_by_id = {} # Save datas so we can annotate m2m fields later (avoiding a query)
-		objs_by_id = {} # Same for original objects
+	#
+	# If <fields> is given, only those fields, annotations, properties and
+	# m2m_fields (and the id) are included.
+	def _get_objs(self, queryset, request, annotations=None, fields=None):
+		plan, annotations, m2m_fields = self._get_objs_plan(request, annotations, fields)
+
+		if self._can_cache_objs(queryset, request, plan, annotations):
+			return self._get_cached_objs(queryset, plan, annotations, m2m_fields, fields)
+
+		return self._serialize_objs(queryset, plan, annotations, m2m_fields)
 
+
+	# Serializes the records of <queryset> for _get_objs().
+	def _serialize_objs(self, queryset, plan, annotations, m2m_fields):
 		# Serialize the objects!
-		if self.shown_fields is None:
-			fields = [f for f in self.model._meta.fields if f.name not in self.hidden_fields]
+		if self._can_serialize_values(queryset, plan):
+			names, rows_by_id = self._serialize_values(queryset, plan, annotations)
+			datas_by_id = {pk: dict(zip(names, row)) for pk, row in rows_by_id.items()}
+			objs_by_id = {}
 		else:
-			fields = [f for f in self.model._meta.fields if f.name in self.shown_fields]
+			datas_by_id, objs_by_id = self._serialize_instances(queryset, plan, annotations)
+
+		self._annotate_objs(datas_by_id, objs_by_id, m2m_fields)
+
+		return list(datas_by_id.values()) # order matters!
+
+
+	# Like _get_objs(), but returns the records as a table (see
+	# objs_to_table), for ?format=columnar.  The rows are built straight
+	# from the rows of the query, without a dict per record.
+	def _get_table(self, queryset, request, annotations=None, fields=None):
+		# Views which customize _get_objs() get their records converted
+		if type(self)._get_objs is not ModelView._get_objs:
+			return objs_to_table(self._get_objs(queryset, request, annotations, fields))
+
+		plan, annotations, m2m_fields = self._get_objs_plan(request, annotations, fields)
+
+		if self._can_serialize_values(queryset, plan):
+			names, rows_by_id = self._serialize_values(queryset, plan, annotations)
+			width = len(names)
+			rows_by_id = {pk: list(row[:width]) for pk, row in rows_by_id.items()}
+		else:
+			datas_by_id, objs_by_id = self._serialize_instances(queryset, plan, annotations)
+			names = [f.name for f in plan.fields] + list(annotations) + [prop for prop, getter in plan.properties]
+			rows_by_id = {pk: [data[name] for name in names] for pk, data in datas_by_id.items()}
+
+		for field_name, values in self._get_m2m_values(rows_by_id.keys(), m2m_fields):
+			names.append(field_name)
+			for pk, row in rows_by_id.items():
+				row.append(values(pk))
+
+		return {'fields': names, 'rows': list(rows_by_id.values())} # order matters!
+
+
+	# Whether _get_objs() can use the object cache.  Only GETs do, as
+	# other requests may read records they changed themselves, and the
+	# version counters are only bumped on commit.
+	def _can_cache_objs(self, queryset, request, plan, annotations):
+		if not self.object_cache or request.method != 'GET':
+			return False
+		if not isinstance(queryset, django.db.models.query.QuerySet) or queryset._result_cache is not None:
+			return False
+		# The records are found by their id
+		if not any(f.attname == plan.pk_attname for f in plan.fields):
+			return False
+		if plan.properties:
+			return False
+
+		for name in annotations:
+			expr = getattr(self.model.Annotations, name)
+			if isinstance(expr, OptionalAnnotation):
+				expr = expr._expr
+			if isinstance(expr, ContextAnnotation) or (callable(expr) and not isinstance(expr, (F, BaseExpression))):
+				return False
+		return True
+
+
+	# Like _serialize_objs(), but takes the records from the object cache
+	# where possible.  The ids of the records are always taken from
+	# <queryset>, so the scoping of get_queryset() decides which records
+	# the user gets, cached or not.
+	def _get_cached_objs(self, queryset, plan, annotations, m2m_fields, fields):
+		# The versions have to be read before the records, otherwise we
+		# could cache records from before a change under the version after.
+		versions = get_versions(self._get_object_cache_models())
+		prefix = hashlib.sha1(jsondumps([
+			'{}.{}'.format(type(self).__module__, type(self).__qualname__),
+			sorted(annotations),
+			None if fields is None else sorted(fields),
+			sorted((model._meta.label_lower, version) for model, version in versions.items()),
+		]).encode()).hexdigest()
+
+		pk_queryset = queryset.all()
+		strip_unused_annotations(pk_queryset.query)
+		# See _serialize_instances() for why records may appear more than once
+		pks = list(dict.fromkeys(pk_queryset.values_list('pk', flat=True)))
+		keys = {pk: 'binder:objects:{}:{}'.format(prefix, pk) for pk in pks}
+
+		object_cache = get_object_cache()
+		cached = object_cache.get_many(list(keys.values()))
+		datas_by_id = {pk: cached[key] for pk, key in keys.items() if key in cached}
+
+		missing = [pk for pk in pks if pk not in datas_by_id]
+		if missing:
+			missing_queryset = queryset.all()
+			missing_queryset.query.clear_limits()
+			pk_name = next(f.name for f in plan.fields if f.attname == plan.pk_attname)
+			datas = self._serialize_objs(missing_queryset.filter(pk__in=missing), plan, annotations, m2m_fields)
+			new_datas_by_id = {data[pk_name]: data for data in datas}
+			object_cache.set_many({keys[pk]: data for pk, data in new_datas_by_id.items()})
+			datas_by_id.update(new_datas_by_id)
+
+		# A record may have been deleted in between
+		return [datas_by_id[pk] for pk in pks if pk in datas_by_id]
+
+
+	# Returns the models whose version counters are part of the keys of
+	# the object cache: the view's model and the models related to it, as
+	# the records include their ids and annotations often look at them.
+	# Override this if the records depend on other models.
+	def _get_object_cache_models(self):
+		models = {self.model}
+		models.update(f.related_model for f in self.model._meta.get_fields() if f.is_relation and f.related_model is not None)
+		return models
+
+
+	# Returns the serialization plan, annotations and m2m_fields to
+	# serialize for _get_objs().
+	def _get_objs_plan(self, request, annotations=None, fields=None):
+		plan = self._get_serialization_plan()
+		m2m_fields = self.m2m_fields
 
 		if annotations is None:
 			annotations = set(self.annotations(request))
-		if self.shown_annotations is None:
-			annotations -= set(self.hidden_annotations)
+		if plan.shown_annotations is None:
+			annotations -= plan.hidden_annotations
 		else:
-			annotations &= set(self.shown_annotations)
+			annotations &= plan.shown_annotations
+
+		if fields is not None:
+			plan = self._restrict_serialization_plan(plan, fields)
+			annotations &= fields
+			m2m_fields = [f for f in m2m_fields if f in fields]
+
+		return plan, annotations, m2m_fields
 
-		for obj in queryset:
+
+	# We can only skip creating model instances if nothing needs them,
+	# and the queryset hasn't been evaluated already.
+	def _can_serialize_values(self, queryset, plan):
+		return (
+			self.serialization_engine == 'values' and
+			not plan.needs_instances and
+			isinstance(queryset, django.db.models.query.QuerySet) and
+			queryset._result_cache is None
+		)
+
+
+	# Serialize the rows of <queryset> without instantiating models.
+	# Returns the list of field names and a dict of {pk: row}, where the
+	# rows have the values of those fields (in that order), possibly
+	# followed by the pk if it isn't one of them.
+	def _serialize_values(self, queryset, plan, annotations):
+		rows_by_id = {} # Save rows so we can annotate m2m fields later (avoiding a query)
+
+		annotations = list(annotations)
+		names = [f.name for f in plan.fields] + annotations
+		columns = [f.attname for f in plan.fields] + annotations
+		if plan.pk_attname not in columns:
+			columns.append(plan.pk_attname)
+		pk_index = columns.index(plan.pk_attname)
+		file_fields = [(i, f.file_field) for i, f in enumerate(plan.fields) if f.file_field is not None]
+
+		# Don't compute the annotations which aren't shown.  This has to
+		# happen before values_list(), which fixes the GROUP BY.
+		queryset = queryset.all()
+		strip_unused_annotations(queryset.query, annotations)
+
+		for row in queryset.values_list(*columns):
+			pk = row[pk_index]
+			# See _serialize_instances()
+			if pk in rows_by_id:
+				continue
+
+			if file_fields:
+				row = list(row)
+				for i, file_field in file_fields:
+					# {router-view-instance}
+					row[i] = self.router.model_route(self.model, pk, file_field) if row[i] else None
+
+			rows_by_id[pk] = row
+
+		return names, rows_by_id
+
+
+	# Makes <queryset> load only the columns of the fields in <plan>, if
+	# the fields parameter restricted it.  Not when there are properties,
+	# as a property which uses another field would load it with a query
+	# per record.  This isn't possible with select_related() either, as
+	# the relations would have to be loaded too.
+	def _only_plan_fields(self, queryset, plan):
+		if not plan.restricted or plan.properties or not isinstance(queryset, django.db.models.query.QuerySet) or queryset._result_cache is not None or queryset.query.select_related:
+			return queryset
+		return queryset.only(*(f.attname for f in plan.fields))
+
+
+	# Serialize the model instances in <queryset>.
+	# Returns dicts of {pk: data} and {pk: instance}.
+	def _serialize_instances(self, queryset, plan, annotations):
+		datas_by_id = {}
+		objs_by_id = {} # Same for original objects
+
+		for obj in self._only_plan_fields(queryset, plan):
 			# So we tend to make binder call queryset.distinct when necessary
 			# to prevent duplicate results, this is however not always possible
 			# For example when ordering on a field from an m2m relation
@@ -476,15 +985,17 @@ class ModelView(View):
 				continue
 
 			data = {}
-			for f in fields:
-				if isinstance(f, models.fields.files.FileField):
+			for f in plan.fields:
+				if f.file_field is None:
+					data[f.name] = getattr(obj, f.attname)
+				else:
 					file = getattr(obj, f.attname)
 					if file:
 						# {router-view-instance}
-						data[f.name] = self.router.model_route(self.model, obj.id, f)
+						data[f.name] = self.router.model_route(self.model, obj.id, f.file_field)
 
 						# {duplicate-binder-file-field-hash-code}
-						if isinstance(f, BinderFileField):
+						if f.binder_file:
 							data[f.name] += '?h={}&content_type={}&filename={}'.format(
 								file.content_hash,
 								file.content_type or '',
@@ -492,54 +1003,207 @@ class ModelView(View):
 							)
 					else:
 						data[f.name] = None
-				else:
-					data[f.name] = getattr(obj, f.attname)
 
 			for a in annotations:
 				data[a] = getattr(obj, a)
 
-			for prop in self.shown_properties:
-				data[prop] = getattr(obj, prop)
-
-			if self.model._meta.pk.name in data:
-				data['id'] = data.pop(self.model._meta.pk.name)
+			for prop, getter in plan.properties:
+				data[prop] = getter(obj)
 
-			datas.append(data) # order matters!
 			datas_by_id[obj.pk] = data
 			objs_by_id[obj.pk] = obj
 
-		self._annotate_objs(datas_by_id, objs_by_id)
+		return datas_by_id, objs_by_id
 
-		return datas
 
+	# Returns the SerializationPlan for this view class.  It's compiled
+	# once (when the router registers the view, or on first use) and
+	# stored on the class itself, so subclasses get their own plan.
+	@classmethod
+	def _get_serialization_plan(cls):
+		plan = cls.__dict__.get('_compiled_serialization_plan')
+		if plan is None:
+			plan = cls._compile_serialization_plan()
+			cls._compiled_serialization_plan = plan
+		return plan
 
-	def _annotate_objs(self, datas_by_id, objs_by_id):
-		pks = datas_by_id.keys()
 
-		# Annotate data for obj id with m2m_fields (one query per field for performance)
-		for field_name in self.m2m_fields:
-			idmap = defaultdict(list)
-			# Wuh, the autogenerated reverse relation is called foo_set, but in values() you need foo? Weird.
-			# FIXME: We use explicit related_name everywhere, do we still need this? Maybe for User/Group
-			field_name2 = field_name[:-4] if field_name.endswith('_set') else field_name
-			remote_field = self.model._meta.get_field(field_name2).remote_field
-			local_field = self.model._meta.get_field(field_name)
+	@classmethod
+	def _compile_serialization_plan(cls):
+		if cls.shown_fields is None:
+			fields = [f for f in cls.model._meta.fields if f.name not in cls.hidden_fields]
+		else:
+			fields = [f for f in cls.model._meta.fields if f.name in cls.shown_fields]
+
+		pk = cls.model._meta.pk
+		serialized_fields = tuple(
+			SerializedField(
+				name='id' if f.name == pk.name else f.name,
+				attname=f.attname,
+				file_field=f if isinstance(f, models.fields.files.FileField) else None,
+				binder_file=isinstance(f, BinderFileField),
+			)
+			for f in fields
+		)
 
-			for other, this in remote_field.model.objects.filter(**{remote_field.name + '__pk__in': pks}).values_list('pk', remote_field.name + '__pk'):
-				idmap[this].append(other)
+		return SerializationPlan(
+			fields=serialized_fields,
+			pk_attname=pk.attname,
+			shown_annotations=None if cls.shown_annotations is None else frozenset(cls.shown_annotations),
+			hidden_annotations=frozenset(cls.hidden_annotations),
+			properties=tuple((prop, operator.attrgetter(prop)) for prop in cls.shown_properties),
+			needs_instances=bool(cls.shown_properties) or any(f.binder_file for f in serialized_fields),
+			restricted=False,
+		)
+
+
+	# Returns <plan> with only the fields and properties in <fields>, and
+	# the primary key.
+	@staticmethod
+	def _restrict_serialization_plan(plan, fields):
+		serialized_fields = tuple(f for f in plan.fields if f.name in fields or f.attname == plan.pk_attname)
+		properties = tuple((prop, getter) for prop, getter in plan.properties if prop in fields)
+		return plan._replace(
+			fields=serialized_fields,
+			properties=properties,
+			needs_instances=bool(properties) or any(f.binder_file for f in serialized_fields),
+			restricted=True,
+		)
+
+
+	# Returns the set of names to pass to _get_objs() for <fields> from
+	# _parse_fields(), which may contain '*' for all fields except the
+	# <deferred> ones.  None means all fields.
+	@classmethod
+	def _resolve_fields(cls, fields, deferred=()):
+		if fields is None:
+			if not deferred:
+				return None
+			fields = {'*'}
+		if '*' not in fields:
+			return fields
+		return (cls._get_field_names() - set(deferred)) | (fields - {'*'})
+
+
+	# Returns the names which can be used in the fields parameter: the
+	# fields, annotations, properties and relations which may be shown.
+	@classmethod
+	def _get_field_names(cls):
+		plan = cls._get_serialization_plan()
+		names = {f.name for f in plan.fields}
+		names.update(prop for prop, getter in plan.properties)
+		names.update(cls.m2m_fields)
+		names.update(cls._get_relations())
+
+		if hasattr(cls.model, 'Annotations'):
+			annotations = {attr for attr in dir(cls.model.Annotations) if not (attr.startswith('__') and attr.endswith('__'))}
+			if plan.shown_annotations is None:
+				annotations -= plan.hidden_annotations
+			else:
+				annotations &= plan.shown_annotations
+			names.update(annotations)
+
+		return names
+
+
+	# The serialization plan is derived from the view's shown_fields,
+	# hidden_fields, (shown|hidden)_annotations and shown_properties.
+	# If you change these at runtime (in tests, for example), call this
+	# afterwards.  It also invalidates the plans of subclasses.
+	@classmethod
+	def invalidate_serialization_plan(cls):
+		for view in [cls, *getsubclasses(cls)]:
+			if '_compiled_serialization_plan' in view.__dict__:
+				delattr(view, '_compiled_serialization_plan')
 
+
+	def _annotate_objs(self, datas_by_id, objs_by_id, m2m_fields=None):
+		if m2m_fields is None:
+			m2m_fields = self.m2m_fields
+
+		# Annotate data for obj id with m2m_fields
+		for field_name, values in self._get_m2m_values(datas_by_id.keys(), m2m_fields):
 			for obj_id, data in datas_by_id.items():
-				# TODO: Don't require OneToOneFields in the m2m_fields list
-				if isinstance(local_field, models.OneToOneRel):
-					assert(len(idmap[obj_id]) <= 1)
-					data[field_name] = idmap[obj_id][0] if len(idmap[obj_id]) == 1 else None
-				else:
-					data[field_name] = idmap[obj_id]
+				data[field_name] = values(obj_id)
 
 		# For ease of use, return the datas dict
 		return datas_by_id
 
 
+	# Returns a list of (field_name, values) for the <m2m_fields>, where
+	# values(pk) gives the value of the field for the record with <pk>.
+	def _get_m2m_values(self, pks, m2m_fields):
+		if not m2m_fields or not pks:
+			idmaps = {field_name: defaultdict(list) for field_name in m2m_fields}
+		elif connections[self.model.objects.db].vendor == 'postgresql':
+			idmaps = self._get_m2m_ids_by_array(pks, m2m_fields)
+		else:
+			idmaps = self._get_m2m_ids_by_field(pks, m2m_fields)
+
+		def one_to_one(idmap, obj_id):
+			assert(len(idmap[obj_id]) <= 1)
+			return idmap[obj_id][0] if len(idmap[obj_id]) == 1 else None
+
+		values = []
+		for field_name in m2m_fields:
+			idmap = idmaps[field_name]
+			# TODO: Don't require OneToOneFields in the m2m_fields list
+			if isinstance(self.model._meta.get_field(field_name), models.OneToOneRel):
+				values.append((field_name, functools.partial(one_to_one, idmap)))
+			else:
+				values.append((field_name, idmap.__getitem__))
+		return values
+
+
+
+	# Returns the model field and its remote field for the m2m_fields entry <field_name>.
+	def _get_m2m_remote_field(self, field_name):
+		# Wuh, the autogenerated reverse relation is called foo_set, but in values() you need foo? Weird.
+		# FIXME: We use explicit related_name everywhere, do we still need this? Maybe for User/Group
+		field_name2 = field_name[:-4] if field_name.endswith('_set') else field_name
+		return self.model._meta.get_field(field_name2).remote_field
+
+
+
+	# Returns a dict of {field_name: {pk: [ids]}} for the m2m_fields (or
+	# those in <m2m_fields>), using one query per field.
+	def _get_m2m_ids_by_field(self, pks, m2m_fields=None):
+		if m2m_fields is None:
+			m2m_fields = self.m2m_fields
+
+		idmaps = {}
+		for field_name in m2m_fields:
+			idmap = idmaps[field_name] = defaultdict(list)
+			remote_field = self._get_m2m_remote_field(field_name)
+
+			for other, this in remote_field.model.objects.filter(**{remote_field.name + '__pk__in': pks}).values_list('pk', remote_field.name + '__pk'):
+				idmap[this].append(other)
+
+		return idmaps
+
+
+
+	# Like _get_m2m_ids_by_field(), but with a single query which has an
+	# (ordered) array subquery per field.  Postgres only.
+	def _get_m2m_ids_by_array(self, pks, m2m_fields=None):
+		if m2m_fields is None:
+			m2m_fields = self.m2m_fields
+
+		arrays = {}
+		for i, field_name in enumerate(m2m_fields):
+			remote_field = self._get_m2m_remote_field(field_name)
+			ids = remote_field.model.objects.filter(**{remote_field.name: OuterRef('pk')}).values('pk')
+			# Field names may clash with the model's fields
+			arrays['m2m_ids_{}'.format(i)] = ArraySubquery(ids)
+
+		idmaps = {field_name: defaultdict(list) for field_name in m2m_fields}
+		for pk, *id_lists in self.model.objects.filter(pk__in=pks).order_by().annotate(**arrays).values_list('pk', *arrays):
+			for field_name, ids in zip(m2m_fields, id_lists):
+				idmaps[field_name][pk] = ids
+
+		return idmaps
+
+
 	# Kinda like model_to_dict()
 	# Fetches the object specified by <pk>, and serializes it to a Binder json dict.
 	# It goes through get_queryset(), so permission scoping applies.
@@ -595,6 +1259,172 @@ class ModelView(View):
 
 		return where_map
 
+	# Parse <withs> and the where= parameter into the nested with_map and
+	# where_map structures used by _get_with_ids.  Adds A to <withs> if
+	# A.B is in there.  The parsed structure is cached per shape of the
+	# withs and wheres; only the where values are filled in per request.
+	# The wheres may also be for relations in include_counts.
+	def _parse_withs(self, withs, request, wheres=None):
+		where_str = request.GET.get('where', '') if wheres is None and request is not None else ''
+		where_clauses = split_where_clauses(where_str)
+		counts = self._parse_include_counts(request) if wheres is None and request is not None else ()
+
+		if where_clauses is not None:
+			shape = tuple((target_rel, field) for target_rel, field, value in where_clauses)
+			try:
+				all_withs, with_map = query_plans.get(
+					(type(self), 'withs', tuple(withs), shape, counts),
+					lambda: self._compile_withs(withs, shape, counts),
+				)
+			except BinderRequestError:
+				pass # Let the code below produce the complete error
+			else:
+				withs[len(withs):] = all_withs[len(withs):]
+
+				where_map = {}
+				for target_rel, field, value in where_clauses:
+					*rels, rel = target_rel.split('.')
+					pointer = where_map
+					for r in rels:
+						pointer = pointer.setdefault(r, {'filters': [], 'subrels': {}})['subrels']
+					pointer.setdefault(rel, {'filters': [], 'subrels': {}})['filters'].append(field + '=' + value)
+
+				return with_map, where_map
+
+		# Make sure to include A if A.B is specified.
+		for w in withs:
+			if '.' in w:
+				withs.append('.'.join(w.split('.')[:-1]))
+
+		# Filter out empty params
+		where_params = list(filter(bool, split_par_aware(where_str)))
+		where_map = self._parse_wheres(where_params, withs + list(counts))
+
+		return withs_to_nested_set(withs), where_map
+
+
+	def _compile_withs(self, withs, where_shape, counts=()):
+		withs = list(withs)
+		for w in withs:
+			if '.' in w:
+				withs.append('.'.join(w.split('.')[:-1]))
+
+		# Checks that the wheres are for relations in the withs
+		self._parse_wheres(['{}({}=)'.format(target_rel, field) for target_rel, field in where_shape], withs + list(counts))
+
+		return tuple(withs), withs_to_nested_set(withs)
+
+
+	# Returns {with: limit} from the view's with_limits and the with_limit
+	# parameter (with_limit=animals:5,animals.costumes:2).  <withs> must
+	# already include the parents of nested withs (see _parse_withs).
+	def _parse_with_limits(self, withs, request):
+		with_limits = dict(self.with_limits)
+
+		with_limit = request.GET.get('with_limit', '') if request is not None else ''
+		for item in filter(None, with_limit.split(',')):
+			rel, sep, limit = item.rpartition(':')
+			try:
+				limit = int(limit)
+			except ValueError:
+				limit = None
+			if not sep or limit is None or limit < 0:
+				raise BinderRequestError('Syntax error in {{with_limit={}}}.'.format(item))
+			if rel not in withs:
+				raise BinderRequestError('Relation of {{with_limit={}}} is missing from withs {{withs={}}}.'.format(item, withs))
+			with_limits[rel] = limit
+
+		return with_limits
+
+
+	# Returns the tuple of relations in the include_counts parameter.
+	def _parse_include_counts(self, request):
+		include_counts = request.GET.get('include_counts', '')
+		if not include_counts:
+			return ()
+		return query_plans.get(
+			(type(self), 'include_counts', include_counts),
+			lambda: self._compile_include_counts(include_counts),
+		)
+
+
+	def _compile_include_counts(self, include_counts):
+		counts = []
+		for rel in include_counts.split(','):
+			try:
+				field = self.model._meta.get_field(rel)
+			except FieldDoesNotExist:
+				raise BinderRequestError('Unknown relation {{{}}}.{{{}}} in {{include_counts={}}}.'.format(self.model.__name__, rel, include_counts))
+			if not (field.one_to_many or field.many_to_many) or (field.remote_field and field.remote_field.hidden):
+				raise BinderRequestError('Field {{{}}}.{{{}}} in {{include_counts={}}} is not a to-many relation.'.format(self.model.__name__, rel, include_counts))
+			if rel not in counts:
+				counts.append(rel)
+		return tuple(counts)
+
+
+	# Returns {pk: {relation: count}} for the relations in <counts>, for
+	# all of <pks>.  Every count is a subquery, so the relations don't
+	# multiply each other's rows like joins would.  The wheres for these
+	# relations filter what is counted, like they filter withs.  Like the
+	# ids of withs and m2m_fields, the counts are not scoped.
+	def _get_counts(self, pks, counts, request, include_annotations):
+		if not counts or not pks:
+			return {}
+
+		where_params = [w for w in filter(bool, split_par_aware(request.GET.get('where', ''))) if w.split('(')[0] in counts]
+		where_map = self._parse_wheres(where_params, counts)
+
+		subqueries = {}
+		for i, rel in enumerate(counts):
+			view = self.get_model_view(self._follow_related(rel)[0].model)
+			q, _ = view._filter_relation(rel, where_map.get(rel), request, {
+				r[len(rel) + 1:]: annotations
+				for r, annotations in include_annotations.items()
+				if r == rel or r.startswith(rel + '.')
+			})
+			count = (
+				self.model.objects
+				.filter(pk=OuterRef('pk'))
+				# Filter before annotating, so the count reuses the join
+				.filter(q & Q(**{rel + '__pk__isnull': False}))
+				.order_by()
+				.values('pk')
+				.annotate(count=Count(rel + '__pk', distinct=True))
+				.values('count')
+			)
+			subqueries['count_{}'.format(i)] = Coalesce(Subquery(count), 0)
+
+		rows = self.model.objects.filter(pk__in=pks).order_by().annotate(**subqueries).values_list('pk', *subqueries)
+		return {pk: dict(zip(counts, values)) for pk, *values in rows}
+
+
+	# Adds the counts of _get_counts() to the records in <data>, as
+	# _meta.counts.
+	def _annotate_objs_with_counts(self, data, request, include_annotations):
+		counts = self._parse_include_counts(request)
+		if not counts:
+			return
+
+		counts_by_pk = self._get_counts([obj['id'] for obj in data if 'id' in obj], counts, request, include_annotations)
+		for obj in data:
+			if 'id' in obj:
+				obj.setdefault('_meta', {})['counts'] = counts_by_pk.get(obj['id'], dict.fromkeys(counts, 0))
+
+
+	# Like _annotate_objs_with_counts(), but for a table from
+	# _get_table().  The counts are added as a _meta column.
+	def _annotate_table_with_counts(self, table, request, include_annotations):
+		counts = self._parse_include_counts(request)
+		if not counts or 'id' not in table['fields']:
+			return
+
+		id_index = table['fields'].index('id')
+		counts_by_pk = self._get_counts([row[id_index] for row in table['rows']], counts, request, include_annotations)
+		table['fields'].append('_meta')
+		for row in table['rows']:
+			row.append({'counts': counts_by_pk.get(row[id_index], dict.fromkeys(counts, 0))})
+
+
 	# Find which objects of which models to include according to <withs> for the objects in <queryset>.
 	# returns three dictionaries:
 	# - withs: { related_modal_name: [ids] }
@@ -609,7 +1439,10 @@ class ModelView(View):
 	# the ones requested.  The reverse key allows the frontend to
 	# reconstruct to which property in the main model the "with'ed"
 	# model belongs.
-	def _get_withs(self, pks, withs, request, wheres=None, include_annotations=None):
+	#
+	# If <truncated> is a dict, it gets the pks of the objects whose ids
+	# were cut off by a with_limit, per with (see _parse_with_limits).
+	def _get_withs(self, pks, withs, request, wheres=None, include_annotations=None, truncated=None, columnar=False):
 		if withs is None and request is not None:
 			withs = list(filter(None, request.GET.get('with', '').split(',')))
 
@@ -619,17 +1452,6 @@ class ModelView(View):
 			else:
 				include_annotations = {}
 
-		# Make sure to include A if A.B is specified.
-		for w in withs:
-			if '.' in w:
-				withs.append('.'.join(w.split('.')[:-1]))
-
-		if wheres is None and request is not None:
-			where_str = request.GET.get('where', '')
-			# Filter out empty params
-			where_params = list(filter(bool, split_par_aware(where_str)))
-			where_map = self._parse_wheres(where_params, withs)
-
 		if isinstance(pks, django.db.models.query.QuerySet):
 			if not withs:
 				pks = []  # No sense in re-executing the query just for the ids if there are no withs
@@ -638,31 +1460,28 @@ class ModelView(View):
 		# Force evaluation of querysets, as nesting too deeply causes problems. See T1850.
 		pks = list(pks)
 
+		with_map, where_map = self._parse_withs(withs, request, wheres)
+		with_limits = self._parse_with_limits(withs, request)
+
+		field_results = self._get_with_ids(pks, request=request, include_annotations=include_annotations, with_map=with_map, where_map=where_map, with_limits=with_limits, truncated=truncated)
+		return self._get_with_objs(field_results, request, include_annotations, columnar=columnar)
+
+
+	# Fetch and serialize the objects whose ids were collected by
+	# _get_with_ids, and return the same tuple as _get_withs.  If
+	# <columnar> is True, the objects of each model are a table (see
+	# _get_table) instead of a list.  <querysets> can have the scoped
+	# querysets of the models, if they were made beforehand.
+	def _get_with_objs(self, field_results, request, include_annotations, columnar=False, querysets=None):
 		extras_with_flat_ids = {}
 		withs_per_model = defaultdict(dict)
 		extras_mapping = {}
 		extras_reverse_mapping_dict = {}
+		# Per model, the union of the fields requested for its withs, or
+		# None for all of them
+		fields = self._parse_fields(request)
+		fields_per_model = {}
 
-		# ['foo.bar', 'foo.qux', 'foo.bar.hoi'] => {'foo': {'bar': {'hoi': {}}, 'qux': {}}}
-		def withs_to_nested_set(withs, result={}):
-			for w in withs:
-				head, *tail = w.split('.')
-				if head not in result:
-					result[head] = {}
-				if tail:
-					withs_to_nested_set(['.'.join(tail)], result[head])
-
-			return result
-
-		with_map = withs_to_nested_set(withs)
-
-		# Make sure the _get_with only gets the wheres relevant to the relation
-		# We scope on the head of the relation, as the caretakers in animals.caretaker
-		# must also be filtered by the animal filter
-		# head = w.split('.')[0]
-		# scoped_wheres = where_map.get(head, [])
-
-		field_results = self._get_with_ids(pks, request=request, include_annotations=include_annotations, with_map=with_map, where_map=where_map)
 		for (w, (view, new_ids_dict, is_singular)) in field_results.items():
 			model_name = view._model_name()
 			extras_mapping[w] = model_name
@@ -673,10 +1492,18 @@ class ModelView(View):
 				annotations = get_default_annotations(view.model)
 			annotations = frozenset(annotations)  # So that it is hashable
 
+			with_fields = view._resolve_fields(fields.get(w))
+			if model_name not in fields_per_model:
+				fields_per_model[model_name] = with_fields
+			elif with_fields is None or fields_per_model[model_name] is None:
+				fields_per_model[model_name] = None
+			else:
+				fields_per_model[model_name] |= with_fields
+
 			(view, annotation_ids) = extras_with_flat_ids.setdefault(model_name, (view, {}))
 			flat_ids = annotation_ids.setdefault(annotations, set())
 			for new_ids in new_ids_dict.values():
-				flat_ids.update(set(new_ids))
+				flat_ids.update(new_ids)
 
 			# Filter all annotations we need to add to this particular model
 			for (w2, (view2, new_ids_dict2, is_singular2)) in field_results.items():
@@ -694,38 +1521,52 @@ class ModelView(View):
 				extras_reverse_mapping_dict[w] = related_model_info.reverse_fieldname
 
 		extras_dict = {}
+		fetches = []
 		# FIXME: delegate this to a router or something
 		for (model_name, (view, annotation_ids)) in extras_with_flat_ids.items():
-			# It can happen that an id appears in multiple annotation sets, here
-			# we move those ids to new annotation sets containing a union of the
-			# two annotation sets
-			to_add = list(annotation_ids.items())
-			annotation_ids = {}
-			while to_add:
-				rannotations, rids = to_add.pop()
-				for lannotations, lids in list(annotation_ids.items()):
-					overlap = lids & rids
-					if overlap:
-						to_add.append((lannotations | rannotations, overlap))
-						lids -= overlap
-						rids -= overlap
-						if not lids:
-							del annotation_ids[lannotations]
-						if not rids:
-							break
-				if rids:
-					annotation_ids.setdefault(rannotations, set()).update(rids)
+			annotation_ids = group_ids_by_annotations(annotation_ids)
 
 			extras_dict[model_name] = []
 			view = view()
 			# {router-view-instance}
 			view.router = self.router
 			for annotations, with_pks in annotation_ids.items():
-				objs = view._get_objs(
-					annotate(view.get_queryset(request).filter(pk__in=with_pks), request, annotations),
-					request=request,
-					annotations=annotations,
-				)
+				fetches.append((model_name, view, annotations, with_pks))
+
+		def fetch(view, annotations, with_pks, fields):
+			if fields is not None:
+				annotations = annotations & fields
+			if querysets is not None and view.model in querysets:
+				queryset = querysets[view.model]
+			else:
+				queryset = view.get_queryset(request)
+			return (view._get_table if columnar else view._get_objs)(
+				annotate(queryset.filter(pk__in=with_pks), request, annotations),
+				request=request,
+				annotations=annotations,
+				fields=fields,
+			)
+
+		# Other connections can't see uncommitted changes, so only GETs can do this
+		if self.parallel_withs and request.method == 'GET' and len(fetches) > 1:
+			futures = [submit_read_only(view.model.objects.db, fetch, view, annotations, with_pks, fields_per_model[model_name]) for (model_name, view, annotations, with_pks) in fetches]
+			results = [future.result() for future in futures]
+		else:
+			results = [fetch(view, annotations, with_pks, fields_per_model[model_name]) for (model_name, view, annotations, with_pks) in fetches]
+
+		if columnar:
+			views = {}
+			for (model_name, view, annotations, with_pks), table in zip(fetches, results):
+				extras_dict[model_name].append(table)
+				views[model_name] = view
+			for model_name, tables in extras_dict.items():
+				if tables:
+					extras_dict[model_name] = merge_tables(tables)
+					views[model_name]._annotate_table_with_related_withs(extras_dict[model_name], withs_per_model[model_name])
+				else:
+					extras_dict[model_name] = {'fields': [], 'rows': []}
+		else:
+			for (model_name, view, annotations, with_pks), objs in zip(fetches, results):
 				for obj in objs:
 					view._annotate_obj_with_related_withs(obj, withs_per_model[model_name])
 				extras_dict[model_name].extend(objs)
@@ -733,14 +1574,66 @@ class ModelView(View):
 		return (extras_dict, extras_mapping, extras_reverse_mapping_dict, field_results)
 
 
+	# Returns a dict mapping relations to the set of names in the fields
+	# parameter for them, eg. fields=name,animals(name),animals.zoo.name
+	# gives {'': {'name'}, 'animals': {'name'}, 'animals.zoo': {'name'}}.
+	# The top level model is indicated with the relation ''.  Relations
+	# which aren't in the dict get all their fields.  A '*' stands for
+	# all fields, see _resolve_fields().
+	def _parse_fields(self, request):
+		fields = request.GET.get('fields') if request is not None else None
+		if not fields:
+			return {}
+		return query_plans.get(
+			(type(self), 'fields', fields),
+			lambda: self._compile_fields(fields),
+		)
+
+
+	def _compile_fields(self, fields):
+		relation_fields = {}
+		for item in split_par_aware(fields):
+			if not item:
+				continue
+			if item.endswith(')'):
+				relation, sep, names = item[:-1].partition('(')
+				if not sep:
+					raise BinderRequestError('Syntax error in {{fields={}}}.'.format(item))
+				names = names.split(',') if names else []
+			else:
+				relation, _, name = item.rpartition('.')
+				names = [name]
+
+			related_models = self._follow_related(relation)
+			view = self.get_model_view(related_models[-1].model) if related_models else self
+			# Hidden fields are just as unknown as fields which don't exist
+			field_names = view._get_field_names()
+			for name in names:
+				if name != '*' and name not in field_names:
+					raise BinderRequestError('Unknown field {{{}}}.{{{}}} in {{fields={}}}.'.format(view.model.__name__, name, fields))
+			relation_fields.setdefault(relation, set()).update(names)
+
+		return {relation: frozenset(names) for relation, names in relation_fields.items()}
+
+
 	# Returns a dict mapping relations to a set of annotations that should be
 	# included.
 	# The top level model is indicated with the relation ''.
 	# If a relation is not in the dict this means the annotations returned by
 	# get_default_annotations should be used.
 	def _parse_include_annotations(self, request):
-		if 'include_annotations' in request.GET:
-			includes = list(split_par_aware(request.GET['include_annotations']))
+		include_annotations = request.GET.get('include_annotations')
+		relation_annotations = query_plans.get(
+			(type(self), 'include_annotations', include_annotations),
+			lambda: self._compile_include_annotations(include_annotations),
+		)
+		# Callers are allowed to modify the sets
+		return {relation: set(annotations) for relation, annotations in relation_annotations.items()}
+
+
+	def _compile_include_annotations(self, include_annotations):
+		if include_annotations is not None:
+			includes = list(split_par_aware(include_annotations))
 		else:
 			includes = []
 
@@ -798,7 +1691,7 @@ class ModelView(View):
 				else:
 					all_annotations |= annotation
 
-		return relation_annotations
+		return {relation: frozenset(annotations) for relation, annotations in relation_annotations.items()}
 
 
 	def _follow_related(self, fieldspec):
@@ -808,6 +1701,13 @@ class ModelView(View):
 		if isinstance(fieldspec, str):
 			fieldspec = fieldspec.split('.')
 
+		# Usually the router's relation graph knows the way.  If not,
+		# we walk the models below, which also produces proper errors.
+		if self.router is not None:
+			related = self.router.follow_related(type(self), fieldspec)
+			if related is not None:
+				return related
+
 		fieldname, *fieldspec = fieldspec
 
 		try:
@@ -844,19 +1744,59 @@ class ModelView(View):
 		return (RelatedModel(fieldname, related_model, related_field),) + view._follow_related(fieldspec)
 
 
+
+	# Returns {fieldname: RelatedModel} for all relations of this view's
+	# model (forward, reverse and virtual), for the router's relation graph.
+	# Anything left out here will be resolved by _follow_related() itself.
+	@classmethod
+	def _get_relations(cls):
+		relations = {}
+
+		for fieldname, vr in cls.virtual_relations.items():
+			if 'model' in vr:
+				relations[fieldname] = RelatedModel(fieldname, vr['model'], vr.get('related_field', None))
+
+		# Real fields take precedence over virtual relations
+		for field in cls.model._meta.get_fields(include_hidden=True):
+			if not field.is_relation or field.remote_field is None:
+				continue
+
+			if isinstance(field, django.db.models.fields.reverse_related.ForeignObjectRel):
+				related_model = field.related_model
+				related_field = field.remote_field.name
+			else:
+				related_model = field.remote_field.model
+				related_field = field.remote_field.related_name
+
+			if field.remote_field.hidden:
+				related_field = None
+
+			relations[field.name] = RelatedModel(field.name, related_model, related_field)
+
+		return relations
+
+
 	# This will return a dictionary of dotted "with string" keys and
 	# tuple values of (view_class, id_dict).  These ids do not require
 	# permission scoping.  This will be done when fetching the actual
 	# objects.
-	def _get_with_ids(self, pks, request, include_annotations, with_map, where_map):
+	#
+	# <with_limits> and <truncated> are as in _get_withs(), relative to
+	# this view.
+	def _get_with_ids(self, pks, request, include_annotations, with_map, where_map, with_limits=None, truncated=None):
 		result = {}
+		if with_limits is None:
+			with_limits = {}
 
 		annotations = {}
 		singular_fields = set()
 		rel_ids_by_field_by_id = defaultdict(lambda: defaultdict(list))
 		virtual_fields = set()
+		limited_fields = {}
+		distinct_fields = set()
 
 		Agg = self.AggStrategy
+		use_subqueries = self.with_ids_strategy == 'subquery' and connections[self.model.objects.db].vendor == 'postgresql'
 
 		for field in with_map:
 			vr = self.virtual_relations.get(field, None)
@@ -877,6 +1817,9 @@ class ModelView(View):
 
 			# Virtual relation
 			if vr:
+				if field in with_limits:
+					raise BinderRequestError('with_limit is not supported for virtual relation {{{}}}.{{{}}}.'.format(self.model.__name__, field))
+
 				virtual_fields.add(field)
 				try:
 					virtual_annotation = vr['annotation']
@@ -906,18 +1849,34 @@ class ModelView(View):
 					not any(f.name == field for f in (list(self.model._meta.many_to_many) + list(self._get_reverse_relations())))):
 					singular_fields.add(field)
 
+				if field in with_limits:
+					if field in singular_fields:
+						raise BinderRequestError('with_limit is not supported for to-one relation {{{}}}.{{{}}}.'.format(self.model.__name__, field))
+					limited_fields[field] = (q & Q(**{field+'__pk__isnull': False}), orders)
+					continue
+
+				if use_subqueries and field not in singular_fields:
+					annotations[field_alias] = self._get_with_ids_subquery(field, view.model, q)
+					distinct_fields.add(field)
+					continue
+
 				if Agg != GroupConcat: # HACKK (GROUP_CONCAT can't filter and excludes NULL already)
 					q &= Q(**{field+'__pk__isnull': False})
 				annotations[field_alias] = Agg(field+'__pk', filter=q, ordering=orders)
 
 
-		qs = self.model.objects.filter(pk__in=pks).values('pk').annotate(**annotations)
+		# Don't bother the DB if there is nothing to aggregate
+		qs = self.model.objects.filter(pk__in=pks).values('pk').annotate(**annotations) if annotations else []
 		for record in qs:
 			for field in with_map:
 				field_alias = field+'___annotation' if field in virtual_fields else field
 
 				if field_alias in annotations:
 					value = record[field_alias]
+					if field in distinct_fields:
+						rel_ids_by_field_by_id[field][record['pk']] += value
+						continue
+
 					if Agg == GroupConcat:
 						# Stupid assumption that PKs are always integers.
 						# Without this, the result types won't be right...
@@ -940,6 +1899,11 @@ class ModelView(View):
 
 					rel_ids_by_field_by_id[field][record['pk']] += distinct_values
 
+		for field, (q, orders) in limited_fields.items():
+			truncated_pks = self._get_limited_with_ids(rel_ids_by_field_by_id[field], pks, field, q, orders, with_limits[field])
+			if truncated is not None and truncated_pks:
+				truncated.setdefault(field, set()).update(truncated_pks)
+
 		for field, sub_fields in with_map.items():
 			next = self._follow_related(field)[0].model
 
@@ -952,14 +1916,87 @@ class ModelView(View):
 				wm_scoped = where_map.get(field)
 				wm_scoped = wm_scoped['subrels'] if wm_scoped else {}
 
+				sub_limits = {rel[len(field) + 1:]: limit for rel, limit in with_limits.items() if rel.startswith(field + '.')}
+				sub_truncated = {} if truncated is not None else None
+
 				flattened_ids = [id for ids in rel_ids_by_field_by_id[field].values() for id in ids]
-				subrelations = view._get_with_ids(flattened_ids, request=request, include_annotations=include_annotations, with_map=sub_fields, where_map=wm_scoped)
+				subrelations = view._get_with_ids(flattened_ids, request=request, include_annotations=include_annotations, with_map=sub_fields, where_map=wm_scoped, with_limits=sub_limits, truncated=sub_truncated)
 				for subrelation, data in subrelations.items():
 					result['.'.join([field, subrelation])] = data
+				for subrelation, truncated_pks in (sub_truncated or {}).items():
+					truncated.setdefault('.'.join([field, subrelation]), set()).update(truncated_pks)
 
 		return result
 
 
+	# Returns an ARRAY() subquery of the ids of to-many relation <field>
+	# to <model> matching <q>, for the with_ids_strategy 'subquery'.  The
+	# related records are selected with pk IN (the joins for <q>), so
+	# every record occurs once, however much the joins fan out.  Like
+	# the joins, this doesn't use the default manager of <model>.
+	def _get_with_ids_subquery(self, field, model, q):
+		ids = (
+			self.model.objects
+			.filter(pk=OuterRef(OuterRef('pk')))
+			.filter(q & Q(**{field + '__pk__isnull': False}))
+			.values(field + '__pk')
+		)
+		ordering = model._meta.ordering if model._meta.ordering else BinderModel.Meta.ordering
+		return ArraySubquery(model._base_manager.filter(pk__in=ids).order_by(*ordering).values('pk'))
+
+
+	# Collect the first <limit> ids of to-many relation <field> for each
+	# of <pks> into <ids_by_pk>, ordered by <orders>.  Instead of
+	# aggregating all ids, they are ranked per object with a window
+	# function, and only the first ones are fetched.  The ties are
+	# broken by the related pk, so DENSE_RANK gives duplicate rows from
+	# joins in <q> the same rank.  Returns the pks of the objects which
+	# have more than <limit> related ids.
+	def _get_limited_with_ids(self, ids_by_pk, pks, field, q, orders, limit):
+		if not pks:
+			return set()
+
+		order_by = []
+		for o in orders:
+			if isinstance(o, str):
+				o = F(o[1:]).desc() if o.startswith('-') else F(o).asc()
+			elif not isinstance(o, OrderBy):
+				o = o.asc()
+			order_by.append(o)
+		order_by.append(F(field + '__pk').asc())
+
+		ranked = (
+			self.model.objects
+			.filter(pk__in=pks)
+			# Filter before annotating, so the annotations reuse the join
+			.filter(q)
+			.annotate(
+				with_id=F(field + '__pk'),
+				with_rank=Window(DenseRank(), partition_by=[F('pk')], order_by=order_by),
+			)
+			.order_by()
+			.values_list('pk', 'with_id', 'with_rank')
+		)
+		# Window functions can't be filtered on in the same query
+		sql, params = ranked.query.sql_with_params()
+		with connections[ranked.db].cursor() as cursor:
+			cursor.execute(
+				'SELECT * FROM ({}) ranked WHERE ranked.with_rank <= %s ORDER BY 1, 3'.format(sql),
+				params + (limit + 1,),
+			)
+			rows = cursor.fetchall()
+
+		truncated_pks = set()
+		seen = set()
+		for pk, with_id, rank in rows:
+			if rank > limit:
+				truncated_pks.add(pk)
+			elif (pk, with_id) not in seen:
+				seen.add((pk, with_id))
+				ids_by_pk[pk].append(with_id)
+		return truncated_pks
+
+
 	# We have a queryset resulting in a set of ids where model M
 	# should be scoped on, but also a set of wheres where model M
 	# should further be scoped on.
@@ -984,6 +2021,20 @@ class ModelView(View):
 
 
 	def _parse_filter(self, field, value, request, include_annotations, partial=''):
+		# Only the value differs between requests for the same field, so
+		# the rest is planned once.  Top level fields may be annotations,
+		# which depend on the included annotations.
+		annotations = include_annotations.get('') if not partial and '.' not in field else None
+		plan = query_plans.get(
+			(type(self), 'filter', field, partial, None if annotations is None else frozenset(annotations)),
+			lambda: self._compile_filter_plan(field, request, include_annotations, partial),
+		)
+		if plan is not None:
+			try:
+				return FilterDescription(plan.filter.get_q(plan.qualifier, value, plan.invert, plan.partial), plan.need_distinct)
+			except ValidationError as e:
+				raise BinderRequestError(e.message)
+
 		head, *tail = field.split('.')
 		need_distinct = False
 
@@ -1032,6 +2083,78 @@ class ModelView(View):
 
 
 
+	# Resolves everything needed to filter on <field> except the value.
+	# Returns None for filters which can't be planned, like annotations
+	# of related models (these need a subquery), custom _filter_field()
+	# implementations and invalid filters.  Then _parse_filter() does the
+	# work (or raises the error) itself.
+	def _compile_filter_plan(self, field, request, include_annotations, partial):
+		*path, head = field.split('.')
+		view = self
+		need_distinct = False
+
+		try:
+			rels = path + [head.split(':', 1)[0]]
+			for i, rel in enumerate(rels):
+				is_last = i == len(rels) - 1
+				if type(view)._parse_filter is not ModelView._parse_filter:
+					return None
+
+				try:
+					related = view._follow_related(rel)[0]
+				except BinderRequestError:
+					# Only the last one may be a regular field
+					if is_last:
+						break
+					return None
+
+				# See _parse_filter()
+				related_field = getattr(view.model, related.fieldname)
+				if isinstance(related_field, models.fields.related.ReverseManyToOneDescriptor):
+					need_distinct = True
+
+				if not is_last:
+					view = view.get_model_view(related.model)
+					partial += rel + '__'
+
+			if type(view)._filter_field is not ModelView._filter_field:
+				return None
+
+			invert = False
+			head, sep, qualifier = head.partition(':')
+			if not sep:
+				qualifier = None
+			elif qualifier == 'not':
+				qualifier = None
+				invert = True
+			elif qualifier.startswith('not:'):
+				qualifier = qualifier[4:]
+				invert = True
+
+			try:
+				if head in view.hidden_fields:
+					raise FieldDoesNotExist()
+				field = view.model._meta.get_field(head)
+			except FieldDoesNotExist:
+				if partial:
+					return None
+				annotations = view.annotations(request, {'': include_annotations.get('')})
+				if head not in annotations:
+					return None
+				field = annotations[head]['field']
+
+			filter = FieldFilter.for_field(field)
+			if filter is None:
+				return None
+			filter.check_qualifier(qualifier)
+		except Exception:
+			# _parse_filter() will raise the error
+			return None
+
+		return FilterPlan(filter, qualifier, invert, partial, need_distinct)
+
+
+
 	def _filter_field(self, field_name, qualifier, value, invert, request, include_annotations, partial=''):
 		try:
 			if field_name in self.hidden_fields:
@@ -1053,19 +2176,16 @@ class ModelView(View):
 				return Q(**{partial + 'in': qs})
 			field = annotations[field_name]['field']
 
-		for field_class in inspect.getmro(field.__class__):
-			filter_class = self.get_field_filter(field_class)
-			if filter_class:
-				filter = filter_class(field)
-				try:
-					return filter.get_q(qualifier, value, invert, partial)
-				except ValidationError as e:
-					# TODO: Maybe convert to a BinderValidationError later?
-					raise BinderRequestError(e.message)
+		filter = FieldFilter.for_field(field)
+		if filter is None:
+			raise BinderRequestError('Filtering not supported for type {} ({{{}}}.{{{}}}).'
+					.format(field.__class__.__name__, self.model.__name__, field_name))
 
-		# If we get here, we didn't find a suitable filter class
-		raise BinderRequestError('Filtering not supported for type {} ({{{}}}.{{{}}}).'
-				.format(field.__class__.__name__, self.model.__name__, field_name))
+		try:
+			return filter.get_q(qualifier, value, invert, partial)
+		except ValidationError as e:
+			# TODO: Maybe convert to a BinderValidationError later?
+			raise BinderRequestError(e.message)
 
 
 
@@ -1164,6 +2284,13 @@ class ModelView(View):
 		except ValueError:
 			raise BinderRequestError('Invalid characters in offset.')
 
+		# Keyset (cursor) pagination: instead of skipping <offset> rows,
+		# continue right after the row the cursor points at.
+		if 'after' in request.GET:
+			if offset:
+				raise BinderRequestError('Offset can not be combined with after.')
+			queryset = self._keyset_filter(queryset, request.GET['after'])
+
 		if limit is not None:
 			queryset = queryset[offset:offset+limit]
 
@@ -1171,6 +2298,139 @@ class ModelView(View):
 
 
 
+	# Returns a list of KeysetColumns describing the effective ordering
+	# of the queryset, as built by order_by().  The pk is appended as the
+	# final tie-breaker if the ordering doesn't contain it already, so
+	# the returned queryset may have a slightly different ordering.
+	def _keyset_columns(self, queryset):
+		orders = queryset.query.order_by
+		if not orders and queryset.query.default_ordering:
+			orders = queryset.model._meta.ordering
+
+		nulls_largest = connections[queryset.db].features.nulls_order_largest
+		pk = queryset.model._meta.pk
+
+		columns = []
+		for order in orders:
+			if isinstance(order, str) and order != '?':
+				descending = order.startswith('-')
+				path = order.lstrip('-')
+				nulls_last = None
+			elif isinstance(order, OrderBy) and isinstance(order.expression, F):
+				descending = order.descending
+				path = order.expression.name
+				nulls_last = True if order.nulls_last else False if order.nulls_first else None
+			else:
+				raise BinderRequestError('Ordering on {} is not supported for keyset pagination.'.format(order))
+
+			# A record would occur once for every related record, so a
+			# page could end halfway through its occurrences.
+			model = queryset.model
+			for part in path.split('__'):
+				try:
+					field = model._meta.get_field(part)
+				except FieldDoesNotExist:
+					break  # An annotation or a transform
+				if field.one_to_many or field.many_to_many:
+					raise BinderRequestError('Ordering on to-many relation {} is not supported for keyset pagination.'.format(path.replace('__', '.')))
+				if not field.is_relation:
+					break
+				model = field.related_model
+
+			# Without explicit nulls_last/nulls_first, it depends on the DB
+			# (Postgres sorts NULL as largest value, MySQL as the smallest).
+			if nulls_last is None:
+				nulls_last = descending != nulls_largest
+
+			columns.append(KeysetColumn(path, descending, nulls_last))
+
+		if not any(c.path in ('pk', pk.name, pk.attname) for c in columns):
+			columns.append(KeysetColumn('pk', False, True))
+			queryset = queryset.order_by(*orders, 'pk')
+
+		return queryset, columns
+
+
+
+	# Q for rows that sort strictly after <value> on a single column
+	def _keyset_after_q(self, column, value):
+		if value is None:
+			if column.nulls_last:
+				return Q(pk__in=[])  # Nothing sorts after NULL
+			return Q(**{column.path + '__isnull': False})
+
+		q = Q(**{column.path + ('__lt' if column.descending else '__gt'): value})
+		if column.nulls_last:
+			q |= Q(**{column.path + '__isnull': True})
+		return q
+
+
+
+	def _keyset_equal_q(self, column, value):
+		if value is None:
+			return Q(**{column.path + '__isnull': True})
+		return Q(**{column.path: value})
+
+
+
+	# Filter the queryset on rows sorting after the row encoded in
+	# <cursor>.  This expands (a, b, pk) > (x, y, z) into
+	# a > x OR (a = x AND (b > y OR (b = y AND pk > z))), which also
+	# works for mixed directions and NULLs (Django can't express row
+	# value comparisons).  A redundant a >= x bound is added so that the
+	# DB can use an index range scan on the leading column.
+	def _keyset_filter(self, queryset, cursor):
+		queryset, columns = self._keyset_columns(queryset)
+		if not cursor:
+			return queryset  # First page
+
+		try:
+			payload = jsonloads(base64.urlsafe_b64decode(cursor.encode()))
+			ordering, values = payload['order'], payload['values']
+		except (ValueError, TypeError, KeyError, binascii.Error, BinderRequestError):
+			raise BinderRequestError('Invalid cursor {{after={}}}.'.format(cursor))
+
+		if ordering != [list(c) for c in columns] or len(values) != len(columns):
+			raise BinderRequestError('Cursor does not match the ordering of this request.')
+
+		q = None
+		for column, value in reversed(list(zip(columns, values))):
+			after = self._keyset_after_q(column, value)
+			q = after if q is None else after | (self._keyset_equal_q(column, value) & q)
+
+		column, value = columns[0], values[0]
+		if value is not None:
+			bound = Q(**{column.path + ('__lte' if column.descending else '__gte'): value})
+			if column.nulls_last:
+				bound |= Q(**{column.path + '__isnull': True})
+			q = bound & q
+
+		return queryset.filter(q)
+
+
+
+	# Returns the cursor to fetch the page following a page of <count>
+	# records ending with <last>, or None if this was the last page.
+	def _keyset_cursor(self, queryset, count, last):
+		limit = queryset.query.high_mark
+		if limit is not None:
+			limit -= queryset.query.low_mark
+		if not count or limit is None or count < limit:
+			return None
+
+		queryset, columns = self._keyset_columns(queryset)
+
+		# Fetch the ordering values of the last row.  This is a pk
+		# lookup, so it's cheap.
+		queryset = queryset.all()
+		queryset.query.clear_limits()
+		values = queryset.filter(pk=last['id']).values_list(*(c.path for c in columns)).first()
+
+		payload = jsondumps({'order': [list(c) for c in columns], 'values': list(values)})
+		return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+
 	def get_queryset(self, request):
 		return self.model.objects.all()
 
@@ -1230,22 +2490,130 @@ class ModelView(View):
 					obj[w] = list(ids_dict[obj['id']])
 
 
+	# Like _annotate_obj_with_related_withs(), but for all rows of a table
+	# from _get_table().  The relations replace the values of their
+	# columns (fks and m2m_fields already have one), or are added as new
+	# columns.
+	def _annotate_table_with_related_withs(self, table, field_results):
+		relations = [(w, ids_dict, is_singular) for (w, (view, ids_dict, is_singular)) in field_results.items() if '.' not in w]
+		if not relations:
+			return
+
+		id_index = table['fields'].index('id')
+		for (w, ids_dict, is_singular) in relations:
+			try:
+				index = table['fields'].index(w)
+			except ValueError:
+				index = len(table['fields'])
+				table['fields'].append(w)
+				for row in table['rows']:
+					row.append(None)
+
+			for row in table['rows']:
+				ids = list(ids_dict[row[id_index]])
+				if is_singular:
+					row[index] = ids[0] if ids else None
+				else:
+					row[index] = ids
+
+
 	def _generate_meta(self, include_meta, queryset, request, pk=None):
 		meta = {}
 
 		if not pk and 'total_records' in include_meta:
-			# Only 'pk' values should reduce DB server memory a (little?) bit, making
-			# things faster.  Not prefetching related models here makes it faster still.
-			# See also https://code.djangoproject.com/ticket/23771 and related tickets.
-			meta['total_records'] = queryset.prefetch_related(None).values('pk').count()
+			strategy = request.GET.get('count_strategy', self.count_strategy)
+			if strategy not in COUNT_STRATEGIES:
+				raise BinderRequestError('Invalid value: count_strategy={{{}}}.'.format(strategy))
+
+			queryset = self._get_count_queryset(queryset)
+			meta['total_records'], meta['total_records_strategy'] = getattr(self, '_count_' + strategy)(queryset)
 
 		return meta
 
 
+
+	# Returns the queryset to count for meta.total_records.  The ordering
+	# and annotations which aren't filtered on don't change the number of
+	# records, but can make the count a lot more expensive (aggregates
+	# need a join and a GROUP BY), so they are dropped.  If the records
+	# are filtered on an aggregate, Django counts over a subquery which
+	# only selects the pks.
+	def _get_count_queryset(self, queryset):
+		# Not prefetching related models here makes it faster still.
+		# See also https://code.djangoproject.com/ticket/23771 and related tickets.
+		queryset = queryset.prefetch_related(None).all()
+		queryset.query.clear_ordering(True)
+		strip_unused_annotations(queryset.query)
+		# Only 'pk' values should reduce DB server memory a (little?) bit, making
+		# things faster.
+		return queryset.values('pk')
+
+
+
+	# The _count_<strategy> methods return the total_records and the
+	# strategy that was actually used to determine it (for example,
+	# 'exact' if an estimate turned out to be too small to be useful).
+	def _count_exact(self, queryset):
+		return queryset.count(), 'exact'
+
+
+
+	def _count_estimate(self, queryset):
+		connection = connections[queryset.db]
+		if connection.vendor != 'postgresql':
+			return self._count_exact(queryset)
+
+		sql, params = queryset.query.sql_with_params()
+		with connection.cursor() as cursor:
+			cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+			plan = cursor.fetchone()[0]
+
+		estimate = plan[0]['Plan']['Plan Rows']
+		if estimate < self.count_estimate_threshold:
+			return self._count_exact(queryset)
+		return estimate, 'estimate'
+
+
+
+	def _count_capped(self, queryset):
+		# Count one more, to tell apart exactly count_cap records and more
+		count = queryset[:self.count_cap + 1].count()
+		if count > self.count_cap:
+			return self.count_cap, 'capped'
+		return count, 'exact'
+
+
+
+	def _count_cached(self, queryset):
+		sql, params = queryset.query.sql_with_params()
+		signature = '{}:{}:{!r}'.format(queryset.db, sql, params)
+		key = 'binder.total_records.' + hashlib.sha1(signature.encode()).hexdigest()
+
+		count = cache.get(key)
+		if count is not None:
+			return count, 'cached'
+
+		count, strategy = self._count_exact(queryset)
+		cache.set(key, count, self.count_cache_timeout)
+		return count, strategy
+
+
 	def get(self, request, pk=None, withs=None, include_annotations=None):
+		# This checks the permissions and does the scoping, which has to
+		# happen even if the response is a 304.  It doesn't run queries yet.
+		queryset = self.get_queryset(request)
+
+		if self.etags:
+			# The versions have to be read before the data, so a change
+			# committed in between gives a new ETag next time.
+			etag = self._get_etag(request, pk, withs)
+			if self._etag_matches(request, etag):
+				response = HttpResponseNotModified()
+				response['ETag'] = etag
+				return response
+
 		include_meta = request.GET.get('include_meta', 'total_records').split(',')
 
-		queryset = self.get_queryset(request)
 		if pk:
 			queryset = queryset.filter(pk=int(pk))
 
@@ -1254,6 +2622,8 @@ class ModelView(View):
 			if not k.startswith('.') and len(v) > 1:
 				raise BinderRequestError('Query parameter `{}` may not be repeated.'.format(k))
 
+		columnar = self._is_columnar(request, pk)
+
 		#### soft-deletes
 		queryset = self.filter_deleted(queryset, pk, request.GET.get('deleted'), request)
 
@@ -1275,25 +2645,67 @@ class ModelView(View):
 		if 'search' in request.GET:
 			queryset = self.search(queryset, request.GET['search'], request)
 
+		#### changed_since
+		changed_since_meta = {}
+		if 'changed_since' in request.GET:
+			queryset, changed_since_meta = self._filter_changed_since(queryset, request.GET['changed_since'], pk)
+
 		queryset = self.order_by(queryset, request)
 
+		fields = self._resolve_fields(self._parse_fields(request).get(''), () if pk else self.list_deferred_fields)
+		deferred = [f for f in self.list_deferred_fields if fields is not None and f not in fields]
+		if deferred:
+			# values_list() only selects the fields anyway, but model
+			# instances would load them.
+			queryset = queryset.defer(*deferred)
+
 		meta = self._generate_meta(include_meta, queryset, request, pk)
+		meta.update(changed_since_meta)
 
-		queryset = self._paginate(queryset, request)
+		# meta.changeset covers all changes, so they can't be paginated
+		if 'changed_since' in request.GET:
+			self._check_changed_since_limits(queryset, request)
+		else:
+			queryset = self._paginate(queryset, request)
+
+		if self.streaming and not pk and not columnar:
+			response = self._get_streaming(queryset, request, meta, withs, include_annotations)
+			if self.etags:
+				response['ETag'] = etag
+			return response
+
+		if columnar:
+			data = self._get_table(queryset, request=request, annotations=include_annotations.get(''), fields=fields)
+			# Records as {'id': pk}, for the cursor
+			objs = [{'id': row[data['fields'].index('id')]} for row in data['rows']] if 'id' in data['fields'] else []
+		else:
+			data = objs = self._get_objs(queryset, request=request, annotations=include_annotations.get(''), fields=fields)
 
 		#### with
-		# parse wheres from request
-		extras, extras_mapping, extras_reverse_mapping, field_results = self._get_withs(queryset, withs, request=request, include_annotations=include_annotations)
+		# Pass the pks of the rows we just fetched, so the (possibly
+		# expensive) main query doesn't have to run again for the withs.
+		pks = [obj['id'] for obj in objs if 'id' in obj]
+		truncated = {}
+		extras, extras_mapping, extras_reverse_mapping, field_results = self._get_withs(pks, withs, request=request, include_annotations=include_annotations, truncated=truncated, columnar=columnar)
+		if truncated:
+			meta['with_truncated'] = {w: sorted(truncated_pks) for w, truncated_pks in truncated.items()}
+
+		if columnar:
+			self._annotate_table_with_related_withs(data, field_results)
+			self._annotate_table_with_counts(data, request, include_annotations)
+		else:
+			for obj in data:
+				self._annotate_obj_with_related_withs(obj, field_results)
 
-		data = self._get_objs(queryset, request=request, annotations=include_annotations.get(''))
-		for obj in data:
-			self._annotate_obj_with_related_withs(obj, field_results)
+			self._annotate_objs_with_counts(data, request, include_annotations)
 
 		if pk:
 			if data:
 				data = data[0]
 			else:
 				raise BinderNotFound()
+		elif 'after' in request.GET:
+			meta['next_cursor'] = self._keyset_cursor(queryset, len(objs), objs[-1] if objs else None)
 
 		if self.comment:
 			meta['comment'] = self.comment
@@ -1307,7 +2719,232 @@ class ModelView(View):
 
 		self._sanity_check_meta_results(request, response_data)
 
-		return JsonResponse(response_data)
+		response = JsonResponse(response_data)
+		if self.etags:
+			response['ETag'] = etag
+		return response
+
+
+
+	# Returns the models whose version counters are part of the ETag of a
+	# GET with <withs>: the view's model and the models of the withs, and
+	# the models related to those, as the records include their ids and
+	# annotations often look at them.  Override this if the records (or
+	# the scoping in get_queryset) depend on other models.
+	def _get_etag_models(self, request, withs):
+		if withs is None:
+			withs = list(filter(None, request.GET.get('with', '').split(',')))
+
+		etag_models = {self.model}
+		for w in withs:
+			etag_models.update(related_model.model for related_model in self._follow_related(w))
+
+		for model in list(etag_models):
+			etag_models.update(f.related_model for f in model._meta.get_fields() if f.is_relation and f.related_model is not None)
+		return etag_models
+
+
+	# Returns the permissions of the user, as far as the ETag of a GET
+	# depends on them: the scoping of this view and of the withs follows
+	# from them, so they change the ETag when they (or the user's groups)
+	# change.
+	def _get_etag_permissions(self, request):
+		user = getattr(request, 'user', None)
+		if user is None or not user.is_authenticated:
+			return None
+		if user.is_superuser:
+			return True
+		return sorted(user.get_all_permissions())
+
+
+	# Returns the weak ETag of a GET, see etags.
+	def _get_etag(self, request, pk, withs):
+		versions = get_versions(self._get_etag_models(request, withs))
+		user = getattr(request, 'user', None)
+		key = jsondumps([
+			'{}.{}'.format(type(self).__module__, type(self).__qualname__),
+			pk,
+			user.pk if user is not None else None,
+			self._get_etag_permissions(request),
+			sorted(request.GET.lists()),
+			sorted((model._meta.label_lower, version) for model, version in versions.items()),
+		])
+		return 'W/' + quote_etag(hashlib.sha1(key.encode()).hexdigest())
+
+
+	# Whether <etag> is in the If-None-Match header of the request.  ETags
+	# are compared weakly, so without the W/ prefix.
+	def _etag_matches(self, request, etag):
+		if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+		if not if_none_match:
+			return False
+		etags = parse_etags(if_none_match)
+		return '*' in etags or etag[2:] in {e[2:] if e.startswith('W/') else e for e in etags}
+
+
+	# Restricts <queryset> to the records which changed after changeset
+	# <changed_since>, according to the history, for clients that want
+	# to update their copy of a collection.  Returns the queryset and the
+	# meta for the response:
+	# - deleted: the ids of the records which changed, but aren't in the
+	#   queryset (anymore).  They were deleted, or don't match the
+	#   filters or scoping anymore.
+	# - changeset: the changed_since to use next time.  Changesets of
+	#   the last BINDER_CHANGED_SINCE_MARGIN seconds (default 10) are
+	#   left out, because one which started earlier may still be
+	#   committing.  Those changes will be sent again next time.
+	def _filter_changed_since(self, queryset, changed_since, pk=None):
+		if pk:
+			raise BinderRequestError('changed_since is only supported for lists.')
+		try:
+			changed_since = int(changed_since)
+		except ValueError:
+			raise BinderRequestError('Invalid value: changed_since={{{}}}.'.format(changed_since))
+		if not getattr(getattr(self.model, 'Binder', None), 'history', False):
+			raise BinderRequestError('changed_since is not supported for {}, which has no history.'.format(self.model.__name__))
+
+		# Determine the next changeset before looking at the changes, so
+		# we can't miss the ones made in between.
+		margin = getattr(django.conf.settings, 'BINDER_CHANGED_SINCE_MARGIN', 10)
+		cutoff = timezone.now() - datetime.timedelta(seconds=margin)
+		next_changeset = history.Changeset.objects.filter(date__lt=cutoff).order_by('-id').values_list('id', flat=True).first()
+
+		changes = history.Change.objects.filter(model=self.model.__name__, changeset_id__gt=changed_since).order_by()
+		deleted = changes.exclude(oid__in=queryset.values('pk')).values_list('oid', flat=True).distinct()
+
+		queryset = queryset.filter(pk__in=changes.values('oid'))
+		meta = {
+			'deleted': sorted(deleted),
+			'changeset': max(next_changeset or 0, changed_since),
+		}
+		return queryset, meta
+
+
+	# Changes are sent all at once, as a client which got only a page of
+	# them would skip the rest next time.  So limit, offset and after are
+	# refused, and views with a limit_max refuse more changes than that;
+	# the client has to fetch the whole collection again then.
+	def _check_changed_since_limits(self, queryset, request):
+		for param in ['limit', 'offset', 'after']:
+			if param in request.GET:
+				raise BinderRequestError('{} can not be combined with changed_since.'.format(param.capitalize()))
+		if self.limit_max and queryset.count() > self.limit_max:
+			raise BinderRequestError('More than {} records changed, which exceeds the limit for this view.'.format(self.limit_max))
+
+
+	# Returns whether the records (and withs) should be sent as tables
+	# instead of lists of objects, see _get_table().  Clients ask for this
+	# with ?format=columnar.  This saves repeating the field names in
+	# every record, which make up a large part of big responses.
+	def _is_columnar(self, request, pk=None):
+		format = request.GET.get('format')
+		if format is None:
+			return False
+		if format != 'columnar':
+			raise BinderRequestError('Invalid value: format={{{}}}.'.format(format))
+		if pk:
+			raise BinderRequestError('format=columnar is only supported for lists.')
+		return True
+
+
+	# The streaming counterpart of the second half of get().  Records are
+	# serialized a chunk at a time while the response is being sent.  The
+	# withs are collected per chunk, and sent after the data together with
+	# the meta, so the response has the same shape as a regular GET.
+	def _get_streaming(self, queryset, request, meta, withs, include_annotations):
+		if withs is None:
+			withs = list(filter(None, request.GET.get('with', '').split(',')))
+		with_map, where_map = self._parse_withs(withs, request)
+		with_limits = self._parse_with_limits(withs, request)
+		fields = self._resolve_fields(self._parse_fields(request).get(''), self.list_deferred_fields)
+		plan = self._get_serialization_plan()
+		if fields is not None:
+			plan = self._restrict_serialization_plan(plan, fields)
+		chunk_size = self.streaming_chunk_size
+
+		# The withs are fetched while the response is sent, after
+		# dispatch() is done.  So their permission checks and scoping
+		# happen now, where they can still fail the request.
+		with_querysets = {}
+		for w in withs:
+			model = self._follow_related(w)[-1].model
+			if model not in with_querysets:
+				with_querysets[model] = self.get_model_view(model).get_queryset(request)
+
+		read_alias = replicas.get_current_read_alias()
+		is_read_only = self._is_read_only(request)
+
+		def stream():
+			# The transaction and routing from dispatch() are gone by the
+			# time the response is sent, so set them up again, to read a
+			# consistent view from the same database.
+			if is_read_only:
+				atomic = read_only.atomic(using=read_alias)
+				history_read_only = history.read_only()
+			else:
+				atomic = transaction.atomic()
+				history_read_only = contextlib.nullcontext()
+
+			with replicas.routing(request, read_alias, is_read_only), atomic, history_read_only:
+				field_results = {}
+				truncated = {}
+				seen_pks = set()
+				count = 0
+				last = None
+
+				yield '{"data": ['
+
+				rows = self._only_plan_fields(queryset, plan).iterator(chunk_size=chunk_size)
+				while True:
+					chunk = list(itertools.islice(rows, chunk_size))
+					if not chunk:
+						break
+
+					# See _get_objs() for why records may appear more than once
+					chunk = [obj for obj in chunk if obj.pk not in seen_pks]
+					seen_pks.update(obj.pk for obj in chunk)
+
+					data = self._get_objs(chunk, request=request, annotations=include_annotations.get(''), fields=fields)
+
+					pks = [obj['id'] for obj in data if 'id' in obj]
+					chunk_results = self._get_with_ids(pks, request=request, include_annotations=include_annotations, with_map=with_map, where_map=where_map, with_limits=with_limits, truncated=truncated)
+					for (w, (view, ids_dict, is_singular)) in chunk_results.items():
+						field_results.setdefault(w, (view, defaultdict(list), is_singular))[1].update(ids_dict)
+
+					self._annotate_objs_with_counts(data, request, include_annotations)
+
+					for obj in data:
+						self._annotate_obj_with_related_withs(obj, chunk_results)
+						yield (',' if count else '') + jsondumps(obj)
+						count += 1
+						last = obj
+
+				# Without any records we still need the with mappings
+				if not count:
+					field_results = self._get_with_ids([], request=request, include_annotations=include_annotations, with_map=with_map, where_map=where_map)
+
+				extras, extras_mapping, extras_reverse_mapping, field_results = self._get_with_objs(field_results, request, include_annotations, querysets=with_querysets)
+
+				if truncated:
+					meta['with_truncated'] = {w: sorted(truncated_pks) for w, truncated_pks in truncated.items()}
+
+				if 'after' in request.GET:
+					meta['next_cursor'] = self._keyset_cursor(queryset, count, last)
+
+				if self.comment:
+					meta['comment'] = self.comment
+
+				debug = {'request_id': request.request_id}
+				if django.conf.settings.DEBUG and 'debug' in request.GET:
+					debug['queries'] = ['{}s: {}'.format(q['time'], q['sql'].replace('"', '')) for q in django.db.connection.queries]
+					debug['query_count'] = len(django.db.connection.queries)
+
+				# Dump the rest of the response as an object, and splice it
+				# onto the data by dropping the opening brace.
+				rest = {'with': extras, 'with_mapping': extras_mapping, 'with_related_name_mapping': extras_reverse_mapping, 'meta': meta, 'debug': debug}
+				yield '], ' + jsondumps(rest)[1:]
+
+		return StreamingHttpResponse(stream(), content_type='application/json')
 
 
 	# Hack to auto-detect and inform people when they are accidentally
@@ -1321,6 +2958,12 @@ class ModelView(View):
 	def _sanity_check_meta_results(self, request, response_data):
 		meta = response_data['meta']
 		data = response_data['data']
+		if request.GET.get('format') == 'columnar':
+			data = data['rows']
+
+		# With keyset pagination, the page position isn't known
+		if 'after' in request.GET:
+			return
 
 		try:
 			limit = int(request.GET.get('limit', 0))
@@ -1328,6 +2971,10 @@ class ModelView(View):
 			limit = self.limit_default
 		offset = int(request.GET.get('offset') or 0)
 
+		# Other strategies don't give the real number of records
+		if meta.get('total_records_strategy') != 'exact':
+			return
+
 		if 'total_records' in meta and meta['total_records'] > len(data) and len(data) < limit and (offset + limit) < meta['total_records']:
 			logger.error('Detected anomalous total record count versus data response length.  Please check if there are any scopes returning Q() objects which follow one-to-many links!')
 
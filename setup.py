@@ -42,6 +42,9 @@ setup(
 		'django-request-id >= 1.0.0',
 		'requests >= 2.13.0',
 	],
+	extras_require={
+		'orjson': ['orjson >= 3.0'],
+	},
 	tests_require=[
 		'django-hijack >= 2.1.10',
 		(
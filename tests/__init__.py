@@ -31,7 +31,10 @@ settings.configure(**{
 	'ALLOWED_HOSTS': ['*'],
 	'DATABASES': {
 		'default': db_settings,
+		# The same database, over another connection (see test_replicas)
+		'replica': dict(db_settings, TEST={'MIRROR': 'default'}),
 	},
+	'DATABASE_ROUTERS': ['binder.replicas.ReplicaRouter'],
 	'MIDDLEWARE': [
 		# TODO: Try to reduce the set of absolutely required middlewares
 		'request_id.middleware.RequestIdMiddleware',
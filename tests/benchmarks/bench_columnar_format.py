@@ -0,0 +1,63 @@
+# Compares the size and time of regular list GETs with ?format=columnar.
+# These are not picked up by the regular test run; run explicitly with
+#
+#   python -m unittest tests.benchmarks.bench_columnar_format
+import time
+
+from django.test import TestCase, Client
+from django.contrib.auth.models import User
+
+from ..testapp.models import Animal, Caretaker, Zoo
+
+
+class ColumnarFormatBenchmark(TestCase):
+	records = 5000
+	rounds = 10
+
+	@classmethod
+	def setUpTestData(cls):
+		zoos = Zoo.objects.bulk_create([Zoo(name='zoo {}'.format(i)) for i in range(10)])
+		caretakers = Caretaker.objects.bulk_create([Caretaker(name='caretaker {}'.format(i)) for i in range(cls.records // 10)])
+		Animal.objects.bulk_create([
+			Animal(name='animal {}'.format(i), zoo=zoos[i % len(zoos)], caretaker=caretakers[i % len(caretakers)])
+			for i in range(cls.records)
+		])
+
+
+	def setUp(self):
+		super().setUp()
+		u = User(username='testuser', is_active=True, is_superuser=True)
+		u.set_password('test')
+		u.save()
+		self.client = Client()
+		r = self.client.login(username='testuser', password='test')
+		self.assertTrue(r)
+
+
+	def _bench(self, params):
+		timings = []
+		for _ in range(self.rounds):
+			start = time.perf_counter()
+			response = self.client.get('/animal/', data=dict(params, limit='none'))
+			timings.append(time.perf_counter() - start)
+		self.assertEqual(response.status_code, 200)
+		return len(response.content), min(timings)
+
+
+	def _compare(self, params):
+		for backend in ['json', 'orjson']:
+			with self.settings(BINDER_JSON_BACKEND=backend):
+				objects_size, objects_time = self._bench(params)
+				columnar_size, columnar_time = self._bench(dict(params, format='columnar'))
+			print('\n{} animals, {}, {} backend: objects {} bytes in {:.1f}ms, columnar {} bytes in {:.1f}ms ({:.0f}% of the size, {:.1f}x)'.format(
+				self.records, params, backend, objects_size, objects_time * 1000, columnar_size, columnar_time * 1000,
+				columnar_size / objects_size * 100, objects_time / columnar_time,
+			))
+
+
+	def test_animals(self):
+		self._compare({})
+
+
+	def test_animals_with_relations(self):
+		self._compare({'with': 'zoo,caretaker'})
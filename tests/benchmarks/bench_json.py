@@ -0,0 +1,126 @@
+# Compares encoding typical ModelView.get() responses with the json
+# module as it was done before (walking the MRO for every value and
+# formatting datetimes with strftime), with the json backend and with the
+# orjson backend.  These are not picked up by the regular test run; run
+# explicitly with
+#
+#   python -m unittest tests.benchmarks.bench_json
+import datetime
+import json
+import time
+from unittest import mock, skipUnless
+
+from django.test import TestCase, Client
+from django.contrib.auth.models import User
+
+import binder.json
+from binder.json import JsonBackend, OrjsonBackend, SERIALIZERS, default, orjson
+from ..testapp.models import Animal, Caretaker, Zoo
+
+
+# binder.json.default() and JsonResponse() before the backends
+def old_default(value):
+	for cls in type(value).mro():
+		if cls in old_serializers:
+			return old_serializers[cls](value)
+
+	raise TypeError('{} is not JSON serializable'.format(repr(value)))
+
+
+old_serializers = dict(SERIALIZERS)
+old_serializers[datetime.datetime] = lambda v: v.strftime('%Y-%m-%dT%H:%M:%S.%f%z')
+
+
+def old_dumpb(data):
+	return json.dumps(data, default=old_default).encode()
+
+
+def old_loads(data):
+	return json.loads(data.decode())
+
+
+
+class JsonBenchmark(TestCase):
+	records = 1000
+	rounds = 10
+
+	@classmethod
+	def setUpTestData(cls):
+		zoos = Zoo.objects.bulk_create([Zoo(name='zoo {}'.format(i), founding_date=datetime.date(1838, 5, 1)) for i in range(10)])
+		now = datetime.datetime.now(datetime.timezone.utc)
+		caretakers = Caretaker.objects.bulk_create([
+			Caretaker(name='caretaker {}'.format(i), first_seen=now, last_seen=now)
+			for i in range(cls.records // 10)
+		])
+		Animal.objects.bulk_create([
+			Animal(name='animal {}'.format(i), zoo=zoos[i % len(zoos)], caretaker=caretakers[i % len(caretakers)])
+			for i in range(cls.records)
+		])
+
+
+	def setUp(self):
+		super().setUp()
+		u = User(username='testuser', is_active=True, is_superuser=True)
+		u.set_password('test')
+		u.save()
+		self.client = Client()
+		r = self.client.login(username='testuser', password='test')
+		self.assertTrue(r)
+
+
+	# Returns the data a GET passes to JsonResponse()
+	def _get_data(self, path, params):
+		with mock.patch('binder.views.JsonResponse', wraps=binder.json.JsonResponse) as json_response:
+			response = self.client.get(path, data=dict(params, limit='none'))
+		self.assertEqual(response.status_code, 200)
+		return json_response.call_args[0][0]
+
+
+	def _time(self, func, *args):
+		timings = []
+		for _ in range(self.rounds):
+			start = time.perf_counter()
+			result = func(*args)
+			timings.append(time.perf_counter() - start)
+		return result, min(timings)
+
+
+	def _compare(self, name, data):
+		expected, old_time = self._time(old_dumpb, data)
+		result, json_time = self._time(JsonBackend().dumpb, data, default)
+		self.assertEqual(expected, result)
+		line = '\n{}: {} bytes, dumps: before {:.1f}ms, json {:.1f}ms ({:.1f}x)'.format(
+			name, len(expected), old_time * 1000, json_time * 1000, old_time / json_time,
+		)
+		if orjson:
+			result, orjson_time = self._time(OrjsonBackend().dumpb, data, default)
+			self.assertEqual(json.loads(expected), json.loads(result))
+			line += ', orjson {:.1f}ms ({:.1f}x)'.format(orjson_time * 1000, old_time / orjson_time)
+
+		parsed, old_time = self._time(old_loads, expected)
+		result, json_time = self._time(JsonBackend().loads, expected)
+		self.assertEqual(parsed, result)
+		line += '; loads: before {:.1f}ms, json {:.1f}ms'.format(old_time * 1000, json_time * 1000)
+		if orjson:
+			result, orjson_time = self._time(OrjsonBackend().loads, expected)
+			self.assertEqual(parsed, result)
+			line += ', orjson {:.1f}ms ({:.1f}x)'.format(orjson_time * 1000, old_time / orjson_time)
+		print(line)
+
+
+	def test_animals_with_relations(self):
+		self._compare('animals with zoo,caretaker', self._get_data('/animal/', {'with': 'zoo,caretaker'}))
+
+
+	def test_caretakers_with_datetimes(self):
+		self._compare('caretakers with animals', self._get_data('/caretaker/', {'with': 'animals'}))
+
+
+	@skipUnless(orjson, 'orjson is not installed')
+	def test_whole_request(self):
+		params = {'with': 'zoo,caretaker', 'limit': 'none'}
+		timings = {}
+		for backend in ['json', 'orjson']:
+			with self.settings(BINDER_JSON_BACKEND=backend):
+				_, timings[backend] = self._time(self.client.get, '/animal/', params)
+		print('\nGET /animal/ with zoo,caretaker: json {:.1f}ms, orjson {:.1f}ms'.format(timings['json'] * 1000, timings['orjson'] * 1000))
@@ -0,0 +1,93 @@
+# Compares fetching the records of withs one after another with
+# fetching them concurrently (ModelView.parallel_withs).  These are not
+# picked up by the regular test run; run explicitly with
+#
+#   python -m unittest tests.benchmarks.bench_parallel_withs
+#
+# The worker threads can't see the data of a test transaction, so this
+# commits its data and removes it again afterwards.
+#
+# Serializing doesn't run in parallel because of the GIL, so this only
+# helps when the time goes to round trips to the database rather than to
+# serializing lots of records.  On a local database the round trips are
+# nearly free, so it is also measured with a simulated network latency
+# per query.  Try a larger limit to see the difference.
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase, Client
+from django.contrib.auth.models import User
+from django.db.backends.utils import CursorWrapper
+
+from ..testapp.models import Animal, Caretaker, Costume, FeedingSchedule, Nickname, Zoo
+from ..testapp.views import AnimalView
+
+
+class ParallelWithsBenchmark(SimpleTestCase):
+	databases = {'default'}
+	records = 1000
+	limit = 50
+	rounds = 5
+
+	@classmethod
+	def setUpClass(cls):
+		super().setUpClass()
+		cls.addClassCleanup(cls._delete_data)
+
+		cls.user = User(username='testuser_benchmark', is_active=True, is_superuser=True)
+		cls.user.set_password('test')
+		cls.user.save()
+
+		zoos = Zoo.objects.bulk_create([Zoo(name='benchmark zoo {}'.format(i)) for i in range(10)])
+		caretakers = Caretaker.objects.bulk_create([Caretaker(name='benchmark caretaker {}'.format(i)) for i in range(cls.records // 10)])
+		animals = Animal.objects.bulk_create([
+			Animal(name='benchmark animal {}'.format(i), zoo=zoos[i % len(zoos)], caretaker=caretakers[i % len(caretakers)])
+			for i in range(cls.records)
+		])
+		Costume.objects.bulk_create([Costume(animal=animal, nickname='costume') for animal in animals])
+		Nickname.objects.bulk_create([Nickname(animal=animal, nickname='nickname') for animal in animals])
+		FeedingSchedule.objects.bulk_create([FeedingSchedule(animal=animal, foods=['meat']) for animal in animals])
+
+
+	@classmethod
+	def _delete_data(cls):
+		Animal.objects.filter(name__startswith='benchmark ').delete()
+		Zoo.objects.filter(name__startswith='benchmark ').delete()
+		Caretaker.objects.filter(name__startswith='benchmark ').delete()
+		User.objects.filter(username='testuser_benchmark').delete()
+
+
+	def _bench(self, parallel, latency):
+		client = Client()
+		client.login(username='testuser_benchmark', password='test')
+		params = {
+			'.name:startswith': 'benchmark ',
+			'limit': self.limit,
+			# Not zoo: its animal_count property takes a query per zoo,
+			# which would dominate both timings.
+			'with': 'caretaker,costume,nickname,feeding_schedule',
+		}
+
+		execute = CursorWrapper._execute
+
+		def slow_execute(cursor, *args, **kwargs):
+			time.sleep(latency)
+			return execute(cursor, *args, **kwargs)
+
+		timings = []
+		with mock.patch.object(AnimalView, 'parallel_withs', parallel), mock.patch.object(CursorWrapper, '_execute', slow_execute):
+			for _ in range(self.rounds):
+				start = time.perf_counter()
+				response = client.get('/animal/', data=params)
+				timings.append(time.perf_counter() - start)
+		self.assertEqual(response.status_code, 200)
+		return min(timings)
+
+
+	def test_animals_with_relations(self):
+		for latency in [0, 0.002, 0.01]:
+			serial_time = self._bench(False, latency)
+			parallel_time = self._bench(True, latency)
+			print('\n{} animals with 4 relations, {:.0f}ms latency per query: serial {:.1f}ms, parallel {:.1f}ms ({:.1f}x)'.format(
+				self.limit, latency * 1000, serial_time * 1000, parallel_time * 1000, serial_time / parallel_time,
+			))
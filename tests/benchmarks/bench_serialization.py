@@ -0,0 +1,62 @@
+# Compares the serialization engines of ModelView._get_objs().
+# These are not picked up by the regular test run; run explicitly with
+#
+#   python -m unittest tests.benchmarks.bench_serialization
+import time
+
+from django.test import TestCase, RequestFactory
+from django.contrib.auth.models import User
+
+from binder.router import Router
+from binder.views import annotate
+from ..testapp.models import Animal, Caretaker, Zoo
+from ..testapp.views import AnimalView, CaretakerView
+
+
+class SerializationBenchmark(TestCase):
+	records = 5000
+	rounds = 5
+
+	@classmethod
+	def setUpTestData(cls):
+		zoo = Zoo.objects.create(name='Artis')
+		caretakers = Caretaker.objects.bulk_create([Caretaker(name='caretaker {}'.format(i)) for i in range(cls.records // 10)])
+		Animal.objects.bulk_create([
+			Animal(name='animal {}'.format(i), zoo=zoo, caretaker=caretakers[i % len(caretakers)])
+			for i in range(cls.records)
+		])
+
+
+	def _bench(self, view_class, engine):
+		request = RequestFactory().get('/')
+		request.user = User(is_superuser=True)
+		view = view_class()
+		view.router = Router()
+		view.serialization_engine = engine
+
+		include_annotations = view._parse_include_annotations(request)
+		timings = []
+		for _ in range(self.rounds):
+			queryset = annotate(view.get_queryset(request), request, include_annotations.get(''))
+			queryset = view.order_by(queryset, request)
+			start = time.perf_counter()
+			data = view._get_objs(queryset, request=request, annotations=include_annotations.get(''))
+			timings.append(time.perf_counter() - start)
+		return data, min(timings)
+
+
+	def _compare(self, view_class):
+		expected, instances_time = self._bench(view_class, 'instances')
+		data, values_time = self._bench(view_class, 'values')
+		self.assertEqual(expected, data)
+		print('\n{}: {} records, instances {:.1f}ms, values {:.1f}ms ({:.1f}x)'.format(
+			view_class.__name__, len(data), instances_time * 1000, values_time * 1000, instances_time / values_time,
+		))
+
+
+	def test_animals(self):
+		self._compare(AnimalView)
+
+
+	def test_caretakers(self):
+		self._compare(CaretakerView)
@@ -0,0 +1,69 @@
+# Compares grouping the ids of withs to the same model by their
+# annotations (group_ids_by_annotations) with the pairwise overlap loop
+# _get_withs used before.  These are not picked up by the regular test
+# run; run explicitly with
+#
+#   python -m unittest tests.benchmarks.bench_with_annotation_groups
+#
+# Every with gets its own set of annotations and overlaps with several
+# others, which is the worst case for the pairwise loop.
+import random
+import time
+
+from django.test import SimpleTestCase
+
+from binder.views import group_ids_by_annotations
+
+
+# The loop group_ids_by_annotations replaced
+def pairwise_group_ids_by_annotations(annotation_ids):
+	to_add = list(annotation_ids.items())
+	annotation_ids = {}
+	while to_add:
+		rannotations, rids = to_add.pop()
+		for lannotations, lids in list(annotation_ids.items()):
+			overlap = lids & rids
+			if overlap:
+				to_add.append((lannotations | rannotations, overlap))
+				lids -= overlap
+				rids -= overlap
+				if not lids:
+					del annotation_ids[lannotations]
+				if not rids:
+					break
+		if rids:
+			annotation_ids.setdefault(rannotations, set()).update(rids)
+	return annotation_ids
+
+
+class WithAnnotationGroupsBenchmark(SimpleTestCase):
+	rounds = 5
+
+	def _annotation_ids(self, withs, ids, ids_per_with):
+		rng = random.Random(withs)
+		return {
+			frozenset(['annotation_{}'.format(i)]): set(rng.sample(range(ids), ids_per_with))
+			for i in range(withs)
+		}
+
+
+	def _bench(self, func, annotation_ids):
+		timings = []
+		for _ in range(self.rounds):
+			# Both modify the sets they are given
+			copy = {annotations: set(ids) for annotations, ids in annotation_ids.items()}
+			start = time.perf_counter()
+			result = func(copy)
+			timings.append(time.perf_counter() - start)
+		return min(timings), result
+
+
+	def test_overlapping_withs(self):
+		for withs, ids, ids_per_with in [(5, 1000, 200), (20, 1000, 200), (50, 2000, 200)]:
+			annotation_ids = self._annotation_ids(withs, ids, ids_per_with)
+			pairwise_time, expected = self._bench(pairwise_group_ids_by_annotations, annotation_ids)
+			grouped_time, result = self._bench(group_ids_by_annotations, annotation_ids)
+			self.assertEqual(expected, result)
+			print('\n{} withs of {} out of {} ids, {} groups: pairwise {:.1f}ms, grouped {:.1f}ms ({:.1f}x)'.format(
+				withs, ids_per_with, ids, len(result), pairwise_time * 1000, grouped_time * 1000, pairwise_time / grouped_time,
+			))
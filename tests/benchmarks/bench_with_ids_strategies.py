@@ -0,0 +1,75 @@
+# Compares the with_ids_strategy 'aggregate' with 'subquery' for a zoo
+# with several wide to-many relations.  These are not picked up by the
+# regular test run; run explicitly with
+#
+#   python -m unittest tests.benchmarks.bench_with_ids_strategies
+#
+# With 'aggregate', the joins of the relations multiply each other's
+# rows, so the arrays which are sent to Python contain every id many
+# times over.  The payload is the number of ids in those arrays.
+import time
+from unittest import mock
+
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth.models import User
+from django.db import connection
+
+from ..testapp.models import Animal, ContactPerson, Zoo, ZooEmployee
+from ..testapp.views import ZooView
+
+
+class WithIdsStrategiesBenchmark(TestCase):
+	zoos = 10
+	animals = 100
+	contacts = 30
+	employees = 20
+	rounds = 3
+
+	@classmethod
+	def setUpTestData(cls):
+		cls.user = User(username='testuser', is_active=True, is_superuser=True)
+		cls.user.set_password('test')
+		cls.user.save()
+
+		contacts = ContactPerson.objects.bulk_create([ContactPerson(name='contact {}'.format(i)) for i in range(cls.contacts)])
+		for i in range(cls.zoos):
+			zoo = Zoo.objects.create(name='zoo {}'.format(i))
+			zoo.contacts.set(contacts)
+			Animal.objects.bulk_create([Animal(name='animal {}'.format(j), zoo=zoo) for j in range(cls.animals)])
+			ZooEmployee.objects.bulk_create([ZooEmployee(name='employee {}'.format(j), zoo=zoo) for j in range(cls.employees)])
+
+
+	def _bench(self, strategy):
+		client = Client()
+		client.login(username='testuser', password='test')
+		params = {'with': 'animals,contacts,zoo_employees', 'limit': 'none'}
+
+		timings = []
+		with mock.patch.object(ZooView, 'with_ids_strategy', strategy):
+			for _ in range(self.rounds):
+				with CaptureQueriesContext(connection) as queries:
+					start = time.perf_counter()
+					response = client.get('/zoo/', data=params)
+					timings.append(time.perf_counter() - start)
+		self.assertEqual(response.status_code, 200)
+
+		# Run the query of the with ids again on its own
+		sql, = [q['sql'] for q in queries.captured_queries if 'AS "animals"' in q['sql']]
+		with connection.cursor() as cursor:
+			start = time.perf_counter()
+			cursor.execute(sql)
+			rows = cursor.fetchall()
+			query_time = time.perf_counter() - start
+		payload = sum(len(array) for pk, *arrays in rows for array in arrays)
+
+		return min(timings), query_time, payload
+
+
+	def test_wide_fan_out(self):
+		results = {strategy: self._bench(strategy) for strategy in ['aggregate', 'subquery']}
+		print()
+		for strategy, (request_time, query_time, payload) in results.items():
+			print('{} zoos with {} animals, {} contacts and {} employees each, {}: request {:.1f}ms, ids query {:.1f}ms, {} ids'.format(
+				self.zoos, self.animals, self.contacts, self.employees, strategy, request_time * 1000, query_time * 1000, payload,
+			))
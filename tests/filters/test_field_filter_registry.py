@@ -0,0 +1,74 @@
+import gc
+
+from django.test import TestCase
+from django.db import models
+
+from binder.models import ArrayFieldFilter, FieldFilter, IntegerFieldFilter, TextFieldFilter
+from binder.views import get_annotations
+
+from ..testapp.models import Animal, Caretaker
+from ..testapp.views import AnimalView
+
+
+class ShoeSizeField(models.IntegerField):
+	pass
+
+
+class FieldFilterRegistryTest(TestCase):
+	def test_filter_instances_are_cached_per_field(self):
+		name = Animal._meta.get_field('name')
+		filter = FieldFilter.for_field(name)
+		self.assertIsInstance(filter, TextFieldFilter)
+		self.assertIs(filter.field, name)
+		self.assertIs(filter, FieldFilter.for_field(name))
+
+		# Resolved through the MRO of the field class
+		self.assertIsInstance(FieldFilter.for_field(ShoeSizeField(name='size')), IntegerFieldFilter)
+
+
+	def test_reset(self):
+		filter = FieldFilter.for_field(Animal._meta.get_field('name'))
+		view = AnimalView()
+
+		# Pretend the mapping is out of date
+		FieldFilter._filter_classes = {}
+		self.assertIsNone(view.get_field_filter(models.TextField))
+		self.assertIs(TextFieldFilter, view.get_field_filter(models.TextField, reset=True))
+		self.assertIsNot(filter, FieldFilter.for_field(Animal._meta.get_field('name')))
+
+		FieldFilter._filter_classes = {}
+		self.assertIs(TextFieldFilter, ArrayFieldFilter(None).get_field_filter(models.TextField, reset=True))
+
+
+	def test_annotation_output_fields(self):
+		field = get_annotations(Caretaker, annotations={'animal_count'})['animal_count']['field']
+		filter = FieldFilter.for_field(field)
+		self.assertIsInstance(filter, IntegerFieldFilter)
+
+		# The field is cloned for every request, but maps to the same filter
+		field = get_annotations(Caretaker, annotations={'animal_count'})['animal_count']['field']
+		self.assertIs(filter, FieldFilter.for_field(field))
+
+
+	def test_new_filter_classes_are_picked_up(self):
+		field = ShoeSizeField(name='size')
+		self.assertIsInstance(FieldFilter.for_field(field), IntegerFieldFilter)
+
+		class ShoeSizeFieldFilter(FieldFilter):
+			fields = [ShoeSizeField]
+			allowed_qualifiers = [None]
+
+			def clean_value(self, qualifier, v):
+				return int(v)
+
+		try:
+			self.assertIs(ShoeSizeFieldFilter, FieldFilter.get_filter_class(ShoeSizeField))
+			self.assertIsInstance(FieldFilter.for_field(field), ShoeSizeFieldFilter)
+		finally:
+			# Forget about the filter class again
+			FieldFilter._filter_classes = None
+			FieldFilter._field_filters = {}
+			del ShoeSizeFieldFilter
+			gc.collect()
+
+		self.assertIsInstance(FieldFilter.for_field(field), IntegerFieldFilter)
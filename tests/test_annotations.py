@@ -1,8 +1,11 @@
+from unittest import mock
+
 from django.test import TestCase, Client
 from django.contrib.auth.models import User
 
 from binder.json import jsonloads
 from .testapp.models import Animal, Caretaker, Zoo
+from .testapp.views import CaretakerView
 
 
 class AnnotationTestCase(TestCase):
@@ -298,3 +301,25 @@ class IncludeAnnotationsTest(TestCase):
 		self.assertNotIn('bsn', data['data'][0])
 		self.assertNotIn('last_present', data['data'][0])
 		self.assertIn('scary', data['data'][0])
+
+	def test_relations_to_same_model_with_different_annotations(self):
+		other = Caretaker(name='door')
+		other.save()
+		Animal(name='Bokito', zoo=self.zoo, caretaker=other).save()
+
+		with mock.patch.object(CaretakerView, '_get_objs', autospec=True, side_effect=CaretakerView._get_objs) as get_objs:
+			res = self.client.get('/animal/{}/'.format(self.animal.pk), data={
+				'with': 'caretaker,zoo.animals.caretaker',
+				'include_annotations': 'caretaker(animal_count),zoo.animals.caretaker(bsn)',
+			})
+		self.assertEqual(res.status_code, 200)
+		# One fetch for carl with both annotations, one for door with just bsn
+		self.assertEqual(2, get_objs.call_count)
+
+		data = jsonloads(res.content)
+		caretakers = {c['name']: c for c in data['with']['caretaker']}
+		self.assertEqual({'carl', 'door'}, set(caretakers))
+		self.assertEqual(1, caretakers['carl']['animal_count'])
+		self.assertEqual('my secret ssn', caretakers['carl']['bsn'])
+		self.assertNotIn('animal_count', caretakers['door'])
+		self.assertEqual('my secret ssn', caretakers['door']['bsn'])
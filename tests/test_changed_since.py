@@ -0,0 +1,146 @@
+import json
+from unittest import mock
+
+from django.test import TestCase, Client, override_settings
+from django.contrib.auth.models import User
+
+from binder.history import Changeset
+from binder.json import jsonloads
+from .testapp.models import Animal, Zoo
+from .testapp.views import AnimalView
+
+
+@override_settings(BINDER_CHANGED_SINCE_MARGIN=0)
+class ChangedSinceTest(TestCase):
+	def setUp(self):
+		super().setUp()
+		u = User(username='testuser', is_active=True, is_superuser=True)
+		u.set_password('test')
+		u.save()
+		self.client = Client()
+		r = self.client.login(username='testuser', password='test')
+		self.assertTrue(r)
+
+		self.artis = Zoo(name='Artis')
+		self.artis.save()
+		for name in ['Pluto', 'Scrooge McDuck', 'Mickey Mouse']:
+			self._post('/animal/', {'name': name, 'zoo': self.artis.pk})
+		self.changeset = Changeset.objects.latest('id').pk
+
+
+	def _post(self, path, data):
+		response = self.client.post(path, data=json.dumps(data), content_type='application/json')
+		self.assertEqual(response.status_code, 200)
+		return jsonloads(response.content)
+
+
+	def _put(self, animal, data):
+		response = self.client.put('/animal/{}/'.format(animal.pk), data=json.dumps(data), content_type='application/json')
+		self.assertEqual(response.status_code, 200)
+
+
+	def _get(self, params):
+		response = self.client.get('/animal/', data=params)
+		self.assertEqual(response.status_code, 200)
+		return jsonloads(response.content)
+
+
+	def test_changed_since(self):
+		result = self._get({'changed_since': self.changeset})
+		self.assertEqual([], result['data'])
+		self.assertEqual([], result['meta']['deleted'])
+		self.assertEqual(self.changeset, result['meta']['changeset'])
+		self.assertEqual(0, result['meta']['total_records'])
+
+		pluto = Animal.objects.get(name='Pluto')
+		self._put(pluto, {'name': 'Goofy'})
+		mickey = Animal.objects.get(name='Mickey Mouse')
+		self._put(mickey, {'name': 'Minnie Mouse'})
+
+		result = self._get({'changed_since': self.changeset, 'order_by': 'name'})
+		self.assertEqual(['Goofy', 'Minnie Mouse'], [a['name'] for a in result['data']])
+		self.assertEqual([], result['meta']['deleted'])
+		self.assertEqual(Changeset.objects.latest('id').pk, result['meta']['changeset'])
+
+		# Nothing changed since then
+		result = self._get({'changed_since': result['meta']['changeset']})
+		self.assertEqual([], result['data'])
+
+		# Everything since the start
+		result = self._get({'changed_since': 0})
+		self.assertEqual(3, len(result['data']))
+
+
+	def test_deleted_records(self):
+		pluto = Animal.objects.get(name='Pluto')
+		response = self.client.delete('/animal/{}/'.format(pluto.pk))
+		self.assertEqual(response.status_code, 204)
+
+		result = self._get({'changed_since': self.changeset})
+		self.assertEqual([], result['data'])
+		self.assertEqual([pluto.pk], result['meta']['deleted'])
+
+		# Unless we ask for deleted records
+		result = self._get({'changed_since': self.changeset, 'deleted': 'true'})
+		self.assertEqual([pluto.pk], [a['id'] for a in result['data']])
+		self.assertEqual([], result['meta']['deleted'])
+
+
+	def test_records_no_longer_matching_the_filters_count_as_deleted(self):
+		pluto = Animal.objects.get(name='Pluto')
+		mickey = Animal.objects.get(name='Mickey Mouse')
+		self._put(pluto, {'name': 'Goofy'})
+		self._put(mickey, {'name': 'Mickey'})
+
+		result = self._get({'changed_since': self.changeset, '.name:startswith': 'Mickey'})
+		self.assertEqual([mickey.pk], [a['id'] for a in result['data']])
+		self.assertEqual([pluto.pk], result['meta']['deleted'])
+
+
+	def test_recent_changesets_are_sent_again(self):
+		self._put(Animal.objects.get(name='Pluto'), {'name': 'Goofy'})
+		with override_settings(BINDER_CHANGED_SINCE_MARGIN=3600):
+			result = self._get({'changed_since': self.changeset})
+		self.assertEqual(['Goofy'], [a['name'] for a in result['data']])
+		self.assertEqual(self.changeset, result['meta']['changeset'])
+
+
+	def test_changes_are_not_paginated(self):
+		for animal in Animal.objects.all():
+			self._put(animal, {'name': animal.name + '!'})
+
+		with mock.patch.object(AnimalView, 'limit_default', 2):
+			# The page would be full without changed_since
+			self.assertEqual(2, len(self._get({})['data']))
+
+			result = self._get({'changed_since': self.changeset})
+			self.assertEqual(3, len(result['data']))
+			self.assertEqual(3, result['meta']['total_records'])
+
+			result = self._get({'changed_since': result['meta']['changeset']})
+			self.assertEqual([], result['data'])
+
+		for params in [{'limit': 2}, {'offset': 1}, {'after': ''}]:
+			response = self.client.get('/animal/', data=dict(params, changed_since=self.changeset))
+			self.assertEqual(response.status_code, 418)
+
+		with mock.patch.object(AnimalView, 'limit_max', 2):
+			response = self.client.get('/animal/', data={'changed_since': self.changeset})
+			self.assertEqual(response.status_code, 418)
+			self.assertEqual('RequestError', jsonloads(response.content)['code'])
+
+			self._put(Animal.objects.get(name='Pluto!'), {'name': 'Goofy'})
+			result = self._get({'changed_since': Changeset.objects.latest('id').pk - 1})
+			self.assertEqual(['Goofy'], [a['name'] for a in result['data']])
+
+
+	def test_invalid_changed_since(self):
+		for path, params in [
+			('/animal/', {'changed_since': 'yesterday'}),
+			('/animal/{}/'.format(Animal.objects.get(name='Pluto').pk), {'changed_since': self.changeset}),
+			# Zoo has no history
+			('/zoo/', {'changed_since': self.changeset}),
+		]:
+			response = self.client.get(path, data=params)
+			self.assertEqual(response.status_code, 418)
+			self.assertEqual('RequestError', jsonloads(response.content)['code'])
@@ -0,0 +1,178 @@
+from unittest import mock
+
+from django.test import TestCase, Client
+from django.contrib.auth.models import User
+
+from binder.json import jsonloads
+from binder.views import ModelView, merge_tables, objs_to_table
+from .testapp.models import Animal, Caretaker, Costume, ContactPerson, Zoo
+from .testapp.views import AnimalView
+
+
+def table_to_objs(table):
+	return [dict(zip(table['fields'], row)) for row in table['rows']]
+
+
+class ColumnarFormatTest(TestCase):
+	def setUp(self):
+		super().setUp()
+		u = User(username='testuser', is_active=True, is_superuser=True)
+		u.set_password('test')
+		u.save()
+		self.client = Client()
+		r = self.client.login(username='testuser', password='test')
+		self.assertTrue(r)
+
+		self.artis = Zoo(name='Artis')
+		self.artis.save()
+		self.gaia = Zoo(name='GaiaZOO')
+		self.gaia.save()
+		contact = ContactPerson(name='Mr. Zoo')
+		contact.save()
+		self.artis.contacts.add(contact)
+
+		fabbby = Caretaker(name='fabbby')
+		fabbby.save()
+		pluto = Animal(name='Pluto', zoo=self.artis, caretaker=fabbby)
+		pluto.save()
+		Costume(animal=pluto, nickname='Goofy', description='Dog').save()
+		Animal(name='Scrooge McDuck', zoo=self.artis).save()
+		Animal(name='Mickey Mouse', zoo=self.gaia, caretaker=fabbby).save()
+
+
+	def _get(self, path, params):
+		response = self.client.get(path, data=params)
+		self.assertEqual(response.status_code, 200)
+		result = jsonloads(response.content)
+		del result['debug']['request_id']
+		return result
+
+
+	# Returns the regular response and the columnar response with its
+	# tables converted back to lists of objects
+	def _compare(self, path, params):
+		expected = self._get(path, params)
+		result = self._get(path, dict(params, format='columnar'))
+		self.assertEqual(set(expected['with']), set(result['with']))
+
+		converted = dict(result, data=table_to_objs(result['data']), **{
+			'with': {model_name: table_to_objs(table) for model_name, table in result['with'].items()},
+		})
+		self.assertEqual(expected, converted)
+		return result
+
+
+	def test_list_with_relations(self):
+		result = self._compare('/animal/', {'with': 'zoo.contacts,caretaker,costume', 'order_by': 'id'})
+		self.assertEqual(['Pluto', 'Scrooge McDuck', 'Mickey Mouse'], [row[result['data']['fields'].index('name')] for row in result['data']['rows']])
+		self.assertEqual(2, len(result['with']['zoo']['rows']))
+		self.assertEqual({'zoo': 'zoo', 'zoo.contacts': 'contact_person', 'caretaker': 'caretaker', 'costume': 'costume'}, result['with_mapping'])
+		self.assertEqual(3, result['meta']['total_records'])
+
+
+	def test_model_instances_and_m2m_fields(self):
+		# ZooView has a property, so it serializes model instances
+		result = self._compare('/zoo/', {'with': 'animals.caretaker', 'order_by': 'name'})
+		self.assertIn('animal_count', result['data']['fields'])
+		self.assertIn('contacts', result['data']['fields'])
+
+
+	def test_annotations_counts_and_fields(self):
+		self._compare('/zoo/', {'include_counts': 'animals', 'with': 'animals', 'order_by': 'id'})
+		self._compare('/caretaker/', {'include_annotations': 'best_animal', 'with': 'animals', 'order_by': 'id'})
+
+		result = self._compare('/animal/', {'fields': 'name,zoo(name)', 'with': 'zoo', 'order_by': 'id'})
+		self.assertEqual(['id', 'name', 'zoo'], sorted(result['data']['fields']))
+		self.assertEqual(['id', 'name'], sorted(result['with']['zoo']['fields']))
+
+
+	def assertColumnsUnique(self, result):
+		for table in [result['data'], *result['with'].values()]:
+			self.assertEqual(len(set(table['fields'])), len(table['fields']), table['fields'])
+			for row in table['rows']:
+				self.assertEqual(len(table['fields']), len(row))
+
+
+	def test_with_on_fk_and_m2m_field_columns(self):
+		result = self._compare('/animal/', {'with': 'zoo.contacts', 'order_by': 'id'})
+		self.assertColumnsUnique(result)
+
+		result = self._compare('/zoo/', {'with': 'contacts', 'order_by': 'id'})
+		self.assertColumnsUnique(result)
+		contacts = [row[result['data']['fields'].index('contacts')] for row in result['data']['rows']]
+		self.assertEqual([[self.artis.contacts.get().pk], []], contacts)
+
+
+	def test_with_limit_replaces_m2m_field_column(self):
+		other = ContactPerson(name='Mrs. Zoo')
+		other.save()
+		self.artis.contacts.add(other)
+
+		result = self._compare('/zoo/', {'with': 'contacts', 'with_limit': 'contacts:1', 'order_by': 'id'})
+		self.assertColumnsUnique(result)
+		artis = result['data']['rows'][0]
+		self.assertEqual(1, len(artis[result['data']['fields'].index('contacts')]))
+
+
+	def test_empty_list(self):
+		result = self._compare('/animal/', {'.name': 'Donald Duck', 'with': 'zoo'})
+		self.assertEqual([], result['data']['rows'])
+		self.assertEqual({'fields': [], 'rows': []}, result['with']['zoo'])
+
+
+	def test_keyset_pagination(self):
+		result = self._get('/animal/', {'format': 'columnar', 'order_by': 'name', 'limit': 2, 'after': ''})
+		self.assertEqual(['Mickey Mouse', 'Pluto'], [row[result['data']['fields'].index('name')] for row in result['data']['rows']])
+
+		result = self._get('/animal/', {'format': 'columnar', 'order_by': 'name', 'limit': 2, 'after': result['meta']['next_cursor']})
+		self.assertEqual(['Scrooge McDuck'], [row[result['data']['fields'].index('name')] for row in result['data']['rows']])
+		self.assertIsNone(result['meta']['next_cursor'])
+
+
+	def test_rows_are_not_built_from_dicts(self):
+		with mock.patch.object(AnimalView, '_serialize_instances') as serialize_instances, mock.patch('binder.views.objs_to_table') as to_table:
+			self._get('/animal/', {'format': 'columnar', 'with': 'caretaker'})
+		serialize_instances.assert_not_called()
+		to_table.assert_not_called()
+
+
+	def test_views_overriding_get_objs_are_converted(self):
+		def _get_objs(view, queryset, request, annotations=None, fields=None):
+			objs = ModelView._get_objs(view, queryset, request, annotations, fields)
+			for obj in objs:
+				obj['name'] = obj['name'].upper()
+			return objs
+
+		with mock.patch.object(AnimalView, '_get_objs', _get_objs):
+			result = self._compare('/animal/', {'order_by': 'id'})
+		self.assertIn('PLUTO', [row[result['data']['fields'].index('name')] for row in result['data']['rows']])
+
+
+	def test_streaming_views_are_not_streamed(self):
+		with mock.patch.object(AnimalView, 'streaming', True):
+			response = self.client.get('/animal/', data={'format': 'columnar'})
+		self.assertEqual(response.status_code, 200)
+		self.assertFalse(response.streaming)
+		self.assertEqual(3, len(jsonloads(response.content)['data']['rows']))
+
+
+	def test_invalid_format(self):
+		response = self.client.get('/animal/', data={'format': 'csv'})
+		self.assertEqual(response.status_code, 418)
+		self.assertEqual('RequestError', jsonloads(response.content)['code'])
+
+		response = self.client.get('/animal/{}/'.format(Animal.objects.get(name='Pluto').pk), data={'format': 'columnar'})
+		self.assertEqual(response.status_code, 418)
+		self.assertEqual('RequestError', jsonloads(response.content)['code'])
+
+
+	def test_merge_tables(self):
+		tables = [
+			objs_to_table([{'id': 1, 'name': 'a'}, {'id': 2, 'name': 'b', 'extra': True}]),
+			{'fields': ['id', 'other'], 'rows': [[3, 'c']]},
+		]
+		self.assertEqual({'fields': ['id', 'name', 'extra'], 'rows': [[1, 'a', None], [2, 'b', True]]}, tables[0])
+		self.assertEqual({
+			'fields': ['id', 'name', 'extra', 'other'],
+			'rows': [[1, 'a', None, None], [2, 'b', True, None], [3, None, None, 'c']],
+		}, merge_tables(tables))
@@ -0,0 +1,204 @@
+from unittest import mock
+
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count, F
+
+from binder.json import jsonloads
+from binder.views import strip_unused_annotations
+from .testapp.models import Animal, Caretaker, Zoo
+from .testapp.views import AnimalView
+
+
+class CountStrategyTest(TestCase):
+	def setUp(self):
+		super().setUp()
+		u = User(username='testuser', is_active=True, is_superuser=True)
+		u.set_password('test')
+		u.save()
+		self.client = Client()
+		r = self.client.login(username='testuser', password='test')
+		self.assertTrue(r)
+
+		self.artis = Zoo(name='Artis')
+		self.artis.save()
+		for name in ['Pluto', 'Scrooge McDuck', 'Mickey Mouse']:
+			Animal(name=name, zoo=self.artis).save()
+
+		cache.clear()
+
+
+	def _get_meta(self, params):
+		response = self.client.get('/animal/', data=params)
+		self.assertEqual(response.status_code, 200)
+		return jsonloads(response.content)['meta']
+
+
+	def test_exact_by_default(self):
+		meta = self._get_meta({})
+		self.assertEqual(3, meta['total_records'])
+		self.assertEqual('exact', meta['total_records_strategy'])
+
+		meta = self._get_meta({'include_meta': ''})
+		self.assertNotIn('total_records', meta)
+		self.assertNotIn('total_records_strategy', meta)
+
+
+	def test_capped(self):
+		with mock.patch.object(AnimalView, 'count_cap', 2):
+			meta = self._get_meta({'count_strategy': 'capped'})
+			self.assertEqual(2, meta['total_records'])
+			self.assertEqual('capped', meta['total_records_strategy'])
+
+			# Below the cap, the count is exact
+			meta = self._get_meta({'count_strategy': 'capped', '.name:startswith': 'M'})
+			self.assertEqual(1, meta['total_records'])
+			self.assertEqual('exact', meta['total_records_strategy'])
+
+		with mock.patch.object(AnimalView, 'count_cap', 3):
+			meta = self._get_meta({'count_strategy': 'capped'})
+			self.assertEqual(3, meta['total_records'])
+			self.assertEqual('exact', meta['total_records_strategy'])
+
+
+	def test_estimate(self):
+		with mock.patch.object(AnimalView, 'count_estimate_threshold', 0):
+			meta = self._get_meta({'count_strategy': 'estimate'})
+			self.assertIsInstance(meta['total_records'], int)
+			self.assertEqual('estimate', meta['total_records_strategy'])
+
+		# Small estimates are replaced by an exact count
+		meta = self._get_meta({'count_strategy': 'estimate'})
+		self.assertEqual(3, meta['total_records'])
+		self.assertEqual('exact', meta['total_records_strategy'])
+
+
+	def test_cached(self):
+		meta = self._get_meta({'count_strategy': 'cached'})
+		self.assertEqual(3, meta['total_records'])
+		self.assertEqual('exact', meta['total_records_strategy'])
+
+		Animal(name='Donald Duck', zoo=self.artis).save()
+
+		meta = self._get_meta({'count_strategy': 'cached'})
+		self.assertEqual(3, meta['total_records'])
+		self.assertEqual('cached', meta['total_records_strategy'])
+
+		# Different filters are counted separately
+		meta = self._get_meta({'count_strategy': 'cached', '.name:endswith': 'Duck'})
+		self.assertEqual(2, meta['total_records'])
+		self.assertEqual('exact', meta['total_records_strategy'])
+
+		meta = self._get_meta({'count_strategy': 'exact'})
+		self.assertEqual(4, meta['total_records'])
+
+
+	def test_view_default_strategy(self):
+		with mock.patch.object(AnimalView, 'count_strategy', 'capped'), mock.patch.object(AnimalView, 'count_cap', 1):
+			meta = self._get_meta({})
+			self.assertEqual(1, meta['total_records'])
+			self.assertEqual('capped', meta['total_records_strategy'])
+
+			meta = self._get_meta({'count_strategy': 'exact'})
+			self.assertEqual(3, meta['total_records'])
+
+
+	def test_invalid_strategy(self):
+		response = self.client.get('/animal/', data={'count_strategy': 'guess'})
+		self.assertEqual(response.status_code, 418)
+		self.assertEqual('RequestError', jsonloads(response.content)['code'])
+
+
+
+class CountQueryTest(TestCase):
+	def setUp(self):
+		super().setUp()
+		u = User(username='testuser', is_active=True, is_superuser=True)
+		u.set_password('test')
+		u.save()
+		self.client = Client()
+		r = self.client.login(username='testuser', password='test')
+		self.assertTrue(r)
+
+		artis = Zoo(name='Artis')
+		artis.save()
+		fabbby = Caretaker(name='fabbby', ssn='12345')
+		fabbby.save()
+		Caretaker(name='door', ssn='67890').save()
+		Animal(name='Pluto', zoo=artis, caretaker=fabbby).save()
+		Animal(name='Stitch', zoo=artis, caretaker=fabbby).save()
+
+
+	# Returns the total_records and the SQL of the query counting them
+	def _get_count(self, path, params):
+		with CaptureQueriesContext(connection) as queries:
+			response = self.client.get(path, data=dict(params, limit=0))
+		self.assertEqual(response.status_code, 200)
+		count_queries = [q['sql'] for q in queries.captured_queries if 'COUNT(*)' in q['sql']]
+		self.assertEqual(1, len(count_queries))
+		return jsonloads(response.content)['meta']['total_records'], count_queries[0]
+
+
+	def _get_sql(self, queryset):
+		with CaptureQueriesContext(connection) as queries:
+			queryset.count()
+		return queries.captured_queries[0]['sql']
+
+
+	def test_unused_annotations_and_ordering_are_dropped(self):
+		count, sql = self._get_count('/caretaker/', {'.name': 'fabbby', 'order_by': 'animal_count'})
+		self.assertEqual(1, count)
+		self.assertEqual(self._get_sql(Caretaker.objects.filter(name='fabbby')), sql)
+
+
+	def test_annotations_filtered_on_are_inlined(self):
+		count, sql = self._get_count('/caretaker/', {'.bsn': '12345'})
+		self.assertEqual(1, count)
+		self.assertEqual(self._get_sql(Caretaker.objects.filter(ssn='12345')), sql)
+
+
+	def test_aggregates_filtered_on_count_over_pk_subquery(self):
+		count, sql = self._get_count('/caretaker/', {'.animal_count:gt': '0'})
+		self.assertEqual(1, count)
+		expected = Caretaker.objects.annotate(animal_count=Count('animals')).filter(animal_count__gt=0).values('pk')
+		self.assertEqual(self._get_sql(expected), sql)
+		self.assertIn('GROUP BY', sql)
+		self.assertNotIn('MAX(', sql)
+
+
+	def test_joins_needed_by_filters_are_kept(self):
+		count, sql = self._get_count('/animal/', {'.zoo.name': 'Artis', 'include_annotations': 'prefixed_name'})
+		self.assertEqual(2, count)
+		self.assertEqual(self._get_sql(Animal.objects.filter(deleted=False).filter(zoo__name='Artis')), sql)
+
+
+	def test_strip_unused_annotations(self):
+		queryset = Animal.objects.annotate(zoo_name=F('zoo__name'), caretaker_name=F('caretaker__name')).filter(caretaker_name='fabbby')
+		self.assertTrue(strip_unused_annotations(queryset.query))
+		self.assertEqual({}, queryset.query.annotations)
+		self.assertEqual(2, queryset.count())
+		self.assertNotIn('testapp_zoo', str(queryset.query))
+
+		# Nothing to strip
+		queryset = Caretaker.objects.annotate(animal_count=Count('animals')).filter(animal_count=2)
+		self.assertFalse(strip_unused_annotations(queryset.query))
+		self.assertFalse(strip_unused_annotations(Caretaker.objects.all().query))
+
+
+	def test_to_many_annotations_are_kept(self):
+		Zoo(name='Burgers').save()
+
+		# Artis comes back once for each of its two animals, and Burgers
+		# once without
+		queryset = Zoo.objects.annotate(animal_name=F('animals__name'), name_copy=F('name'))
+		self.assertEqual(3, queryset.count())
+		self.assertTrue(strip_unused_annotations(queryset.query))
+		self.assertEqual({'animal_name'}, set(queryset.query.annotations))
+		self.assertEqual(3, queryset.count())
+		self.assertEqual(3, len(queryset.values('id')))
+
+		queryset = Zoo.objects.annotate(animal_name=F('animals__name'))
+		self.assertFalse(strip_unused_annotations(queryset.query))
@@ -0,0 +1,197 @@
+from unittest import mock
+
+from django.test import SimpleTestCase, Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.contrib.auth.models import Group, Permission, User
+from django.db import connection, transaction
+
+from binder import versions
+from binder.history import Changeset
+from binder.json import jsonloads
+from .testapp.models import Animal, Caretaker, ContactPerson, Zoo
+from .testapp.views import AnimalView, CountryView, ZooView
+
+
+# The versions are bumped when transactions commit, which never happens
+# in a TestCase.  So this uses committed data, which is cleaned up
+# afterwards.
+@mock.patch.object(AnimalView, 'etags', True)
+@mock.patch.object(ZooView, 'etags', True)
+class ETagTest(SimpleTestCase):
+	databases = {'default'}
+
+	def setUp(self):
+		super().setUp()
+		self.user = User(username='testuser_etags', is_active=True, is_superuser=True)
+		self.user.set_password('test')
+		self.user.save()
+		self.client = Client()
+		r = self.client.login(username='testuser_etags', password='test')
+		self.assertTrue(r)
+
+		self.artis = Zoo.objects.create(name='Artis')
+		self.fabbby = Caretaker.objects.create(name='fabbby')
+		self.contact = ContactPerson.objects.create(name='Mr. Zoo')
+		self.pluto = Animal.objects.create(name='Pluto', zoo=self.artis, caretaker=self.fabbby)
+
+
+	def tearDown(self):
+		Changeset.objects.filter(user=self.user).delete()
+		self.artis.delete()
+		self.fabbby.delete()
+		self.contact.delete()
+		self.user.delete()
+		super().tearDown()
+
+
+	def _get(self, path, params={}, etag=None):
+		headers = {} if etag is None else {'HTTP_IF_NONE_MATCH': etag}
+		return self.client.get(path, data=params, **headers)
+
+
+	def _get_etag(self, path, params={}):
+		response = self._get(path, params)
+		self.assertEqual(response.status_code, 200)
+		return response['ETag']
+
+
+	def test_not_modified(self):
+		response = self._get('/animal/', {'with': 'zoo'})
+		self.assertEqual(response.status_code, 200)
+		etag = response['ETag']
+		self.assertTrue(etag.startswith('W/"'))
+
+		with CaptureQueriesContext(connection) as queries:
+			response = self._get('/animal/', {'with': 'zoo'}, etag=etag)
+		self.assertEqual(response.status_code, 304)
+		self.assertEqual(etag, response['ETag'])
+		self.assertEqual(b'', response.content)
+		self.assertEqual([], [q['sql'] for q in queries.captured_queries if 'testapp_' in q['sql']])
+
+		# Weak comparison, and lists of ETags
+		self.assertEqual(304, self._get('/animal/', {'with': 'zoo'}, etag=etag[2:]).status_code)
+		self.assertEqual(304, self._get('/animal/', {'with': 'zoo'}, etag='W/"foo", ' + etag).status_code)
+		self.assertEqual(200, self._get('/animal/', {'with': 'zoo'}, etag='W/"foo"').status_code)
+
+		# Detail GETs too
+		etag = self._get_etag('/animal/{}/'.format(self.pluto.pk))
+		self.assertEqual(304, self._get('/animal/{}/'.format(self.pluto.pk), etag=etag).status_code)
+
+
+	def test_etag_depends_on_query_and_user(self):
+		etag = self._get_etag('/animal/')
+		self.assertEqual(etag, self._get_etag('/animal/'))
+		self.assertNotEqual(etag, self._get_etag('/animal/', {'order_by': 'name'}))
+		self.assertNotEqual(etag, self._get_etag('/animal/{}/'.format(self.pluto.pk)))
+
+		other = User(username='testuser_etags2', is_active=True, is_superuser=True)
+		other.set_password('test')
+		other.save()
+		try:
+			self.client.login(username='testuser_etags2', password='test')
+			self.assertEqual(200, self._get('/animal/', etag=etag).status_code)
+		finally:
+			other.delete()
+
+
+	@override_settings(BINDER_PERMISSION={
+		'default': [],
+		'testapp.view_country': [('testapp.view_country', 'all')],
+	})
+	def test_revoked_permissions_give_no_304(self):
+		user = User(username='testuser_etags_perms', is_active=True, is_superuser=False)
+		user.set_password('test')
+		user.save()
+		permission = Permission.objects.create(codename='etag_test_country', name='ETag test', content_type=Permission.objects.get(codename='view_country').content_type)
+		try:
+			group = Group.objects.get(name='admin')
+			user.groups.add(group)
+			self.client.login(username='testuser_etags_perms', password='test')
+
+			with mock.patch.object(CountryView, 'etags', True):
+				etag = self._get_etag('/country/')
+				self.assertEqual(304, self._get('/country/', etag=etag).status_code)
+
+				# Other permissions may change the scoping
+				user.user_permissions.add(permission)
+				self.assertEqual(200, self._get('/country/', etag=etag).status_code)
+				etag = self._get_etag('/country/')
+
+				user.groups.remove(group)
+				self.assertEqual(403, self._get('/country/', etag=etag).status_code)
+		finally:
+			user.delete()
+			permission.delete()
+
+
+	def test_changes_give_new_etag(self):
+		etag = self._get_etag('/animal/')
+		pluto = Animal.objects.get(pk=self.pluto.pk)
+		pluto.name = 'Goofy'
+		pluto.save()
+		response = self._get('/animal/', etag=etag)
+		self.assertEqual(200, response.status_code)
+		self.assertEqual(['Goofy'], [a['name'] for a in jsonloads(response.content)['data']])
+
+		# Through the API as well
+		etag = response['ETag']
+		response = self.client.put('/animal/{}/'.format(self.pluto.pk), data='{"name": "Pluto"}', content_type='application/json')
+		self.assertEqual(200, response.status_code)
+		self.assertEqual(200, self._get('/animal/', etag=etag).status_code)
+
+
+	def test_changes_of_withs_give_new_etag(self):
+		etag = self._get_etag('/zoo/', {'with': 'animals.caretaker'})
+		plain_etag = self._get_etag('/zoo/')
+
+		fabbby = Caretaker.objects.get(pk=self.fabbby.pk)
+		fabbby.name = 'door'
+		fabbby.save()
+		self.assertEqual(200, self._get('/zoo/', {'with': 'animals.caretaker'}, etag=etag).status_code)
+		# Caretakers aren't related to zoos directly
+		self.assertEqual(304, self._get('/zoo/', etag=plain_etag).status_code)
+
+
+	def test_m2m_changes_give_new_etag(self):
+		etag = self._get_etag('/zoo/')
+		self.artis.contacts.add(self.contact)
+		response = self._get('/zoo/', etag=etag)
+		self.assertEqual(200, response.status_code)
+		self.assertEqual([[self.contact.pk]], [z['contacts'] for z in jsonloads(response.content)['data']])
+
+
+	def test_versions_are_bumped_on_commit(self):
+		version = versions.get_versions([Zoo])[Zoo]
+		with transaction.atomic():
+			Zoo.objects.create(name='Burgers Zoo')
+			Zoo.objects.filter(name='Burgers Zoo').delete()
+			self.assertEqual(version, versions.get_versions([Zoo])[Zoo])
+		self.assertEqual(version + 1, versions.get_versions([Zoo])[Zoo])
+
+		# Rolled back changes don't count
+		with transaction.atomic():
+			Zoo.objects.create(name='Burgers Zoo')
+			transaction.set_rollback(True)
+		self.assertEqual(version + 1, versions.get_versions([Zoo])[Zoo])
+
+		# Nor do those in a rolled back savepoint, but the ones outside it do
+		with transaction.atomic():
+			try:
+				with transaction.atomic():
+					Zoo.objects.create(name='Burgers Zoo')
+					raise ValueError()
+			except ValueError:
+				pass
+			self.assertEqual(0, len(connection.run_on_commit))
+			Zoo.objects.create(name='Burgers Zoo')
+			Zoo.objects.filter(name='Burgers Zoo').delete()
+			# Only bumped once
+			self.assertEqual(1, len(connection.run_on_commit))
+		self.assertEqual(version + 2, versions.get_versions([Zoo])[Zoo])
+
+
+	def test_no_etags_by_default(self):
+		with mock.patch.object(AnimalView, 'etags', False):
+			response = self._get('/animal/')
+		self.assertEqual(200, response.status_code)
+		self.assertNotIn('ETag', response)
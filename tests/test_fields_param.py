@@ -0,0 +1,145 @@
+import datetime
+from unittest import mock
+
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth.models import User
+from django.db import connection
+
+from binder.json import jsonloads
+from .testapp.models import Animal, Caretaker, ContactPerson, Zoo
+from .testapp.views import ZooView
+
+
+class FieldsParamTest(TestCase):
+	def setUp(self):
+		super().setUp()
+		u = User(username='testuser', is_active=True, is_superuser=True)
+		u.set_password('test')
+		u.save()
+		self.client = Client()
+		r = self.client.login(username='testuser', password='test')
+		self.assertTrue(r)
+
+		self.artis = Zoo(name='Artis')
+		self.artis.save()
+		self.contact = ContactPerson(name='Mr. Zoo')
+		self.contact.save()
+		self.artis.contacts.add(self.contact)
+
+		self.fabbby = Caretaker(name='fabbby')
+		self.fabbby.save()
+		self.door = Caretaker(name='door')
+		self.door.save()
+		self.pluto = Animal(name='Pluto', zoo=self.artis, caretaker=self.fabbby)
+		self.pluto.save()
+		Animal(name='Stitch', zoo=self.artis, caretaker=self.fabbby).save()
+		Animal(name='Mickey Mouse', zoo=self.artis, caretaker=self.door).save()
+
+
+	def _get(self, path, params):
+		with CaptureQueriesContext(connection) as queries:
+			response = self.client.get(path, data=params)
+		self.assertEqual(response.status_code, 200)
+		return jsonloads(response.content), [q['sql'] for q in queries.captured_queries]
+
+
+	def test_top_level_fields(self):
+		result, queries = self._get('/zoo/', {'fields': 'name,contacts'})
+		self.assertEqual([{'id': self.artis.pk, 'name': 'Artis', 'contacts': [self.contact.pk]}], result['data'])
+
+		# No queries for the other m2m_fields or the animal_count property
+		_, all_queries = self._get('/zoo/', {})
+		self.assertLess(len(queries), len(all_queries))
+		self.assertFalse(any('testapp_zooemployee' in q for q in queries))
+
+
+	def test_instances_only_load_requested_fields(self):
+		# Zoo has BinderFileFields, so ZooView serializes model instances
+		result, queries = self._get('/zoo/', {'fields': 'name,binder_picture'})
+		self.assertEqual([{'id': self.artis.pk, 'name': 'Artis', 'binder_picture': None}], result['data'])
+		zoo_queries = [q for q in queries if q.startswith('SELECT') and 'FROM "testapp_zoo"' in q and 'COUNT(' not in q]
+		self.assertTrue(zoo_queries)
+		self.assertFalse(any('"floor_plan"' in q or '"founding_date"' in q for q in zoo_queries))
+
+		_, queries = self._get('/zoo/', {})
+		self.assertTrue(any('"floor_plan"' in q for q in queries))
+
+
+	def test_properties_do_not_load_fields_per_record(self):
+		self.artis.founding_date = datetime.date(1838, 5, 1)
+		self.artis.save()
+		founding_year = property(lambda zoo: zoo.founding_date and zoo.founding_date.year)
+		with mock.patch.object(Zoo, 'founding_year', founding_year, create=True), \
+				mock.patch.object(ZooView, 'shown_properties', ['animal_count', 'founding_year']), \
+				mock.patch.object(ZooView, '_compiled_serialization_plan', None):
+			result, queries = self._get('/zoo/', {'fields': 'name,founding_year'})
+			self.assertEqual([{'id': self.artis.pk, 'name': 'Artis', 'founding_year': 1838}], result['data'])
+
+			for name in ['Burgers', 'GaiaZOO', 'Emmen']:
+				Zoo(name=name).save()
+			with self.assertNumQueries(len(queries)):
+				result, _ = self._get('/zoo/', {'fields': 'name,founding_year'})
+			self.assertEqual(4, len(result['data']))
+
+
+	def test_unrequested_annotations_are_not_computed(self):
+		result, queries = self._get('/caretaker/', {'fields': 'name,animal_count', 'order_by': 'name'})
+		self.assertEqual([
+			{'id': self.door.pk, 'name': 'door', 'animal_count': 1},
+			{'id': self.fabbby.pk, 'name': 'fabbby', 'animal_count': 2},
+		], result['data'])
+		self.assertFalse(any('MAX(' in q for q in queries))
+
+		result, queries = self._get('/caretaker/', {'fields': 'name', 'order_by': 'name'})
+		self.assertEqual([{'id': self.door.pk, 'name': 'door'}, {'id': self.fabbby.pk, 'name': 'fabbby'}], result['data'])
+		self.assertFalse(any('testapp_animal' in q for q in queries if 'COUNT(*)' not in q))
+
+
+	def test_filter_and_order_on_annotations_which_are_not_requested(self):
+		result, _ = self._get('/caretaker/', {'fields': 'name', 'order_by': '-animal_count'})
+		self.assertEqual(['fabbby', 'door'], [c['name'] for c in result['data']])
+
+		result, _ = self._get('/caretaker/', {'fields': 'name', '.animal_count:gt': '1'})
+		self.assertEqual([{'id': self.fabbby.pk, 'name': 'fabbby'}], result['data'])
+
+
+	def test_with_fields(self):
+		result, _ = self._get('/animal/{}/'.format(self.pluto.pk), {
+			'with': 'zoo,caretaker',
+			'fields': 'name,zoo(name),caretaker.animal_count',
+		})
+		self.assertEqual({'id': self.pluto.pk, 'name': 'Pluto', 'zoo': self.artis.pk, 'caretaker': self.fabbby.pk}, result['data'])
+		self.assertEqual([{'id': self.artis.pk, 'name': 'Artis'}], result['with']['zoo'])
+		self.assertEqual([{'id': self.fabbby.pk, 'animal_count': 2}], result['with']['caretaker'])
+
+
+	def test_fields_of_withs_to_the_same_model_are_combined(self):
+		result, _ = self._get('/animal/{}/'.format(self.pluto.pk), {
+			'with': 'caretaker,zoo.animals',
+			'fields': 'caretaker(name),zoo.animals(name)',
+		})
+		animals = {a['id']: a for a in result['with']['animal']}
+		self.assertEqual(3, len(animals))
+		self.assertEqual({'id', 'name'}, set(animals[self.pluto.pk]))
+		self.assertEqual({'id', 'name'}, set(result['with']['caretaker'][0]))
+
+		result, _ = self._get('/animal/{}/'.format(self.pluto.pk), {
+			'with': 'zoo.animals,caretaker.animals',
+			'fields': 'zoo.animals(name)',
+		})
+		# All fields, because caretaker.animals doesn't restrict them
+		self.assertIn('caretaker', result['with']['animal'][0])
+
+
+	def test_hidden_and_unknown_fields(self):
+		for params in [
+			{'fields': 'ssn'},
+			{'fields': 'nonexistent'},
+			{'fields': 'animals(nonexistent)'},
+			{'fields': 'lions(name)'},
+			{'fields': 'animals(name'},
+		]:
+			response = self.client.get('/caretaker/', data=params)
+			self.assertEqual(response.status_code, 418, params)
+			self.assertEqual('RequestError', jsonloads(response.content)['code'])
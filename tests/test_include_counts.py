@@ -0,0 +1,100 @@
+from unittest import mock
+
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth.models import User
+from django.db import connection
+
+from binder.json import jsonloads
+from .testapp.models import Animal, ContactPerson, Zoo
+from .testapp.views import ZooView
+
+
+class IncludeCountsTest(TestCase):
+	def setUp(self):
+		super().setUp()
+		u = User(username='testuser', is_active=True, is_superuser=True)
+		u.set_password('test')
+		u.save()
+		self.client = Client()
+		r = self.client.login(username='testuser', password='test')
+		self.assertTrue(r)
+
+		self.artis = Zoo(name='Artis')
+		self.artis.save()
+		self.gaia = Zoo(name='GaiaZOO')
+		self.gaia.save()
+		self.burgers = Zoo(name='Burgers Zoo')
+		self.burgers.save()
+
+		for name in ['Pluto', 'Scrooge McDuck', 'Stitch']:
+			Animal(name=name, zoo=self.artis).save()
+		Animal(name='Mickey Mouse', zoo=self.gaia).save()
+
+		for name in ['Mr. Zoo', 'Mrs. Zoo']:
+			contact = ContactPerson(name=name)
+			contact.save()
+			self.artis.contacts.add(contact)
+		self.gaia.contacts.add(contact)
+
+
+	def _get(self, path, params):
+		response = self.client.get(path, data=params)
+		self.assertEqual(response.status_code, 200)
+		return jsonloads(response.content)
+
+
+	def test_include_counts(self):
+		with CaptureQueriesContext(connection) as without_counts:
+			self._get('/zoo/', {'order_by': 'id'})
+		with CaptureQueriesContext(connection) as with_counts:
+			result = self._get('/zoo/', {'include_counts': 'animals,contacts', 'order_by': 'id'})
+
+		self.assertEqual([
+			{'animals': 3, 'contacts': 2},
+			{'animals': 1, 'contacts': 1},
+			{'animals': 0, 'contacts': 0},
+		], [zoo['_meta']['counts'] for zoo in result['data']])
+		# All counts in one query
+		self.assertEqual(len(without_counts) + 1, len(with_counts))
+		# No ids were fetched for the counts
+		self.assertEqual({}, result['with'])
+
+
+	def test_include_counts_on_detail(self):
+		result = self._get('/zoo/{}/'.format(self.artis.pk), {'include_counts': 'animals'})
+		self.assertEqual({'animals': 3}, result['data']['_meta']['counts'])
+
+
+	def test_include_counts_with_where(self):
+		result = self._get('/zoo/', {'include_counts': 'animals', 'where': 'animals(name:startswith=S)', 'order_by': 'id'})
+		self.assertEqual([2, 0, 0], [zoo['_meta']['counts']['animals'] for zoo in result['data']])
+
+		# The where is for both the counts and the withs
+		result = self._get('/zoo/{}/'.format(self.artis.pk), {
+			'include_counts': 'animals',
+			'with': 'animals',
+			'where': 'animals(name:startswith=S)',
+		})
+		self.assertEqual({'animals': 2}, result['data']['_meta']['counts'])
+		self.assertEqual(2, len(result['with']['animal']))
+
+
+	def test_include_counts_when_streaming(self):
+		with mock.patch.object(ZooView, 'streaming', True):
+			response = self.client.get('/zoo/', data={'include_counts': 'animals', 'order_by': 'id'})
+		self.assertEqual(response.status_code, 200)
+		result = jsonloads(b''.join(response.streaming_content))
+		self.assertEqual([3, 1, 0], [zoo['_meta']['counts']['animals'] for zoo in result['data']])
+
+
+	def test_invalid_include_counts(self):
+		for path, params in [
+			('/zoo/', {'include_counts': 'visitors'}),
+			('/zoo/', {'include_counts': 'name'}),
+			('/animal/', {'include_counts': 'zoo'}),
+			('/zoo/', {'include_counts': 'animals', 'where': 'contacts(name=Mr. Zoo)'}),
+		]:
+			response = self.client.get(path, data=params)
+			self.assertEqual(response.status_code, 418, params)
+			self.assertEqual('RequestError', jsonloads(response.content)['code'])
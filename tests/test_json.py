@@ -1,11 +1,16 @@
 import json as python_core_json
 
-from datetime import datetime, date, timezone
+from datetime import datetime, date, time, timedelta, timezone
 from uuid import UUID
 from decimal import Decimal
-from django.test import TestCase
+from unittest import skipUnless
+from django.test import TestCase, Client, override_settings
+from django.contrib.auth.models import User
 
 import binder.json as binder_json
+from binder.exceptions import BinderRequestError
+from binder.json import jsonloads, orjson
+from .testapp.models import Animal, Caretaker, Zoo
 
 class JsonTest(TestCase):
 	def test_json_datetimes_dump_and_load_correctly(self):
@@ -72,3 +77,105 @@ class JsonTest(TestCase):
 	def test_decimals_dump_correctly(self):
 		u = Decimal('1.1')
 		self.assertEqual('["1.1"]', binder_json.jsondumps([u]))
+
+
+	def test_datetimes_are_formatted_like_strftime(self):
+		offsets = [None, timedelta(0), timedelta(hours=2), timedelta(hours=-5, minutes=-30), timedelta(hours=-1, seconds=-15), timedelta(minutes=1, microseconds=5)]
+		for offset in offsets:
+			tzinfo = timezone(offset) if offset is not None else None
+			for t in [datetime(2016, 1, 1, 1, 2, 3, 313337), datetime(9999, 12, 31, 23, 59, 59), datetime(999, 2, 3, 4, 5, 6, 7), datetime(1, 1, 1)]:
+				t = t.replace(tzinfo=tzinfo)
+				self.assertEqual(t.strftime('%Y-%m-%dT%H:%M:%S.%f%z'), binder_json.format_datetime(t))
+
+
+	def test_serializers_are_found_for_subclasses(self):
+		class MyDecimal(Decimal):
+			pass
+
+		self.assertEqual('["1.1"]', binder_json.jsondumps([MyDecimal('1.1')]))
+
+		binder_json.SERIALIZERS[MyDecimal] = lambda v: 'my ' + str(v)
+		try:
+			self.assertEqual('["my 1.1", "1.2"]', binder_json.jsondumps([MyDecimal('1.1'), Decimal('1.2')]))
+		finally:
+			del binder_json.SERIALIZERS[MyDecimal]
+		self.assertEqual('["1.1"]', binder_json.jsondumps([MyDecimal('1.1')]))
+
+
+	def test_unserializable_values_raise_type_error(self):
+		with self.assertRaises(TypeError):
+			binder_json.jsondumps([object()])
+
+
+	def test_invalid_json_raises_request_error(self):
+		with self.assertRaises(BinderRequestError):
+			binder_json.jsonloads(b'{"foo": ')
+		with self.assertRaises(BinderRequestError):
+			binder_json.jsonloads(b'\xff')
+
+
+
+@skipUnless(orjson, 'orjson is not installed')
+@override_settings(BINDER_JSON_BACKEND='orjson')
+class OrjsonBackendTest(TestCase):
+	def setUp(self):
+		super().setUp()
+		u = User(username='testuser', is_active=True, is_superuser=True)
+		u.set_password('test')
+		u.save()
+		self.client = Client()
+		r = self.client.login(username='testuser', password='test')
+		self.assertTrue(r)
+
+
+	def _compact(self, o):
+		return python_core_json.dumps(o, default=binder_json.default, separators=(',', ':'), ensure_ascii=False).encode()
+
+
+	def test_values_are_formatted_identically(self):
+		data = {
+			'datetime': datetime(2016, 1, 1, 1, 2, 3, tzinfo=timezone(timedelta(hours=2))),
+			'naive_datetime': datetime(2016, 1, 1, 1, 2, 3, 313337),
+			'date': date(1998, 2, 3),
+			'time': time(1, 2, 3, 4),
+			'uuid': UUID('{12345678-1234-5678-1234-567812345678}'),
+			'decimal': Decimal('1.10'),
+			'set': {1},
+			'nested': [{'text': 'Ünïcödé', 'float': 1.5, 'none': None, 'bool': True}],
+			1: 'int key',
+		}
+		self.assertEqual(self._compact(data), binder_json.get_backend().dumpb(data, binder_json.default))
+		self.assertEqual(self._compact(data).decode(), binder_json.jsondumps(data))
+
+
+	def test_falls_back_for_what_orjson_cannot_encode(self):
+		self.assertEqual('[1180591620717411303424]', binder_json.jsondumps([2 ** 70]))
+		self.assertEqual('[\n  1\n]', binder_json.jsondumps([1], indent=2))
+		with self.assertRaisesRegex(TypeError, 'is not JSON serializable'):
+			binder_json.jsondumps([object()])
+
+
+	def test_invalid_json_raises_request_error(self):
+		self.assertEqual({'foo': [1]}, binder_json.jsonloads(b'{"foo": [1]}'))
+		with self.assertRaises(BinderRequestError):
+			binder_json.jsonloads(b'{"foo": ')
+
+
+	def test_responses_are_identical(self):
+		artis = Zoo.objects.create(name='Artis', founding_date=date(1838, 5, 1))
+		fabbby = Caretaker.objects.create(name='fabbby', last_seen=datetime(2016, 1, 1, 1, 2, 3, 313337, tzinfo=timezone.utc))
+		Animal.objects.create(name='Pluto', zoo=artis, caretaker=fabbby)
+
+		response = self.client.get('/animal/', data={'with': 'zoo,caretaker'})
+		self.assertEqual(response.status_code, 200)
+		result = jsonloads(response.content)
+
+		with override_settings(BINDER_JSON_BACKEND='json'):
+			response = self.client.get('/animal/', data={'with': 'zoo,caretaker'})
+		self.assertEqual(response.status_code, 200)
+		expected = jsonloads(response.content)
+
+		del result['debug']['request_id']
+		del expected['debug']['request_id']
+		self.assertEqual(expected, result)
+		self.assertEqual('2016-01-01T01:02:03.313337+0000', result['with']['caretaker'][0]['last_seen'])
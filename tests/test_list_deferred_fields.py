@@ -0,0 +1,83 @@
+from unittest import mock
+
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth.models import User
+from django.db import connection
+
+from binder.json import jsonloads
+from .testapp.models import Animal, Zoo
+from .testapp.views import AnimalView, ZooView
+
+
+@mock.patch.object(AnimalView, 'list_deferred_fields', ['name'])
+@mock.patch.object(ZooView, 'list_deferred_fields', ['name'])
+class ListDeferredFieldsTest(TestCase):
+	def setUp(self):
+		super().setUp()
+		u = User(username='testuser', is_active=True, is_superuser=True)
+		u.set_password('test')
+		u.save()
+		self.client = Client()
+		r = self.client.login(username='testuser', password='test')
+		self.assertTrue(r)
+
+		self.artis = Zoo(name='Artis')
+		self.artis.save()
+		self.pluto = Animal(name='Pluto', zoo=self.artis)
+		self.pluto.save()
+
+
+	def _get(self, path, params=None):
+		with CaptureQueriesContext(connection) as queries:
+			response = self.client.get(path, data=params or {})
+		self.assertEqual(response.status_code, 200)
+		return jsonloads(response.content), [q['sql'] for q in queries.captured_queries]
+
+
+	def test_deferred_on_list(self):
+		result, queries = self._get('/animal/')
+		self.assertNotIn('name', result['data'][0])
+		self.assertEqual(self.artis.pk, result['data'][0]['zoo'])
+		self.assertEqual('Sir Pluto', result['data'][0]['prefixed_name'])
+
+		# Without the annotation which uses it, the column isn't needed at all
+		result, queries = self._get('/animal/', {'include_annotations': ''})
+		self.assertNotIn('name', result['data'][0])
+		self.assertFalse(any('"testapp_animal"."name"' in q for q in queries))
+
+
+	def test_deferred_on_list_with_instances(self):
+		result, queries = self._get('/zoo/')
+		self.assertNotIn('name', result['data'][0])
+		# The shown_properties are still there
+		self.assertEqual(1, result['data'][0]['animal_count'])
+		self.assertFalse(any('"testapp_zoo"."name"' in q for q in queries))
+
+
+	def test_shown_on_detail(self):
+		result, _ = self._get('/animal/{}/'.format(self.pluto.pk))
+		self.assertEqual('Pluto', result['data']['name'])
+
+		result, _ = self._get('/zoo/{}/'.format(self.artis.pk))
+		self.assertEqual('Artis', result['data']['name'])
+
+
+	def test_explicitly_requested(self):
+		result, _ = self._get('/animal/', {'fields': '*,name'})
+		self.assertEqual('Pluto', result['data'][0]['name'])
+		self.assertEqual(self.artis.pk, result['data'][0]['zoo'])
+
+		result, _ = self._get('/animal/', {'fields': 'name'})
+		self.assertEqual([{'id': self.pluto.pk, 'name': 'Pluto'}], result['data'])
+
+
+	def test_filter_and_order_on_deferred_fields(self):
+		result, _ = self._get('/animal/', {'.name': 'Pluto', 'order_by': 'name'})
+		self.assertEqual([self.pluto.pk], [a['id'] for a in result['data']])
+
+
+	def test_not_deferred_in_withs(self):
+		result, _ = self._get('/animal/', {'with': 'zoo'})
+		self.assertNotIn('name', result['data'][0])
+		self.assertEqual('Artis', result['with']['zoo'][0]['name'])
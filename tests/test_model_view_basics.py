@@ -785,7 +785,7 @@ class ModelViewBasicsTest(TestCase):
 					EXTRA(): None,  # Other fields are dontcare
 				}
 			],
-			'meta': {'total_records': 1},
+			'meta': {'total_records': 1, 'total_records_strategy': 'exact'},
 			EXTRA(): None,  # Debug, meta, with, etc
 		})
 
@@ -818,6 +818,6 @@ class ModelViewBasicsTest(TestCase):
 					EXTRA(): None,  # Other fields are dontcare
 				}
 			],
-			'meta': {'total_records': 1},
+			'meta': {'total_records': 1, 'total_records_strategy': 'exact'},
 			EXTRA(): None,  # Debug, meta, with, etc
 		})
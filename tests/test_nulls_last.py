@@ -72,6 +72,29 @@ class NullsLastTest(TestCase):
 		self._assert_order('best_animal__nulls_first', ['1', '2', '3', '4', '5'])
 		self._assert_order('-best_animal__nulls_first', ['5', '4', '3', '2', '1'])
 
+	def test_keyset_pagination_with_nulls(self):
+		self._load_test_data()
+
+		for order_by in [
+			'last_seen', '-last_seen',
+			'last_seen__nulls_last', '-last_seen__nulls_last',
+			'last_seen__nulls_first', '-last_seen__nulls_first',
+			'last_present__nulls_first', '-last_present,-name',
+		]:
+			res = self.client.get('/caretaker/', {'order_by': order_by, 'limit': 'none'})
+			expected = [caretaker['name'] for caretaker in jsonloads(res.content)['data']]
+
+			names = []
+			cursor = ''
+			while cursor is not None:
+				res = self.client.get('/caretaker/', {'order_by': order_by, 'limit': 2, 'after': cursor})
+				self.assertEqual(res.status_code, 200)
+				data = jsonloads(res.content)
+				names += [caretaker['name'] for caretaker in data['data']]
+				cursor = data['meta']['next_cursor']
+
+			self.assertEqual(expected, names, order_by)
+
 	def _load_test_data(self):
 		Caretaker.objects.all().delete()
 		for name, last_seen in [
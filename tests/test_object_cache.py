@@ -0,0 +1,168 @@
+from unittest import mock
+
+from django.test import SimpleTestCase, Client
+from django.test.utils import override_settings
+from django.contrib.auth.models import User
+
+from binder.history import Changeset
+from binder.json import jsondumps, jsonloads
+from binder.object_cache import LocalObjectCache, local_objects
+from .testapp.models import Animal, Caretaker, Zoo
+from .testapp.views import AnimalView, CaretakerView, ZooView
+
+
+# The cache is keyed on the versions, which are bumped when transactions
+# commit, which never happens in a TestCase.  So this uses committed
+# data, which is cleaned up afterwards.
+@mock.patch.object(CaretakerView, 'object_cache', True)
+class ObjectCacheTest(SimpleTestCase):
+	databases = {'default'}
+
+	def setUp(self):
+		super().setUp()
+		self.user = User(username='testuser_object_cache', is_active=True, is_superuser=True)
+		self.user.set_password('test')
+		self.user.save()
+		self.client = Client()
+		r = self.client.login(username='testuser_object_cache', password='test')
+		self.assertTrue(r)
+
+		self.artis = Zoo.objects.create(name='Artis')
+		self.fabbby = Caretaker.objects.create(name='fabbby')
+		self.door = Caretaker.objects.create(name='door')
+		self.pluto = Animal.objects.create(name='Pluto', zoo=self.artis, caretaker=self.fabbby)
+		local_objects.clear()
+
+
+	def tearDown(self):
+		Changeset.objects.filter(user=self.user).delete()
+		self.artis.delete()
+		self.fabbby.delete()
+		self.door.delete()
+		self.user.delete()
+		local_objects.clear()
+		super().tearDown()
+
+
+	def _get(self, path, params={}):
+		response = self.client.get(path, data=params)
+		self.assertEqual(response.status_code, 200)
+		return jsonloads(response.content)
+
+
+	def _names(self, params={}):
+		return [obj['name'] for obj in self._get('/caretaker/', dict({'order_by': 'name'}, **params))['data']]
+
+
+	def test_records_are_cached(self):
+		expected = self._get('/caretaker/', {'order_by': 'name'})['data']
+		self.assertEqual((0, 2), local_objects.info()[:2])
+
+		with mock.patch.object(CaretakerView, '_serialize_objs') as serialize_objs:
+			self.assertEqual(expected, self._get('/caretaker/', {'order_by': 'name'})['data'])
+			self.assertEqual(list(reversed(expected)), self._get('/caretaker/', {'order_by': '-name'})['data'])
+		serialize_objs.assert_not_called()
+		self.assertEqual((4, 2), local_objects.info()[:2])
+
+
+	def test_only_missing_records_are_serialized(self):
+		self.assertEqual(['door'], self._names({'limit': 1}))
+		self.assertEqual(['door', 'fabbby'], self._names())
+		self.assertEqual((1, 2), local_objects.info()[:2])
+
+
+	def test_withs(self):
+		expected = self._get('/animal/', {'with': 'caretaker'})['with']['caretaker']
+		with mock.patch.object(CaretakerView, '_serialize_objs') as serialize_objs:
+			self.assertEqual(expected, self._get('/animal/', {'with': 'caretaker'})['with']['caretaker'])
+		serialize_objs.assert_not_called()
+
+
+	def test_scoping_decides_which_records_are_served(self):
+		self.assertEqual(['door', 'fabbby'], self._names())
+
+		def get_queryset(view, request):
+			return Caretaker.objects.exclude(pk=self.fabbby.pk)
+
+		with mock.patch.object(CaretakerView, 'get_queryset', get_queryset):
+			self.assertEqual(['door'], self._names())
+			self.assertEqual([], self._names({'.name': 'fabbby'}))
+
+
+	def test_changes_invalidate_records(self):
+		self.assertEqual(['door', 'fabbby'], self._names())
+
+		response = self.client.put('/caretaker/{}/'.format(self.fabbby.pk), data=jsondumps({'name': 'fabby'}), content_type='application/json')
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(['door', 'fabby'], self._names())
+
+		# Changes to related models too
+		Animal.objects.create(name='Goofy', zoo=self.artis, caretaker=self.door)
+		self.assertEqual(['door', 'fabby'], self._names())
+		self.assertEqual({'door': 1, 'fabby': 1}, {
+			obj['name']: obj['animal_count']
+			for obj in self._get('/caretaker/')['data']
+		})
+
+
+	def test_annotations_and_fields_are_part_of_the_key(self):
+		full = self._get('/caretaker/', {'order_by': 'name'})['data']
+		self.assertEqual([{'id': self.door.pk, 'name': 'door'}, {'id': self.fabbby.pk, 'name': 'fabbby'}], self._get('/caretaker/', {'order_by': 'name', 'fields': 'name'})['data'])
+		self.assertEqual(full, self._get('/caretaker/', {'order_by': 'name'})['data'])
+
+		result = self._get('/caretaker/', {'order_by': 'name', 'include_annotations': 'scary'})['data']
+		self.assertEqual(['boo!', 'boo!'], [obj['scary'] for obj in result])
+		self.assertNotIn('scary', self._get('/caretaker/', {'order_by': 'name'})['data'][0])
+
+
+	def test_request_dependent_annotations_are_not_cached(self):
+		with mock.patch.object(AnimalView, 'object_cache', True):
+			self.assertEqual('Sir Pluto', self._get('/animal/')['data'][0]['prefixed_name'])
+			self.assertEqual('Mr Pluto', self._get('/animal/', {'animal_name_prefix': 'Mr'})['data'][0]['prefixed_name'])
+		self.assertEqual((0, 0), local_objects.info()[:2])
+
+
+	def test_only_gets_use_the_cache(self):
+		self._names()
+		response = self.client.put('/caretaker/{}/'.format(self.fabbby.pk), data=jsondumps({'name': 'fabby'}), content_type='application/json')
+		self.assertEqual('fabby', jsonloads(response.content)['name'])
+
+
+	def test_properties_are_not_cached(self):
+		with mock.patch.object(ZooView, 'object_cache', True):
+			self.assertEqual(1, self._get('/zoo/')['data'][0]['animal_count'])
+			self.assertEqual((0, 0), local_objects.info()[:2])
+
+			# Unless they aren't requested
+			self.assertEqual([{'id': self.artis.pk, 'name': 'Artis'}], self._get('/zoo/', {'fields': 'name'})['data'])
+			self.assertEqual((0, 1), local_objects.info()[:2])
+
+
+	@override_settings(BINDER_OBJECT_CACHE='default')
+	def test_django_cache(self):
+		expected = self._get('/caretaker/', {'order_by': 'name'})['data']
+		with mock.patch.object(CaretakerView, '_serialize_objs') as serialize_objs:
+			self.assertEqual(expected, self._get('/caretaker/', {'order_by': 'name'})['data'])
+		serialize_objs.assert_not_called()
+		self.assertEqual((0, 0), local_objects.info()[:2])
+
+
+
+class LocalObjectCacheTest(SimpleTestCase):
+	@override_settings(BINDER_OBJECT_CACHE_SIZE=2)
+	def test_lru(self):
+		cache = LocalObjectCache()
+		cache.set_many({'a': {'id': 1}, 'b': {'id': 2}})
+		self.assertEqual({'a': {'id': 1}}, cache.get_many(['a']))
+		cache.set_many({'c': {'id': 3}})
+		self.assertEqual({'a': {'id': 1}, 'c': {'id': 3}}, cache.get_many(['a', 'b', 'c']))
+		self.assertEqual((3, 1, 2, 2), cache.info())
+
+
+	def test_copies(self):
+		cache = LocalObjectCache()
+		obj = {'id': 1}
+		cache.set_many({'a': obj})
+		obj['name'] = 'foo'
+		cache.get_many(['a'])['a']['name'] = 'bar'
+		self.assertEqual({'a': {'id': 1}}, cache.get_many(['a']))
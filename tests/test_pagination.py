@@ -436,3 +436,90 @@ class TestPagination(TestCase):
 		self.assertEqual(5, data['meta']['total_records'])
 		self.assertEqual(1, len(data['data']))
 		self.assertEqual(self.wildlands.id, data['data'][0]['id'])
+
+
+	def _walk_cursor(self, path, params):
+		ids = []
+		cursor = ''
+		while cursor is not None:
+			response = self.client.get(path, data=dict(params, after=cursor))
+			self.assertEqual(response.status_code, 200)
+			data = jsonloads(response.content)
+			ids += [obj['id'] for obj in data['data']]
+			cursor = data['meta']['next_cursor']
+		return ids
+
+
+	def test_keyset_pagination(self):
+		response = self.client.get('/animal/', data={'order_by': 'name', 'limit': 2, 'after': ''})
+		self.assertEqual(response.status_code, 200)
+		data = jsonloads(response.content)
+
+		self.assertEqual(5, data['meta']['total_records'])
+		self.assertEqual([self.donald.id, self.mickey.id], [obj['id'] for obj in data['data']])
+		self.assertIsNotNone(data['meta']['next_cursor'])
+
+		response = self.client.get('/animal/', data={'order_by': 'name', 'limit': 2, 'after': data['meta']['next_cursor']})
+		self.assertEqual(response.status_code, 200)
+		data = jsonloads(response.content)
+
+		self.assertEqual(5, data['meta']['total_records'])
+		self.assertEqual([self.minnie.id, self.pluto.id], [obj['id'] for obj in data['data']])
+
+		response = self.client.get('/animal/', data={'order_by': 'name', 'limit': 2, 'after': data['meta']['next_cursor']})
+		self.assertEqual(response.status_code, 200)
+		data = jsonloads(response.content)
+
+		self.assertEqual([self.scrooge.id], [obj['id'] for obj in data['data']])
+		self.assertIsNone(data['meta']['next_cursor'])
+
+
+	def test_keyset_pagination_matches_offset_pagination(self):
+		Animal(name='Mickey Mouse', zoo=self.wildlands).save()
+		Animal(name='Mickey Mouse', zoo=self.artis).save()
+
+		for order_by in ['name', '-name', 'zoo.name,-name', '-zoo.name', 'id', '-id']:
+			response = self.client.get('/animal/', data={'order_by': order_by, 'limit': 'none'})
+			expected = [obj['id'] for obj in jsonloads(response.content)['data']]
+
+			for limit in [1, 2, 3]:
+				ids = self._walk_cursor('/animal/', {'order_by': order_by, 'limit': limit})
+				self.assertEqual(expected, ids, 'order_by={} limit={}'.format(order_by, limit))
+
+
+	def test_keyset_pagination_on_annotation(self):
+		ids = self._walk_cursor('/caretaker/', {'order_by': '-animal_count', 'limit': 1})
+		self.assertEqual([self.caretaker1.id, self.caretaker2.id], ids)
+
+
+	def test_keyset_pagination_errors(self):
+		response = self.client.get('/animal/', data={'order_by': 'name', 'limit': 2, 'after': '', 'offset': 2})
+		self.assertEqual(response.status_code, 418)
+
+		response = self.client.get('/animal/', data={'order_by': 'name', 'limit': 2, 'after': 'garbage'})
+		self.assertEqual(response.status_code, 418)
+
+		response = self.client.get('/animal/', data={'order_by': 'name', 'limit': 2, 'after': ''})
+		cursor = jsonloads(response.content)['meta']['next_cursor']
+
+		# A cursor is only valid for the ordering it was created with
+		response = self.client.get('/animal/', data={'order_by': '-name', 'limit': 2, 'after': cursor})
+		self.assertEqual(response.status_code, 418)
+
+
+	def test_keyset_pagination_on_to_many_relations(self):
+		for order_by in ['animals.name', '-animals.id', 'contacts.name']:
+			response = self.client.get('/zoo/', data={'order_by': order_by, 'limit': 2, 'after': ''})
+			self.assertEqual(response.status_code, 418, order_by)
+			self.assertEqual('RequestError', jsonloads(response.content)['code'])
+
+		# To-one relations are fine
+		response = self.client.get('/animal/', data={'order_by': 'zoo.name', 'limit': 2, 'after': ''})
+		self.assertEqual(response.status_code, 200)
+
+
+	def test_no_next_cursor_without_after(self):
+		response = self.client.get('/animal/', data={'order_by': 'name', 'limit': 2})
+		self.assertEqual(response.status_code, 200)
+		data = jsonloads(response.content)
+		self.assertNotIn('next_cursor', data['meta'])
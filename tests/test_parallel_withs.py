@@ -0,0 +1,94 @@
+from unittest import mock
+
+from django.test import SimpleTestCase, Client
+from django.contrib.auth.models import User
+from django.db import DatabaseError
+
+from binder import history
+from binder.json import jsonloads
+from binder.parallel import submit_read_only
+from .testapp.models import Animal, Caretaker, ContactPerson, Zoo, ZooEmployee
+from .testapp.views import AnimalView, ZooView
+
+
+# The worker threads have their own connections, which can't see the
+# data of a test transaction.  So this uses committed data, which is
+# cleaned up afterwards.
+class ParallelWithsTest(SimpleTestCase):
+	databases = {'default'}
+
+	def setUp(self):
+		super().setUp()
+		self.user = User(username='testuser_parallel', is_active=True, is_superuser=True)
+		self.user.set_password('test')
+		self.user.save()
+		self.client = Client()
+		r = self.client.login(username='testuser_parallel', password='test')
+		self.assertTrue(r)
+
+		self.artis = Zoo.objects.create(name='Artis')
+		self.gaia = Zoo.objects.create(name='GaiaZOO')
+		self.fabbby = Caretaker.objects.create(name='fabbby')
+		self.contact = ContactPerson.objects.create(name='Mr. Zoo')
+		self.artis.contacts.add(self.contact)
+		ZooEmployee.objects.create(name='Henk', zoo=self.gaia)
+
+		Animal.objects.create(name='Pluto', zoo=self.artis, caretaker=self.fabbby)
+		Animal.objects.create(name='Scrooge McDuck', zoo=self.artis, caretaker=self.fabbby)
+		Animal.objects.create(name='Mickey Mouse', zoo=self.gaia)
+
+
+	def tearDown(self):
+		Zoo.objects.filter(pk__in=[self.artis.pk, self.gaia.pk]).delete()
+		self.fabbby.delete()
+		self.contact.delete()
+		self.user.delete()
+		super().tearDown()
+
+
+	def _get(self, path, params, parallel):
+		with mock.patch.object(ZooView, 'parallel_withs', parallel), mock.patch('binder.views.submit_read_only', wraps=submit_read_only) as submit:
+			response = self.client.get(path, data=params)
+		self.assertEqual(response.status_code, 200)
+		result = jsonloads(response.content)
+		del result['debug']['request_id']
+		return result, submit.call_count
+
+
+	def test_parallel_withs_give_same_response(self):
+		params = {'.id:in': '{},{}'.format(self.artis.pk, self.gaia.pk), 'with': 'animals.caretaker,contacts,zoo_employees'}
+		expected, submits = self._get('/zoo/', params, False)
+		self.assertEqual(0, submits)
+		self.assertEqual(3, len(expected['with']['animal']))
+
+		result, submits = self._get('/zoo/', params, True)
+		self.assertEqual(4, submits)
+		self.assertEqual(expected, result)
+
+
+	def test_parallel_withs_are_scoped(self):
+		def get_queryset(view, request):
+			return Animal.objects.exclude(name='Pluto')
+
+		params = {'.id': self.artis.pk, 'with': 'animals,contacts'}
+		with mock.patch.object(AnimalView, 'get_queryset', get_queryset):
+			result, submits = self._get('/zoo/', params, True)
+		self.assertEqual(2, submits)
+		self.assertEqual(['Scrooge McDuck'], [a['name'] for a in result['with']['animal']])
+
+
+	def test_no_parallel_withs_for_single_model(self):
+		result, submits = self._get('/zoo/', {'.id': self.artis.pk, 'with': 'animals'}, True)
+		self.assertEqual(0, submits)
+		self.assertEqual(2, len(result['with']['animal']))
+
+
+	def test_queries_run_read_only(self):
+		self.assertTrue(submit_read_only('default', history.is_read_only).result())
+
+		with self.assertRaises(DatabaseError):
+			submit_read_only('default', lambda: Zoo.objects.create(name='Burgers Zoo')).result()
+		self.assertFalse(Zoo.objects.filter(name='Burgers Zoo').exists())
+
+		future = submit_read_only('default', Zoo.objects.filter(name='Artis').count)
+		self.assertEqual(1, future.result())
@@ -0,0 +1,113 @@
+from django.test import TestCase, Client, RequestFactory, override_settings
+from django.contrib.auth.models import User
+
+from binder.json import jsonloads
+from binder.plan_cache import PlanCache, query_plans
+from .testapp.models import Animal, Caretaker, Zoo
+from .testapp.views import CaretakerView
+
+
+class PlanCacheTest(TestCase):
+	def test_lru_eviction_and_counters(self):
+		cache = PlanCache()
+		with override_settings(BINDER_QUERY_PLAN_CACHE_SIZE=2):
+			self.assertEqual('a', cache.get('a', lambda: 'a'))
+			self.assertEqual('b', cache.get('b', lambda: 'b'))
+			self.assertEqual('a', cache.get('a', lambda: 'not a'))
+			self.assertEqual('c', cache.get('c', lambda: 'c'))
+			# b was the least recently used
+			self.assertEqual('new b', cache.get('b', lambda: 'new b'))
+			self.assertEqual((1, 4, 2, 2), tuple(cache.info()))
+
+		cache.clear()
+		self.assertEqual((0, 0, 1024, 0), tuple(cache.info()))
+
+
+	def test_failed_compile_is_not_cached(self):
+		cache = PlanCache()
+
+		def fail():
+			raise ValueError()
+
+		with self.assertRaises(ValueError):
+			cache.get('a', fail)
+		self.assertEqual('a', cache.get('a', lambda: 'a'))
+		self.assertEqual(2, cache.info().misses)
+
+
+
+class QueryPlanTest(TestCase):
+	def setUp(self):
+		super().setUp()
+		u = User(username='testuser', is_active=True, is_superuser=True)
+		u.set_password('test')
+		u.save()
+		self.client = Client()
+		r = self.client.login(username='testuser', password='test')
+		self.assertTrue(r)
+
+		self.artis = Zoo(name='Artis')
+		self.artis.save()
+		self.gaia = Zoo(name='GaiaZOO')
+		self.gaia.save()
+		self.fabbby = Caretaker(name='fabbby')
+		self.fabbby.save()
+
+		Animal(name='Pluto', zoo=self.artis, caretaker=self.fabbby).save()
+		Animal(name='Scrooge McDuck', zoo=self.artis).save()
+		Animal(name='Mickey Mouse', zoo=self.gaia).save()
+
+		query_plans.clear()
+
+
+	def _get_names(self, path, params):
+		response = self.client.get(path, data=params)
+		self.assertEqual(response.status_code, 200)
+		return sorted(obj['name'] for obj in jsonloads(response.content)['data'])
+
+
+	def test_filters_with_same_shape_only_bind_values(self):
+		self.assertEqual(['Pluto', 'Scrooge McDuck'], self._get_names('/animal/', {'.zoo.name:startswith': 'Ar'}))
+		misses = query_plans.info().misses
+
+		self.assertEqual(['Mickey Mouse'], self._get_names('/animal/', {'.zoo.name:startswith': 'Ga'}))
+		self.assertEqual(misses, query_plans.info().misses)
+		self.assertTrue(query_plans.info().hits)
+
+		self.assertEqual(['Mickey Mouse', 'Scrooge McDuck'], self._get_names('/animal/', {'.caretaker:isnull': 'true'}))
+		self.assertEqual(misses + 1, query_plans.info().misses)
+
+
+	def test_where_values_are_bound_per_request(self):
+		response = self.client.get('/zoo/', data={'with': 'animals', 'where': 'animals(name:startswith=Sc)'})
+		self.assertEqual(['Scrooge McDuck'], [a['name'] for a in jsonloads(response.content)['with']['animal']])
+		misses = query_plans.info().misses
+
+		response = self.client.get('/zoo/', data={'with': 'animals', 'where': 'animals(name:startswith=Pl)'})
+		self.assertEqual(['Pluto'], [a['name'] for a in jsonloads(response.content)['with']['animal']])
+		self.assertEqual(misses, query_plans.info().misses)
+
+
+	def test_invalid_filters_still_raise_errors(self):
+		for i in range(2):
+			response = self.client.get('/animal/', data={'.zoo.nonexistent': 'foo'})
+			self.assertEqual(response.status_code, 418)
+
+			response = self.client.get('/animal/', data={'.name:gt': 'foo'})
+			self.assertEqual(response.status_code, 418)
+
+			response = self.client.get('/zoo/', data={'with': 'animals', 'where': 'caretaker(name=foo)'})
+			self.assertEqual(response.status_code, 418)
+			self.assertIn('{where=caretaker(name=foo)}', jsonloads(response.content)['message'])
+
+
+	def test_include_annotations_are_copied(self):
+		request = RequestFactory().get('/caretaker/', data={'include_annotations': 'scary'})
+		view = CaretakerView()
+
+		include_annotations = view._parse_include_annotations(request)
+		self.assertEqual({'': {'scary'}}, include_annotations)
+		include_annotations[''].add('animal_count')
+
+		self.assertEqual({'': {'scary'}}, view._parse_include_annotations(request))
+		self.assertEqual(1, query_plans.info().hits)
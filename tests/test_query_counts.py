@@ -0,0 +1,107 @@
+from django.test import TestCase, Client
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from binder.json import jsonloads
+
+from binder.router import Router
+from .testapp.models import Animal, ContactPerson, Zoo, ZooEmployee
+from .testapp.views import ZooView
+
+
+# These tests guard against accidental extra queries in the GET
+# pipeline.  Every request does a few queries which have nothing to do
+# with Binder itself:
+#  - Session lookup
+#  - User lookup
+#  - SAVEPOINT/RELEASE SAVEPOINT for the transaction in dispatch()
+#    (and another pair for PermissionViews like ZooView)
+class QueryCountTest(TestCase):
+	def setUp(self):
+		super().setUp()
+		u = User(username='testuser', is_active=True, is_superuser=True)
+		u.set_password('test')
+		u.save()
+		self.client = Client()
+		r = self.client.login(username='testuser', password='test')
+		self.assertTrue(r)
+
+		self.artis = Zoo(name='Artis')
+		self.artis.save()
+		self.gaia = Zoo(name='GaiaZOO')
+		self.gaia.save()
+
+		for name, zoo in [('Pluto', self.artis), ('Scrooge McDuck', self.artis), ('Mickey Mouse', self.gaia)]:
+			Animal(name=name, zoo=zoo).save()
+
+
+	def _get(self, path, params):
+		with CaptureQueriesContext(connection) as ctx:
+			response = self.client.get(path, data=params)
+		self.assertEqual(response.status_code, 200)
+		return jsonloads(response.content), [q['sql'] for q in ctx.captured_queries]
+
+
+	def _main_queries(self, queries, table):
+		return [q for q in queries if q.startswith('SELECT "{}"."id", "{}"."name"'.format(table, table))]
+
+
+	def test_animal_list_with_zoo_runs_main_query_once(self):
+		data, queries = self._get('/animal/', {'with': 'zoo'})
+		self.assertEqual(3, len(data['data']))
+		self.assertEqual(2, len(data['with']['zoo']))
+
+		self.assertEqual(1, len(self._main_queries(queries, 'testapp_animal')))
+		# Session, user, savepoint, count, animals, costume m2m,
+		# zoo ids, zoos (+ 2 for animal_count property and 1 for
+		# m2m fields), release savepoint
+		self.assertEqual(12, len(queries))
+
+
+	def test_zoo_list_with_animals_runs_main_query_once(self):
+		data, queries = self._get('/zoo/', {'with': 'animals'})
+		self.assertEqual(2, len(data['data']))
+		self.assertEqual(3, len(data['with']['animal']))
+
+		self.assertEqual(1, len(self._main_queries(queries, 'testapp_zoo')))
+		# Session, user, 2 savepoints, count, zoos (+ 2 for
+		# animal_count property and 1 for m2m fields), animal ids,
+		# animals, costume m2m, 2 release savepoints
+		self.assertEqual(14, len(queries))
+
+
+	def test_list_without_withs_does_not_query_for_with_ids(self):
+		data, queries = self._get('/animal/', {})
+		self.assertEqual(3, len(data['data']))
+		# Session, user, savepoint, count, animals, costume m2m,
+		# release savepoint
+		self.assertEqual(7, len(queries))
+
+
+	def test_m2m_fields_are_fetched_in_one_query(self):
+		contacts = [ContactPerson.objects.create(name=name) for name in ['Mr. Zoo', 'Mrs. Zoo']]
+		self.artis.contacts.set(contacts)
+		ZooEmployee.objects.create(name='Henk', zoo=self.gaia)
+		self.artis.most_popular_animals.set(Animal.objects.filter(zoo=self.artis))
+
+		data, queries = self._get('/zoo/', {'order_by': 'name'})
+		artis, gaia = data['data']
+		self.assertEqual([c.pk for c in contacts], artis['contacts'])
+		self.assertEqual([], artis['zoo_employees'])
+		self.assertEqual(sorted(a.pk for a in Animal.objects.filter(zoo=self.artis)), artis['most_popular_animals'])
+		self.assertEqual([], gaia['contacts'])
+		self.assertEqual(1, len(gaia['zoo_employees']))
+
+		m2m_queries = [q for q in queries if 'ARRAY(SELECT' in q]
+		self.assertEqual(1, len(m2m_queries))
+		self.assertEqual(3, m2m_queries[0].count('ARRAY(SELECT'))
+
+		# The per-field fallback (for MySQL) gives the same ids
+		view = ZooView()
+		view.router = Router()
+		pks = [self.artis.pk, self.gaia.pk]
+		self.assertEqual(
+			{field: {pk: ids[pk] for pk in pks} for field, ids in view._get_m2m_ids_by_field(pks).items()},
+			{field: {pk: ids[pk] for pk in pks} for field, ids in view._get_m2m_ids_by_array(pks).items()},
+		)
@@ -0,0 +1,187 @@
+import os
+import unittest
+from unittest import mock
+
+from django.test import TestCase, SimpleTestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth.models import User
+from django.db import connection, DatabaseError
+
+from binder import history
+from binder.history import Changeset
+from binder.json import jsondumps, jsonloads
+from binder.views import ModelView
+from .testapp.models import Animal, Zoo
+from .testapp.views import AnimalView, ZooView
+
+
+class ReadOnlyDispatchTest(TestCase):
+	def setUp(self):
+		super().setUp()
+		u = User(username='testuser', is_active=True, is_superuser=True)
+		u.set_password('test')
+		u.save()
+		self.client = Client()
+		r = self.client.login(username='testuser', password='test')
+		self.assertTrue(r)
+
+		self.artis = Zoo.objects.create(name='Artis')
+		self.pluto = Animal.objects.create(name='Pluto', zoo=self.artis)
+
+
+	def _get(self, path, params={}, read_only=True):
+		with mock.patch.object(ZooView, 'read_only_dispatch', read_only), mock.patch.object(AnimalView, 'read_only_dispatch', read_only):
+			with CaptureQueriesContext(connection) as queries:
+				response = self.client.get(path, data=params)
+		self.assertEqual(response.status_code, 200)
+		result = jsonloads(response.content)
+		del result['debug']['request_id']
+		return result, [q['sql'] for q in queries.captured_queries]
+
+
+	def test_same_response(self):
+		for path in ['/zoo/', '/animal/', '/zoo/{}/'.format(self.artis.pk)]:
+			expected, queries = self._get(path, {'with': 'animals' if 'zoo' in path else 'zoo'}, read_only=False)
+			result, queries = self._get(path, {'with': 'animals' if 'zoo' in path else 'zoo'})
+			self.assertEqual(expected, result)
+
+
+	def test_no_savepoints(self):
+		result, queries = self._get('/zoo/', read_only=False)
+		self.assertTrue(any('SAVEPOINT' in sql for sql in queries))
+
+		result, queries = self._get('/zoo/')
+		self.assertEqual([], [sql for sql in queries if 'SAVEPOINT' in sql])
+
+
+	def test_no_history(self):
+		instances = []
+
+		def serialize_instances(view, queryset, plan, annotations):
+			datas_by_id, objs_by_id = ModelView._serialize_instances(view, queryset, plan, annotations)
+			instances.extend(objs_by_id.values())
+			return datas_by_id, objs_by_id
+
+		with mock.patch('binder.history._start') as start, mock.patch('binder.history._commit') as commit, \
+				mock.patch.object(AnimalView, 'serialization_engine', 'instances'), \
+				mock.patch.object(AnimalView, '_serialize_instances', serialize_instances):
+			result, queries = self._get('/animal/{}/'.format(self.pluto.pk))
+		self.assertEqual('Pluto', result['data']['name'])
+		start.assert_not_called()
+		commit.assert_not_called()
+		self.assertEqual([history.ReadOnlyInstance], [instance._history for instance in instances])
+
+
+	def test_no_history_while_streaming(self):
+		read_only = []
+
+		def get_objs(view, queryset, request, annotations=None, fields=None):
+			read_only.append(history.is_read_only())
+			return ModelView._get_objs(view, queryset, request, annotations, fields)
+
+		with mock.patch.object(AnimalView, 'streaming', True), mock.patch.object(AnimalView, '_get_objs', get_objs):
+			with mock.patch.object(AnimalView, 'read_only_dispatch', True):
+				response = self.client.get('/animal/')
+				self.assertTrue(response.streaming)
+				self.assertEqual(['Pluto'], [obj['name'] for obj in jsonloads(response.getvalue())['data']])
+			self.assertEqual([True], read_only)
+
+			response = self.client.get('/animal/')
+			response.getvalue()
+			self.assertEqual([True, False], read_only)
+
+
+	def test_instances_are_marked(self):
+		# Install the history signal handlers
+		self._get('/animal/')
+
+		with history.read_only():
+			self.assertTrue(history.is_read_only())
+			pluto = Animal.objects.get(pk=self.pluto.pk)
+		self.assertFalse(history.is_read_only())
+		self.assertIs(history.ReadOnlyInstance, pluto._history)
+
+		pluto.name = 'Goofy'
+		with self.assertRaises(RuntimeError):
+			pluto.save()
+
+		self.assertIsNot(history.ReadOnlyInstance, Animal.objects.get(pk=self.pluto.pk)._history)
+
+
+	def test_permission_checks_are_kept(self):
+		def get_queryset(view, request):
+			return Zoo.objects.all()
+
+		with mock.patch.object(ZooView, 'get_queryset', get_queryset), self.assertRaises(PermissionError):
+			self._get('/zoo/')
+
+
+	def test_writes_are_not_read_only(self):
+		with mock.patch.object(AnimalView, 'read_only_dispatch', True):
+			response = self.client.put('/animal/{}/'.format(self.pluto.pk), data=jsondumps({'name': 'Goofy'}), content_type='application/json')
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual('Goofy', Animal.objects.get(pk=self.pluto.pk).name)
+		self.assertEqual(1, Changeset.objects.count())
+
+
+
+# TestCases run in a transaction, so this checks the transaction itself
+# with committed data, which is cleaned up afterwards.
+@unittest.skipIf(
+	os.environ.get('BINDER_TEST_MYSQL', '0') != '0',
+	"Only available with PostgreSQL"
+)
+@mock.patch.object(AnimalView, 'read_only_dispatch', True)
+class ReadOnlyTransactionTest(SimpleTestCase):
+	databases = {'default'}
+
+	def setUp(self):
+		super().setUp()
+		self.user = User(username='testuser_read_only', is_active=True, is_superuser=True)
+		self.user.set_password('test')
+		self.user.save()
+		self.client = Client()
+		r = self.client.login(username='testuser_read_only', password='test')
+		self.assertTrue(r)
+
+
+	def tearDown(self):
+		Zoo.objects.filter(name='Burgers Zoo').delete()
+		self.user.delete()
+		super().tearDown()
+
+
+	def test_read_only_transaction(self):
+		def get(view, request, pk=None, withs=None, include_annotations=None):
+			with connection.cursor() as cursor:
+				cursor.execute('SHOW transaction_read_only')
+				self.assertEqual('on', cursor.fetchone()[0])
+			return ModelView.get(view, request, pk, withs, include_annotations)
+
+		with mock.patch.object(AnimalView, 'get', get):
+			response = self.client.get('/animal/')
+		self.assertEqual(response.status_code, 200)
+
+
+	def test_read_only_is_set_in_the_transaction(self):
+		with CaptureQueriesContext(connection) as queries:
+			response = self.client.get('/animal/')
+		self.assertEqual(response.status_code, 200)
+		sqls = [q['sql'] for q in queries.captured_queries]
+		self.assertEqual(1, sqls.count('SET TRANSACTION READ ONLY'))
+		self.assertLess(sqls.index('SET TRANSACTION READ ONLY'), min(i for i, sql in enumerate(sqls) if 'testapp_' in sql))
+		self.assertFalse(connection.connection.readonly)
+
+
+	def test_writes_fail(self):
+		def get(view, request, pk=None, withs=None, include_annotations=None):
+			Zoo.objects.create(name='Burgers Zoo')
+
+		with mock.patch.object(AnimalView, 'get', get), self.assertRaises(DatabaseError):
+			self.client.get('/animal/')
+		self.assertFalse(Zoo.objects.filter(name='Burgers Zoo').exists())
+
+		# The connection is back to normal
+		self.assertFalse(connection.connection.readonly)
+		Zoo.objects.create(name='Burgers Zoo')
+		self.assertTrue(Zoo.objects.filter(name='Burgers Zoo').exists())
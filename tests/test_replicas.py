@@ -0,0 +1,179 @@
+import threading
+from unittest import mock
+
+from django.test import SimpleTestCase, Client, RequestFactory
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.contrib.auth.models import User
+from django.db import connections
+
+from binder import replicas
+from binder.history import Changeset
+from binder.json import jsondumps, jsonloads
+from .testapp.models import Animal, Caretaker, ContactPerson, Zoo
+from .testapp.views import AnimalView, ZooView
+
+
+# The 'replica' alias is the same database over another connection, so
+# this uses committed data, which is cleaned up afterwards.
+@override_settings(BINDER_READ_REPLICA='replica')
+class ReplicaTest(SimpleTestCase):
+	databases = {'default', 'replica'}
+
+	def setUp(self):
+		super().setUp()
+		self.user = User(username='testuser_replicas', is_active=True, is_superuser=True)
+		self.user.set_password('test')
+		self.user.save()
+		self.client = Client()
+		r = self.client.login(username='testuser_replicas', password='test')
+		self.assertTrue(r)
+
+		self.artis = Zoo.objects.create(name='Artis')
+		self.fabbby = Caretaker.objects.create(name='fabbby')
+		self.pluto = Animal.objects.create(name='Pluto', zoo=self.artis, caretaker=self.fabbby)
+		self.contact = ContactPerson.objects.create(name='Mr. Zoo')
+		self.artis.contacts.add(self.contact)
+
+
+	def tearDown(self):
+		Changeset.objects.filter(user=self.user).delete()
+		self.artis.delete()
+		self.fabbby.delete()
+		self.contact.delete()
+		self.user.delete()
+		super().tearDown()
+
+
+	# Returns the response, and the testapp queries on the primary and
+	# the replica.
+	def _request(self, method, path, *args, **kwargs):
+		with CaptureQueriesContext(connections['default']) as primary, CaptureQueriesContext(connections['replica']) as replica:
+			response = getattr(self.client, method)(path, *args, **kwargs)
+		self.assertEqual(response.status_code, 200)
+		return (
+			response,
+			[q['sql'] for q in primary.captured_queries if 'testapp_' in q['sql']],
+			[q['sql'] for q in replica.captured_queries if 'testapp_' in q['sql']],
+		)
+
+
+	def test_gets_read_from_replica(self):
+		response, primary, replica = self._request('get', '/animal/', {'with': 'zoo,caretaker', 'order_by': 'name'})
+		self.assertEqual(['Pluto'], [obj['name'] for obj in jsonloads(response.content)['data']])
+		self.assertEqual([], primary)
+		self.assertTrue(any('testapp_animal' in sql for sql in replica))
+		self.assertTrue(any('testapp_zoo' in sql for sql in replica))
+
+		response, primary, replica = self._request('get', '/animal/{}/'.format(self.pluto.pk))
+		self.assertEqual('Pluto', jsonloads(response.content)['data']['name'])
+		self.assertEqual([], primary)
+		self.assertTrue(replica)
+
+
+	@override_settings(BINDER_READ_REPLICA=None)
+	def test_no_replica(self):
+		response, primary, replica = self._request('get', '/animal/')
+		self.assertTrue(primary)
+		self.assertEqual([], replica)
+
+
+	def test_writes_and_custom_routes_use_primary(self):
+		response, primary, replica = self._request('get', '/animal/{}/history/'.format(self.pluto.pk))
+		self.assertEqual([], replica)
+
+		response, primary, replica = self._request('get', '/user/identify/')
+		self.assertEqual([], replica)
+
+		response, primary, replica = self._request('put', '/animal/{}/'.format(self.pluto.pk), data=jsondumps({'name': 'Goofy'}), content_type='application/json')
+		self.assertEqual([], replica)
+		self.assertTrue(any('FOR UPDATE' in sql for sql in primary))
+
+
+	def test_writes_stick_to_primary(self):
+		# Nothing changes, so there's no changeset
+		self._request('put', '/animal/{}/'.format(self.pluto.pk), data=jsondumps({'name': 'Pluto'}), content_type='application/json')
+		response, primary, replica = self._request('get', '/animal/')
+		self.assertEqual([], primary)
+
+		self._request('put', '/animal/{}/'.format(self.pluto.pk), data=jsondumps({'name': 'Goofy'}), content_type='application/json')
+		response, primary, replica = self._request('get', '/animal/')
+		self.assertEqual(['Goofy'], [obj['name'] for obj in jsonloads(response.content)['data']])
+		self.assertEqual([], replica)
+		self.assertTrue(primary)
+
+		# Other clients still read from the replica
+		other = Client()
+		other.login(username='testuser_replicas', password='test')
+		with CaptureQueriesContext(connections['default']) as primary:
+			self.assertEqual(200, other.get('/animal/').status_code)
+		self.assertEqual([], [q['sql'] for q in primary.captured_queries if 'testapp_' in q['sql']])
+
+
+	@override_settings(BINDER_READ_REPLICA_STICKINESS=0)
+	def test_stickiness_expires(self):
+		self._request('put', '/animal/{}/'.format(self.pluto.pk), data=jsondumps({'name': 'Goofy'}), content_type='application/json')
+		response, primary, replica = self._request('get', '/animal/')
+		self.assertEqual([], primary)
+
+
+	def test_read_only_dispatch(self):
+		with mock.patch.object(AnimalView, 'read_only_dispatch', True):
+			response, primary, replica = self._request('get', '/animal/', {'with': 'zoo'})
+		self.assertEqual(['Pluto'], [obj['name'] for obj in jsonloads(response.content)['data']])
+		self.assertEqual([], primary)
+		self.assertTrue(replica)
+
+
+	def test_read_only_transaction_is_on_replica(self):
+		with mock.patch.object(AnimalView, 'read_only_dispatch', True):
+			with CaptureQueriesContext(connections['default']) as primary, CaptureQueriesContext(connections['replica']) as replica:
+				response = self.client.get('/animal/')
+		self.assertEqual(response.status_code, 200)
+		self.assertNotIn('SET TRANSACTION READ ONLY', [q['sql'] for q in primary.captured_queries])
+		self.assertIn('SET TRANSACTION READ ONLY', [q['sql'] for q in replica.captured_queries])
+
+
+	def test_streaming_reads_from_replica(self):
+		with mock.patch.object(AnimalView, 'streaming', True):
+			with CaptureQueriesContext(connections['default']) as primary, CaptureQueriesContext(connections['replica']) as replica:
+				response = self.client.get('/animal/', {'with': 'zoo'})
+				self.assertTrue(response.streaming)
+				result = jsonloads(response.getvalue())
+		self.assertEqual(['Artis'], [zoo['name'] for zoo in result['with']['zoo']])
+		self.assertEqual([], [q['sql'] for q in primary.captured_queries if 'testapp_' in q['sql']])
+		self.assertTrue(any('testapp_zoo' in q['sql'] for q in replica.captured_queries))
+
+
+	def test_parallel_withs_read_from_replica(self):
+		aliases = []
+		db_for_read = replicas.ReplicaRouter.db_for_read
+
+		def record(router, model, **hints):
+			alias = db_for_read(router, model, **hints)
+			aliases.append((threading.current_thread().name.startswith('binder-query'), alias))
+			return alias
+
+		with mock.patch.object(ZooView, 'parallel_withs', True), mock.patch.object(replicas.ReplicaRouter, 'db_for_read', record):
+			response, primary, replica = self._request('get', '/zoo/', {'with': 'animals,contacts'})
+		self.assertIn((True, 'replica'), aliases)
+		self.assertNotIn((True, None), aliases)
+		self.assertEqual([], primary)
+
+
+
+class IdentityTest(SimpleTestCase):
+	def test_identity(self):
+		factory = RequestFactory()
+		self.assertEqual('token:Token foo', replicas.get_identity(factory.get('/', HTTP_AUTHORIZATION='Token foo')))
+		self.assertIsNone(replicas.get_identity(factory.get('/')))
+
+		request = factory.get('/')
+		request.session = mock.Mock(session_key='bar')
+		self.assertEqual('session:bar', replicas.get_identity(request))
+
+
+	def test_stick(self):
+		self.assertFalse(replicas.is_sticky('token:test_stick'))
+		self.assertFalse(replicas.is_sticky(None))
+		replicas.stick('token:test_stick')
+		self.assertTrue(replicas.is_sticky('token:test_stick'))
@@ -1,6 +1,6 @@
 from django.test import TestCase
 
-from binder.exceptions import BinderNotFound
+from binder.exceptions import BinderNotFound, BinderRequestError
 from binder.json import jsondumps
 from binder.models import BinderModel
 from binder.router import Router, Route, detail_route
@@ -12,7 +12,8 @@ from django.conf.urls import url, include
 from . import urls_module
 
 # Two unique local models, to use for view registration
-from .testapp.models import Country
+from .testapp.models import Animal, Caretaker, Country, Zoo
+from .testapp.urls import router as testapp_router
 
 
 class FooModel(BinderModel):
@@ -128,6 +129,38 @@ class RouterTest(TestCase):
 		self.assertTrue(is_valid_path('/bar/', urls_module))
 		self.assertFalse(is_valid_path('/bar/1/', urls_module))
 
+	def test_relation_graph_matches_model_relations(self):
+		# A router without a relation graph, so views walk the models
+		slow_router = Router()
+		slow_router.model_views = testapp_router.model_views
+
+		self.assertTrue(testapp_router.relations)
+		for view_class, relations in testapp_router.relations.items():
+			for fieldname, related in relations.items():
+				# Through models and such have no view
+				if related.model not in testapp_router.model_views:
+					continue
+				view = view_class()
+				view.router = slow_router
+				self.assertEqual(view._follow_related(fieldname), (related,))
+
+		with self.assertRaises(TypeError):
+			testapp_router.relations[testapp_router.model_view(Country)]['foo'] = None
+
+
+	def test_relation_graph_follows_dotted_paths(self):
+		view = testapp_router.model_view(Zoo)()
+		view.router = testapp_router
+		result = view._follow_related('animals.caretaker')
+		self.assertEqual(('animals', Animal, 'zoo'), result[0])
+		self.assertEqual(('caretaker', Caretaker, 'animals'), result[1])
+		self.assertEqual(result, testapp_router.follow_related(type(view), ['animals', 'caretaker']))
+
+		# Not in the graph, so _follow_related produces the error
+		self.assertIsNone(testapp_router.follow_related(type(view), ['animals', 'name']))
+		with self.assertRaises(BinderRequestError):
+			view._follow_related('animals.name')
+
 
 class TestFetchObj(TestCase):
 
@@ -0,0 +1,136 @@
+from unittest import mock
+
+from django.test import TestCase, Client
+from django.contrib.auth.models import User
+from django.db.models.signals import post_init
+
+from binder.json import jsonloads
+from .testapp.models import Animal, Caretaker, Picture, Zoo
+from .testapp.views import AnimalView, CaretakerView, PictureView, ZooView
+
+
+class SerializationEngineTest(TestCase):
+	def setUp(self):
+		super().setUp()
+		u = User(username='testuser', is_active=True, is_superuser=True)
+		u.set_password('test')
+		u.save()
+		self.client = Client()
+		r = self.client.login(username='testuser', password='test')
+		self.assertTrue(r)
+
+		self.artis = Zoo(name='Artis')
+		self.artis.save()
+		self.fabbby = Caretaker(name='fabbby', ssn='12345')
+		self.fabbby.save()
+
+		self.pluto = Animal(name='Pluto', zoo=self.artis, caretaker=self.fabbby)
+		self.pluto.save()
+		Animal(name='Scrooge McDuck', zoo=self.artis).save()
+
+		picture = Picture(animal=self.pluto, file='floor-plans/pluto.jpg', original_file='floor-plans/pluto.jpg')
+		picture.save()
+		# Bypass validation to get an empty file field
+		Picture.objects.filter(pk=picture.pk).update(original_file='')
+
+
+	def _get(self, path, params, view, engine):
+		with mock.patch.object(view, 'serialization_engine', engine):
+			response = self.client.get(path, data=params)
+		self.assertEqual(response.status_code, 200)
+		result = jsonloads(response.content)
+		del result['debug']['request_id']
+		return result
+
+
+	def assertSameResponse(self, path, params, view):
+		expected = self._get(path, params, view, 'instances')
+		result = self._get(path, params, view, 'values')
+		self.assertEqual(expected, result)
+		return result
+
+
+	def test_values_engine_matches_instances_engine(self):
+		result = self.assertSameResponse('/animal/', {'with': 'zoo,caretaker'}, AnimalView)
+		self.assertEqual(['Pluto', 'Scrooge McDuck'], [a['name'] for a in result['data']])
+		self.assertEqual(self.artis.pk, result['data'][0]['zoo'])
+
+		result = self.assertSameResponse('/caretaker/', {'include_annotations': '*,scary'}, CaretakerView)
+		self.assertEqual('boo!', result['data'][0]['scary'])
+		self.assertEqual(1, result['data'][0]['animal_count'])
+		self.assertEqual('12345', result['data'][0]['bsn'])
+
+
+	def test_values_engine_file_fields(self):
+		result = self.assertSameResponse('/picture/', {}, PictureView)
+		picture = result['data'][0]
+		self.assertEqual('/picture/{}/file/'.format(picture['id']), picture['file'])
+		self.assertIsNone(picture['original_file'])
+
+
+	def test_values_engine_does_not_instantiate_models(self):
+		instances = []
+
+		def count_instances(sender, instance, **kwargs):
+			instances.append(instance)
+
+		post_init.connect(count_instances, sender=Animal)
+		try:
+			result = self._get('/animal/', {}, AnimalView, 'values')
+			self.assertEqual(2, len(result['data']))
+			self.assertEqual([], instances)
+
+			self._get('/animal/', {}, AnimalView, 'instances')
+			self.assertEqual(2, len(instances))
+		finally:
+			post_init.disconnect(count_instances, sender=Animal)
+
+
+	def test_shown_properties_still_use_instances(self):
+		result = self.assertSameResponse('/zoo/', {}, ZooView)
+		self.assertEqual(2, result['data'][0]['animal_count'])
+
+
+class SerializationPlanTest(TestCase):
+	def setUp(self):
+		super().setUp()
+		u = User(username='testuser', is_active=True, is_superuser=True)
+		u.set_password('test')
+		u.save()
+		self.client = Client()
+		r = self.client.login(username='testuser', password='test')
+		self.assertTrue(r)
+
+		Caretaker(name='fabbby', ssn='12345').save()
+
+
+	def test_plan_is_compiled_once_per_view_class(self):
+		plan = CaretakerView._get_serialization_plan()
+		self.assertIs(plan, CaretakerView._get_serialization_plan())
+		self.assertIs(plan, CaretakerView.__dict__['_compiled_serialization_plan'])
+		self.assertNotIn('ssn', [f.name for f in plan.fields])
+		self.assertIn('id', [f.name for f in plan.fields])
+		self.assertFalse(plan.needs_instances)
+
+		zoo_plan = ZooView._get_serialization_plan()
+		self.assertIsNot(plan, zoo_plan)
+		self.assertEqual(('animal_count',), tuple(name for name, getter in zoo_plan.properties))
+		self.assertTrue(zoo_plan.needs_instances)
+
+
+	def test_invalidate_plan_after_changing_view(self):
+		response = self.client.get('/caretaker/')
+		self.assertNotIn('ssn', jsonloads(response.content)['data'][0])
+
+		try:
+			with mock.patch.object(CaretakerView, 'hidden_fields', ['first_seen']):
+				CaretakerView.invalidate_serialization_plan()
+				response = self.client.get('/caretaker/')
+				data = jsonloads(response.content)['data'][0]
+				self.assertEqual('12345', data['ssn'])
+				self.assertNotIn('first_seen', data)
+		finally:
+			CaretakerView.invalidate_serialization_plan()
+
+		response = self.client.get('/caretaker/')
+		self.assertNotIn('ssn', jsonloads(response.content)['data'][0])
@@ -0,0 +1,120 @@
+from unittest import mock
+
+from django.test import TestCase, Client
+from django.contrib.auth.models import User
+
+from binder.exceptions import BinderForbidden
+from binder.json import jsonloads
+from .testapp.models import Animal, Caretaker, Costume, Zoo
+from .testapp.views import AnimalView, ZooView
+
+
+class StreamingTest(TestCase):
+	def setUp(self):
+		super().setUp()
+		u = User(username='testuser', is_active=True, is_superuser=True)
+		u.set_password('test')
+		u.save()
+		self.client = Client()
+		r = self.client.login(username='testuser', password='test')
+		self.assertTrue(r)
+
+		self.artis = Zoo(name='Artis')
+		self.artis.save()
+		self.gaia = Zoo(name='GaiaZOO')
+		self.gaia.save()
+		self.burgers = Zoo(name='Burgers Zoo')
+		self.burgers.save()
+
+		self.fabbby = Caretaker(name='fabbby')
+		self.fabbby.save()
+
+		for name, zoo in [
+			('Pluto', self.artis), ('Scrooge McDuck', self.artis), ('Donald Duck', self.gaia),
+			('Mickey Mouse', self.gaia), ('Goofy', self.burgers),
+		]:
+			Animal(name=name, zoo=zoo, caretaker=self.fabbby if zoo == self.gaia else None).save()
+
+		Costume(nickname='Bowtie', description='A bowtie', animal=Animal.objects.get(name='Goofy')).save()
+
+
+	def _get(self, path, params, view, streaming):
+		with mock.patch.multiple(view, streaming=streaming, streaming_chunk_size=2):
+			response = self.client.get(path, data=params)
+			self.assertEqual(response.status_code, 200)
+			self.assertEqual(streaming, response.streaming)
+			result = jsonloads(response.getvalue())
+		del result['debug']['request_id']
+		return result
+
+
+	def assertSameResponse(self, path, params, view=AnimalView):
+		expected = self._get(path, params, view, False)
+		result = self._get(path, params, view, True)
+		self.assertEqual(expected, result)
+		return result
+
+
+	def test_streaming_matches_regular_response(self):
+		result = self.assertSameResponse('/animal/', {'order_by': 'name', 'limit': 'none'})
+		self.assertEqual(5, len(result['data']))
+		self.assertEqual(5, result['meta']['total_records'])
+
+
+	def test_streaming_with_withs(self):
+		result = self.assertSameResponse('/animal/', {'order_by': '-name', 'with': 'zoo,caretaker,costume', 'limit': 4})
+		self.assertEqual(4, len(result['data']))
+		self.assertEqual(3, len(result['with']['zoo']))
+		self.assertEqual(1, len(result['with']['caretaker']))
+		self.assertEqual(1, len(result['with']['costume']))
+
+		result = self.assertSameResponse('/zoo/', {'order_by': 'name', 'with': 'animals.caretaker', 'limit': 'none'}, view=ZooView)
+		self.assertEqual(3, len(result['data']))
+		self.assertEqual(5, len(result['with']['animal']))
+
+
+	def test_withs_are_scoped_before_streaming(self):
+		with mock.patch.multiple(AnimalView, streaming=True), mock.patch.object(ZooView, 'get_queryset', side_effect=BinderForbidden('view_zoo', User.objects.get(username='testuser'))) as get_queryset:
+			response = self.client.get('/animal/', data={'with': 'zoo'})
+		self.assertEqual(403, response.status_code)
+		self.assertFalse(response.streaming)
+		get_queryset.assert_called_once()
+
+		# The scoped querysets are made once, and used while streaming
+		with mock.patch.multiple(AnimalView, streaming=True, streaming_chunk_size=2), mock.patch.object(ZooView, 'get_queryset', return_value=Zoo.objects.exclude(pk=self.gaia.pk)) as get_queryset:
+			response = self.client.get('/animal/', data={'with': 'zoo'})
+			self.assertEqual(1, get_queryset.call_count)
+			result = jsonloads(response.getvalue())
+		self.assertEqual(1, get_queryset.call_count)
+		self.assertEqual({'Artis', 'Burgers Zoo'}, {zoo['name'] for zoo in result['with']['zoo']})
+
+
+	def test_streaming_with_where(self):
+		result = self.assertSameResponse('/zoo/', {'with': 'animals', 'where': 'animals(name:startswith=Scr)'}, view=ZooView)
+		self.assertEqual(['Scrooge McDuck'], [a['name'] for a in result['with']['animal']])
+
+
+	def test_streaming_empty_result(self):
+		result = self.assertSameResponse('/animal/', {'.name': 'Nemo', 'with': 'zoo'})
+		self.assertEqual([], result['data'])
+		self.assertEqual({'zoo': []}, result['with'])
+
+
+	def test_streaming_keyset_pagination(self):
+		result = self.assertSameResponse('/animal/', {'order_by': 'name', 'limit': 2, 'after': ''})
+		self.assertEqual(['Donald Duck', 'Goofy'], [a['name'] for a in result['data']])
+
+		result = self.assertSameResponse('/animal/', {'order_by': 'name', 'limit': 2, 'after': result['meta']['next_cursor']})
+		self.assertEqual(['Mickey Mouse', 'Pluto'], [a['name'] for a in result['data']])
+
+		result = self.assertSameResponse('/animal/', {'order_by': 'name', 'limit': 2, 'after': result['meta']['next_cursor']})
+		self.assertEqual(['Scrooge McDuck'], [a['name'] for a in result['data']])
+		self.assertIsNone(result['meta']['next_cursor'])
+
+
+	def test_detail_get_is_not_streamed(self):
+		animal = Animal.objects.get(name='Pluto')
+		with mock.patch.object(AnimalView, 'streaming', True):
+			response = self.client.get('/animal/{}/'.format(animal.pk))
+		self.assertFalse(response.streaming)
+		self.assertEqual('Pluto', jsonloads(response.content)['data']['name'])
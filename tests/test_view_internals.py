@@ -1,4 +1,5 @@
 from django.test import TestCase
+from binder.views import group_ids_by_annotations
 from .testapp.views import ZooView
 
 class ViewInternalsTest(TestCase):
@@ -8,3 +9,19 @@ class ViewInternalsTest(TestCase):
 	def test_obj_diff_on_dicts_with_nulls(self):
 		diff = self.view._obj_diff({'foo': {'bar': 'whatever'}}, {'foo': None}, 'lala')
 		self.assertEqual(["changed lala.foo: {'bar': 'whatever'} -> None"], diff)
+
+	def test_group_ids_by_annotations(self):
+		a, b, c = frozenset(['a']), frozenset(['b']), frozenset(['c'])
+		groups = group_ids_by_annotations({a: {1, 2, 3}, b: {2, 3, 4}, c: {3, 5}})
+		self.assertEqual({
+			a: {1},
+			a | b: {2},
+			a | b | c: {3},
+			b: {4},
+			c: {5},
+		}, groups)
+
+	def test_group_ids_by_annotations_merges_equal_unions(self):
+		a, b, ab = frozenset(['a']), frozenset(['b']), frozenset(['a', 'b'])
+		groups = group_ids_by_annotations({a: {1, 2}, b: {1, 2, 3}, ab: {3}})
+		self.assertEqual({ab: {1, 2, 3}}, groups)
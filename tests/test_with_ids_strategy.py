@@ -0,0 +1,82 @@
+from unittest import mock
+
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth.models import User
+from django.db import connection
+
+from binder.json import jsonloads
+from .testapp.models import Animal, Caretaker, ContactPerson, Zoo, ZooEmployee
+from .testapp.views import AnimalView, ZooView
+
+
+class WithIdsStrategyTest(TestCase):
+	def setUp(self):
+		super().setUp()
+		u = User(username='testuser', is_active=True, is_superuser=True)
+		u.set_password('test')
+		u.save()
+		self.client = Client()
+		r = self.client.login(username='testuser', password='test')
+		self.assertTrue(r)
+
+		self.artis = Zoo(name='Artis')
+		self.artis.save()
+		self.gaia = Zoo(name='GaiaZOO')
+		self.gaia.save()
+		Zoo(name='Burgers Zoo').save()
+
+		fabbby = Caretaker(name='fabbby')
+		fabbby.save()
+		for name in ['Stitch', 'Pluto', 'Scrooge McDuck', 'Simba']:
+			Animal(name=name, zoo=self.artis, caretaker=fabbby).save()
+		Animal(name='Mickey Mouse', zoo=self.gaia).save()
+
+		for name in ['Mr. Zoo', 'Mrs. Zoo', 'Ms. Zoo']:
+			contact = ContactPerson(name=name)
+			contact.save()
+			self.artis.contacts.add(contact)
+		self.gaia.contacts.add(contact)
+
+		for name in ['Henk', 'Ingrid']:
+			ZooEmployee(name=name, zoo=self.artis).save()
+
+
+	def _get(self, view, strategy, path, params):
+		with mock.patch.object(view, 'with_ids_strategy', strategy), CaptureQueriesContext(connection) as queries:
+			response = self.client.get(path, data=params)
+		self.assertEqual(response.status_code, 200)
+		result = jsonloads(response.content)
+		del result['debug']['request_id']
+		return result, [q['sql'] for q in queries.captured_queries]
+
+
+	def test_same_result_as_aggregate(self):
+		for view, path, params in [
+			(ZooView, '/zoo/', {'with': 'animals,contacts,zoo_employees', 'order_by': 'id'}),
+			(ZooView, '/zoo/', {'with': 'animals.caretaker,contacts', 'where': 'animals(name:startswith=S)', 'order_by': 'id'}),
+			(ZooView, '/zoo/{}/'.format(self.artis.pk), {'with': 'animals,contacts', 'where': 'contacts(name:startswith=Mr)'}),
+			(AnimalView, '/animal/', {'with': 'zoo,caretaker', 'order_by': 'id'}),
+		]:
+			expected, _ = self._get(view, 'aggregate', path, params)
+			result, _ = self._get(view, 'subquery', path, params)
+			self.assertEqual(expected, result, params)
+
+
+	def test_ids_are_distinct_in_the_database(self):
+		params = {'.id': self.artis.pk, 'with': 'animals,contacts,zoo_employees'}
+
+		result, queries = self._get(ZooView, 'subquery', '/zoo/', params)
+		self.assertEqual(4, len(result['with']['animal']))
+		self.assertEqual(3, len(result['with']['contact_person']))
+
+		with_ids_queries = [q for q in queries if 'AS "animals"' in q]
+		self.assertEqual(1, len(with_ids_queries))
+		self.assertNotIn('ARRAY_AGG', with_ids_queries[0])
+		self.assertNotIn('GROUP BY', with_ids_queries[0])
+
+		with connection.cursor() as cursor:
+			cursor.execute(with_ids_queries[0])
+			(pk, *arrays), = cursor.fetchall()
+		self.assertEqual(self.artis.pk, pk)
+		self.assertEqual([4, 3, 2], sorted(map(len, arrays), reverse=True))
@@ -0,0 +1,122 @@
+from unittest import mock
+
+from django.test import TestCase, Client
+from django.contrib.auth.models import User
+
+from binder.json import jsonloads
+from .testapp.models import Animal, ContactPerson, Zoo
+from .testapp.views import ZooView
+
+
+class WithLimitTest(TestCase):
+	def setUp(self):
+		super().setUp()
+		u = User(username='testuser', is_active=True, is_superuser=True)
+		u.set_password('test')
+		u.save()
+		self.client = Client()
+		r = self.client.login(username='testuser', password='test')
+		self.assertTrue(r)
+
+		self.artis = Zoo(name='Artis')
+		self.artis.save()
+		self.gaia = Zoo(name='GaiaZOO')
+		self.gaia.save()
+
+		self.pluto = Animal(name='Pluto', zoo=self.artis)
+		self.pluto.save()
+		self.scrooge = Animal(name='Scrooge McDuck', zoo=self.artis)
+		self.scrooge.save()
+		self.stitch = Animal(name='Stitch', zoo=self.artis)
+		self.stitch.save()
+		self.mickey = Animal(name='Mickey Mouse', zoo=self.gaia)
+		self.mickey.save()
+
+		self.contact = ContactPerson(name='Mr. Zoo')
+		self.contact.save()
+		self.artis.contacts.add(self.contact)
+		self.gaia.contacts.add(self.contact)
+
+
+	def _get(self, path, params):
+		response = self.client.get(path, data=params)
+		self.assertEqual(response.status_code, 200)
+		return jsonloads(response.content)
+
+
+	def test_with_limit(self):
+		result = self._get('/zoo/', {'with': 'animals', 'with_limit': 'animals:2', 'order_by': 'id'})
+
+		self.assertEqual([self.pluto.pk, self.scrooge.pk], result['data'][0]['animals'])
+		self.assertEqual([self.mickey.pk], result['data'][1]['animals'])
+		self.assertEqual({self.pluto.pk, self.scrooge.pk, self.mickey.pk}, {a['id'] for a in result['with']['animal']})
+		self.assertEqual({'animals': [self.artis.pk]}, result['meta']['with_truncated'])
+
+
+	def test_with_limit_not_reached(self):
+		result = self._get('/zoo/', {'with': 'animals', 'with_limit': 'animals:3', 'order_by': 'id'})
+
+		self.assertEqual([self.pluto.pk, self.scrooge.pk, self.stitch.pk], result['data'][0]['animals'])
+		self.assertNotIn('with_truncated', result['meta'])
+
+		result = self._get('/zoo/', {'with': 'animals'})
+		self.assertNotIn('with_truncated', result['meta'])
+
+
+	def test_with_limit_applies_after_where(self):
+		result = self._get(
+			'/zoo/{}/'.format(self.artis.pk),
+			{'with': 'animals', 'with_limit': 'animals:1', 'where': 'animals(name:startswith=S)'},
+		)
+
+		self.assertEqual([self.scrooge.pk], result['data']['animals'])
+		self.assertEqual({'animals': [self.artis.pk]}, result['meta']['with_truncated'])
+
+
+	def test_nested_with_limit(self):
+		result = self._get(
+			'/contact_person/{}/'.format(self.contact.pk),
+			{'with': 'zoos.animals', 'with_limit': 'zoos.animals:1'},
+		)
+
+		self.assertEqual({self.pluto.pk, self.mickey.pk}, {a['id'] for a in result['with']['animal']})
+		self.assertEqual({'zoos.animals': [self.artis.pk]}, result['meta']['with_truncated'])
+
+
+	def test_view_default_with_limit(self):
+		with mock.patch.object(ZooView, 'with_limits', {'animals': 1}):
+			result = self._get('/zoo/{}/'.format(self.artis.pk), {'with': 'animals'})
+			self.assertEqual([self.pluto.pk], result['data']['animals'])
+
+			result = self._get('/zoo/{}/'.format(self.artis.pk), {'with': 'animals', 'with_limit': 'animals:5'})
+			self.assertEqual([self.pluto.pk, self.scrooge.pk, self.stitch.pk], result['data']['animals'])
+
+			# Not in the withs, so there's nothing to limit
+			result = self._get('/zoo/{}/'.format(self.artis.pk), {})
+			self.assertNotIn('with_truncated', result['meta'])
+
+
+	def test_invalid_with_limit(self):
+		for params in [
+			{'with': 'animals', 'with_limit': 'animals'},
+			{'with': 'animals', 'with_limit': 'animals:many'},
+			{'with': 'animals', 'with_limit': 'animals:-1'},
+			{'with': 'animals', 'with_limit': 'contacts:1'},
+		]:
+			response = self.client.get('/zoo/', data=params)
+			self.assertEqual(response.status_code, 418, params)
+			self.assertEqual('RequestError', jsonloads(response.content)['code'])
+
+		response = self.client.get('/animal/', data={'with': 'zoo', 'with_limit': 'zoo:1'})
+		self.assertEqual(response.status_code, 418)
+		self.assertEqual('RequestError', jsonloads(response.content)['code'])
+
+
+	def test_with_limit_when_streaming(self):
+		with mock.patch.object(ZooView, 'streaming', True):
+			response = self.client.get('/zoo/', data={'with': 'animals', 'with_limit': 'animals:2', 'order_by': 'id'})
+		self.assertEqual(response.status_code, 200)
+		result = jsonloads(b''.join(response.streaming_content))
+
+		self.assertEqual([self.pluto.pk, self.scrooge.pk], result['data'][0]['animals'])
+		self.assertEqual({'animals': [self.artis.pk]}, result['meta']['with_truncated'])